@@ -0,0 +1,14 @@
+from .base import Completion, ModelBackend
+from .local import LocalBatchedBackend
+from .openai_compat import OpenAICompatibleBackend
+from .registry import available_backends, create_backend, register_backend
+
+__all__ = [
+    "Completion",
+    "LocalBatchedBackend",
+    "ModelBackend",
+    "OpenAICompatibleBackend",
+    "available_backends",
+    "create_backend",
+    "register_backend",
+]
@@ -0,0 +1,82 @@
+# base.py
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+Messages = list[dict[str, str]]
+
+
+class Completion:
+    """
+    One chat completion as returned by a backend.
+
+    Attributes:
+        text: Completion text (stripped).
+        usage: Token usage (prompt_tokens, completion_tokens, cached_tokens) or None.
+        top_logprobs: [(token, logprob), ...] alternatives for the first
+            generated token, when logprobs were requested and supported.
+        texts: Every choice of an n > 1 request (first = `text`); [text] otherwise.
+    """
+
+    __slots__ = ("text", "usage", "top_logprobs", "texts")
+
+    def __init__(
+        self,
+        text: str,
+        usage: Optional[dict[str, int]] = None,
+        top_logprobs: Optional[list[tuple[str, float]]] = None,
+        texts: Optional[list[str]] = None,
+    ) -> None:
+        self.text = text
+        self.usage = usage
+        self.top_logprobs = top_logprobs
+        self.texts = texts if texts is not None else [text]
+
+
+class ModelBackend(ABC):
+    """
+    Abstract inference backend behind Model.
+
+    A backend turns chat messages into completions. `complete_batch` takes
+    many conversations at once; backends that batch natively (in-process
+    models, servers with continuous batching) override it, the default
+    just loops over `complete`.
+    """
+
+    name: str = "base"
+    # Model/Runner consult these before using the optional features
+    supports_structured_output: bool = False
+    supports_logprobs: bool = False
+    supports_batching: bool = False
+    # accepts params["n"] and returns every choice in Completion.texts
+    supports_n: bool = False
+
+    @abstractmethod
+    def complete(
+        self,
+        model_name: str,
+        messages: Messages,
+        *,
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> Completion:
+        """Run one chat completion. Raise ModelError on failure."""
+        pass
+
+    def complete_batch(
+        self,
+        model_name: str,
+        batch: Sequence[Messages],
+        *,
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> list[Completion]:
+        """Run many chat completions; results are in input order."""
+        return [self.complete(model_name, messages, timeout=timeout, **params) for messages in batch]
+
+    def close(self) -> None:
+        """Release backend resources (connections, loaded weights)."""
+        pass
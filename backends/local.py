@@ -0,0 +1,161 @@
+# local.py
+from __future__ import annotations
+from typing import Any, Optional, Sequence
+import logging
+import math
+import threading
+
+from .base import Completion, Messages, ModelBackend
+from errors import ConfigurationError, ModelError
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBatchedBackend(ModelBackend):
+    """
+    In-process Hugging Face transformers backend with batched generation.
+
+    Loads `model_id` once (CPU by default) and generates for up to
+    `max_batch_size` conversations per forward pass, using the tokenizer's
+    chat template and left padding. Needs the optional `transformers` and
+    `torch` packages.
+
+    Supported params: max_tokens, temperature, top_p, n (sequences per
+    conversation; n > 1 needs temperature > 0, as greedy decoding would
+    return n copies of one answer), logprobs/top_logprobs (first token
+    only). response_format is not supported and raises ModelError, so LLM
+    judges fall back to plain JSON prompting. `timeout` is accepted for
+    interface compatibility but ignored: an in-process forward pass cannot
+    be interrupted.
+    """
+
+    name = "local"
+    supports_logprobs = True
+    supports_batching = True
+    supports_n = True
+
+    def __init__(
+        self,
+        model_id: str,
+        *,
+        device: str = "cpu",
+        max_batch_size: int = 8,
+        max_new_tokens: int = 256,
+        dtype: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            model_id: Hugging Face model id or local path.
+            device: torch device ("cpu", "cuda", "mps").
+            max_batch_size: Conversations per generate() call.
+            max_new_tokens: Default completion length (override with max_tokens).
+            dtype: Optional torch dtype name, e.g. "bfloat16".
+        """
+        try:
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+        except ImportError as e:
+            raise ConfigurationError(
+                "LocalBatchedBackend needs the optional 'transformers' and 'torch' packages"
+            ) from e
+        if max_batch_size < 1 or max_new_tokens < 1:
+            raise ValueError("max_batch_size and max_new_tokens must be >= 1")
+
+        self.model_id = model_id
+        self.device = device
+        self.max_batch_size = max_batch_size
+        self.max_new_tokens = max_new_tokens
+        self._torch = torch
+        self._tokenizer = AutoTokenizer.from_pretrained(model_id, padding_side="left")
+        if self._tokenizer.pad_token is None:
+            self._tokenizer.pad_token = self._tokenizer.eos_token
+        kwargs = {"torch_dtype": getattr(torch, dtype)} if dtype else {}
+        self._model = AutoModelForCausalLM.from_pretrained(model_id, **kwargs).to(device)
+        self._model.eval()
+        # one forward pass at a time; concurrent callers queue here
+        self._lock = threading.Lock()
+        logger.info("Loaded local model %s on %s", model_id, device)
+
+    def complete(
+        self,
+        model_name: str,
+        messages: Messages,
+        *,
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> Completion:
+        return self.complete_batch(model_name, [messages], timeout=timeout, **params)[0]
+
+    def complete_batch(
+        self,
+        model_name: str,
+        batch: Sequence[Messages],
+        *,
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> list[Completion]:
+        if "response_format" in params:
+            raise ModelError("LocalBatchedBackend does not support response_format")
+        if int(params.get("n") or 1) > 1 and float(params.get("temperature") or 0.0) <= 0:
+            raise ConfigurationError("LocalBatchedBackend needs temperature > 0 for n > 1 (greedy decoding has one answer)")
+        out: list[Completion] = []
+        for start in range(0, len(batch), self.max_batch_size):
+            out.extend(self._generate(batch[start:start + self.max_batch_size], params))
+        return out
+
+    def _generate(self, batch: Sequence[Messages], params: dict[str, Any]) -> list[Completion]:
+        torch = self._torch
+        tok = self._tokenizer
+        max_new = int(params.get("max_tokens") or params.get("max_completion_tokens") or self.max_new_tokens)
+        temperature = float(params.get("temperature") or 0.0)
+        want_logprobs = bool(params.get("logprobs"))
+        top_k = int(params.get("top_logprobs") or 5)
+        n = int(params.get("n") or 1)
+
+        texts = [tok.apply_chat_template(m, tokenize=False, add_generation_prompt=True) for m in batch]
+        try:
+            with self._lock, torch.no_grad():
+                enc = tok(texts, return_tensors="pt", padding=True).to(self.device)
+                gen = self._model.generate(
+                    **enc,
+                    max_new_tokens=max_new,
+                    do_sample=temperature > 0,
+                    temperature=temperature if temperature > 0 else None,
+                    top_p=params.get("top_p"),
+                    pad_token_id=tok.pad_token_id,
+                    num_return_sequences=n,
+                    return_dict_in_generate=True,
+                    output_scores=want_logprobs,
+                )
+        except Exception as exc:
+            raise ModelError(f"Local generation failed: {exc}") from exc
+
+        prompt_len = enc["input_ids"].shape[1]
+        prompt_tokens = enc["attention_mask"].sum(dim=1).tolist()
+        results = []
+        # sequences come grouped per conversation: n consecutive rows each
+        for i in range(len(batch)):
+            texts, completion_tokens = [], 0
+            for seq in gen.sequences[i * n:(i + 1) * n]:
+                new_tokens = seq[prompt_len:]
+                completion_tokens += int((new_tokens != tok.pad_token_id).sum())
+                texts.append(tok.decode(new_tokens, skip_special_tokens=True).strip())
+            top = None
+            if want_logprobs:
+                logp = torch.log_softmax(gen.scores[0][i * n].float(), dim=-1)
+                values, ids = logp.topk(top_k)
+                top = [
+                    (tok.decode([int(t)]), float(v))
+                    for v, t in zip(values, ids)
+                    if math.isfinite(float(v))
+                ]
+            results.append(Completion(
+                text=texts[0],
+                usage={"prompt_tokens": int(prompt_tokens[i]), "completion_tokens": completion_tokens, "cached_tokens": 0},
+                top_logprobs=top,
+                texts=texts,
+            ))
+        return results
+
+    def close(self) -> None:
+        self._model = None
@@ -0,0 +1,119 @@
+# openai_compat.py
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Sequence
+import logging
+
+from .base import Completion, Messages, ModelBackend
+from errors import ModelError
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAICompatibleBackend(ModelBackend):
+    """
+    Backend for any OpenAI-compatible chat completions endpoint.
+
+    Works against api.openai.com (default) and local servers such as vLLM or
+    llama.cpp (`base_url="http://localhost:8000/v1"`). `complete_batch` sends
+    the whole batch concurrently (up to `batch_concurrency` requests in
+    flight) so servers with continuous batching can schedule them together.
+    """
+
+    name = "openai"
+    supports_structured_output = True
+    supports_logprobs = True
+    supports_batching = True
+    supports_n = True
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        *,
+        batch_concurrency: int = 16,
+    ) -> None:
+        """
+        Args:
+            api_key: API key (local servers usually accept any non-empty value).
+            base_url: Endpoint root, e.g. "http://localhost:8000/v1".
+            batch_concurrency: Requests in flight per complete_batch call.
+        """
+        if not api_key or not isinstance(api_key, str):
+            raise ValueError("api_key must be a non-empty string")
+        if batch_concurrency < 1:
+            raise ValueError("batch_concurrency must be >= 1")
+        from openai import OpenAI
+
+        self.base_url = base_url
+        self.batch_concurrency = batch_concurrency
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+
+    @staticmethod
+    def _usage(response: Any) -> Optional[dict[str, int]]:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+        }
+
+    @staticmethod
+    def _top_logprobs(choice: Any) -> Optional[list[tuple[str, float]]]:
+        content = getattr(getattr(choice, "logprobs", None), "content", None)
+        if not content:
+            return None
+        return [(alt.token, alt.logprob) for alt in (content[0].top_logprobs or [])]
+
+    def complete(
+        self,
+        model_name: str,
+        messages: Messages,
+        *,
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> Completion:
+        if timeout is not None:
+            # None would disable the client's own default timeout
+            params["timeout"] = timeout
+        try:
+            response = self.client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                **params
+            )
+        except Exception as exc:
+            raise ModelError(f"Model request failed: {exc}") from exc
+
+        choice = response.choices[0]
+        texts = [(c.message.content or "").strip() for c in response.choices]
+        return Completion(
+            text=texts[0],
+            usage=self._usage(response),
+            top_logprobs=self._top_logprobs(choice),
+            texts=texts,
+        )
+
+    def complete_batch(
+        self,
+        model_name: str,
+        batch: Sequence[Messages],
+        *,
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> list[Completion]:
+        if len(batch) <= 1:
+            return super().complete_batch(model_name, batch, timeout=timeout, **params)
+        workers = min(self.batch_concurrency, len(batch))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(self.complete, model_name, messages, timeout=timeout, **params)
+                for messages in batch
+            ]
+            return [f.result() for f in futures]
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,52 @@
+# registry.py
+from __future__ import annotations
+from typing import Any, Callable
+import logging
+
+from .base import ModelBackend
+from errors import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+BackendFactory = Callable[..., ModelBackend]
+
+_REGISTRY: dict[str, BackendFactory] = {}
+
+
+def register_backend(name: str, factory: BackendFactory, *, replace: bool = False) -> None:
+    """Register a backend factory under `name` (e.g. a ModelBackend subclass)."""
+    if not name or not isinstance(name, str):
+        raise ValueError("backend name must be a non-empty string")
+    if name in _REGISTRY and not replace:
+        raise ConfigurationError(f"Backend {name!r} is already registered")
+    _REGISTRY[name] = factory
+
+
+def available_backends() -> list[str]:
+    return sorted(_REGISTRY)
+
+
+def create_backend(name: str, **kwargs: Any) -> ModelBackend:
+    """Instantiate the backend registered as `name` with `kwargs`."""
+    try:
+        factory = _REGISTRY[name]
+    except KeyError:
+        raise ConfigurationError(
+            f"Unknown model backend {name!r}; available: {available_backends()}"
+        ) from None
+    return factory(**kwargs)
+
+
+def _openai(**kwargs: Any) -> ModelBackend:
+    from .openai_compat import OpenAICompatibleBackend
+    return OpenAICompatibleBackend(**kwargs)
+
+
+def _local(**kwargs: Any) -> ModelBackend:
+    # imported lazily: pulls in torch/transformers
+    from .local import LocalBatchedBackend
+    return LocalBatchedBackend(**kwargs)
+
+
+register_backend("openai", _openai)
+register_backend("local", _local)
@@ -0,0 +1 @@
+"""Performance benchmark suite for the benchmarking system itself."""
@@ -0,0 +1,214 @@
+# fake_server.py
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+Used by the benchmark suite so that model-driven paths (Runner, LLM judges,
+the full pipeline) can run end-to-end without network access or API costs.
+Latency is simulated per request and is configurable.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+Responder = Callable[[list[dict[str, Any]], dict[str, Any]], str]
+# (completion text, request body) -> {token: probability} for the first token
+TokenDistribution = Callable[[str, dict[str, Any]], dict[str, float]]
+
+
+def default_responder(messages: list[dict[str, Any]], body: dict[str, Any]) -> str:
+    """Answer judge prompts with valid JSON and everything else with a short answer."""
+    user = messages[-1].get("content", "") if messages else ""
+    if '"passed"' in user:
+        return '{"passed": true}'
+    if '"score"' in user:
+        return '{"score": 7}'
+    if "Options:" in user:
+        return "A"
+    return "This is a benchmark answer."
+
+
+def default_token_distribution(text: str, body: dict[str, Any]) -> dict[str, float]:
+    """First completion token gets 0.7; option letters and a filler token share the rest."""
+    token = text.strip()[:1] or " "
+    others = [c for c in "ABCD" if c != token]
+    dist = {token: 0.7, "The": 0.05}
+    dist.update({c: 0.25 / len(others) for c in others})
+    return dist
+
+
+class FakeOpenAIServer:
+    """
+    Threaded HTTP server answering POST /v1/chat/completions.
+
+    Usage:
+        with FakeOpenAIServer(latency_ms=50) as srv:
+            model = Model("fake", api_key="x", base_url=srv.base_url)
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        responder: Optional[Responder] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 42,
+        prefix_cache_block: int = 128,
+        token_distribution: Optional[TokenDistribution] = None,
+    ) -> None:
+        """
+        Args:
+            latency_ms: Base latency added to every request.
+            jitter_ms: Uniform random jitter (+/-) added to the base latency.
+            responder: Callable(messages, body) -> completion text.
+            host: Interface to bind.
+            port: Port to bind (0 = pick a free port).
+            seed: Seed for the jitter RNG.
+            prefix_cache_block: Simulate provider prefix caching in blocks of this
+                many prompt characters (0 = off); hits are reported as
+                usage.prompt_tokens_details.cached_tokens.
+            token_distribution: Callable(text, body) -> {token: prob} used to answer
+                logprobs=True requests (first token only; max_tokens=1 truncates
+                the completion to that token).
+        """
+        if latency_ms < 0 or jitter_ms < 0:
+            raise ValueError("latency_ms and jitter_ms must be >= 0")
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.responder = responder or default_responder
+        self.token_distribution = token_distribution or default_token_distribution
+        self.request_count = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.prefix_cache_block = prefix_cache_block
+        self._seen_prefixes: set[int] = set()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _sleep_for(self) -> float:
+        with self._lock:
+            self.request_count += 1
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+    def _cached_chars(self, prompt: str) -> int:
+        """Length of the longest block-aligned prefix of `prompt` seen before."""
+        block = self.prefix_cache_block
+        if block <= 0:
+            return 0
+        cached = 0
+        with self._lock:
+            for end in range(block, len(prompt) + 1, block):
+                h = hash(prompt[:end])
+                if h in self._seen_prefixes:
+                    cached = end
+                else:
+                    self._seen_prefixes.add(h)
+        return cached
+
+    def _logprobs(self, text: str, body: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        """Completion text (truncated for max_tokens=1) and the choice's logprobs block."""
+        dist = self.token_distribution(text, body)
+        top = sorted(dist.items(), key=lambda kv: kv[1], reverse=True)[: int(body.get("top_logprobs") or 1)]
+
+        def entry(tok: str, p: float) -> dict[str, Any]:
+            return {"token": tok, "logprob": math.log(p), "bytes": list(tok.encode("utf-8"))}
+
+        first = top[0][0]
+        if (body.get("max_tokens") or body.get("max_completion_tokens")) == 1:
+            text = first
+        return text, {"content": [{**entry(first, dist[first]), "top_logprobs": [entry(t, p) for t, p in top]}]}
+
+    def _completion(self, body: dict[str, Any]) -> dict[str, Any]:
+        messages = body.get("messages") or []
+        text = self.responder(messages, body)
+        logprobs = None
+        if body.get("logprobs"):
+            text, logprobs = self._logprobs(text, body)
+        prompt = "".join(str(m.get("content", "")) for m in messages)
+        prompt_chars = len(prompt)
+        cached_chars = self._cached_chars(prompt)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "logprobs": logprobs,
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "prompt_tokens_details": {"cached_tokens": cached_chars // 4},
+                "completion_tokens": max(1, len(text) // 4),
+                "total_tokens": prompt_chars // 4 + max(1, len(text) // 4),
+            },
+        }
+
+    def _make_handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802 (http.server naming)
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self.send_error(400, "invalid JSON body")
+                    return
+
+                time.sleep(server._sleep_for())
+                payload = json.dumps(server._completion(body)).encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug("fake-server: " + format, *args)
+
+        return Handler
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("Fake OpenAI server listening on %s", self.base_url)
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
@@ -0,0 +1,220 @@
+# harness.py
+"""
+Minimal timing harness and synthetic data generators for the benchmark suite.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def make_qa_frame(n: int, seed: int = 42, n_options: int = 4) -> pd.DataFrame:
+    """Synthetic dataset with the columns Runner and the judges expect."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n)
+    words = np.array(["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"])
+    answers = words[rng.integers(0, len(words), size=n)]
+    letters = np.array([chr(65 + j) for j in range(n_options)])
+    return pd.DataFrame({
+        "question_id": ids,
+        "question": [f"Question {i}: which word is number {i % 97}?" for i in ids],
+        "answer": answers,
+        "letter": letters[rng.integers(0, n_options, size=n)],
+        "options": [[f"option {j} for {i}" for j in range(n_options)] for i in ids],
+    })
+
+
+def make_results_frame(n: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic Runner output: half of the model answers contain the true answer."""
+    df = make_qa_frame(n, seed=seed)
+    hit = np.arange(n) % 2 == 0
+    model_answer = np.where(hit, "The answer is " + df["answer"] + ".", "I am not sure.")
+    return pd.DataFrame({
+        "question_id": df["question_id"],
+        "question": df["question"],
+        "options": df["options"],
+        "true_answer": df["answer"],
+        "model_answer": model_answer,
+    })
+
+
+def write_dataset(df: pd.DataFrame, path: Path) -> Path:
+    """Write `df` in the format implied by the extension of `path`."""
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        df.to_csv(path, index=False)
+    elif ext == ".jsonl":
+        df.to_json(path, orient="records", lines=True)
+    elif ext == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported benchmark dataset extension: {ext}")
+    return path
+
+
+def measure(
+    name: str,
+    fn: Callable[[], Any],
+    *,
+    rows: Optional[int] = None,
+    repeat: int = 3,
+    warmup: int = 1,
+    setup: Optional[Callable[[], Any]] = None,
+) -> dict[str, Any]:
+    """
+    Time `fn` `repeat` times (after `warmup` untimed calls).
+
+    If `setup` is given it is called before every invocation (untimed) and
+    its return value is passed to `fn`.
+    """
+    def call() -> float:
+        arg = setup() if setup is not None else None
+        gc.collect()
+        t0 = time.perf_counter()
+        fn(arg) if setup is not None else fn()
+        return time.perf_counter() - t0
+
+    for _ in range(warmup):
+        call()
+    times = [call() for _ in range(repeat)]
+
+    median = statistics.median(times)
+    result = {
+        "name": name,
+        "rows": rows,
+        "repeat": repeat,
+        "min_s": round(min(times), 6),
+        "median_s": round(median, 6),
+        "mean_s": round(statistics.fmean(times), 6),
+        "rows_per_s": round(rows / median, 1) if rows and median > 0 else None,
+    }
+    logger.info("%-45s median=%.4fs rows/s=%s", name, median, result["rows_per_s"])
+    return result
+
+
+def measure_peak_memory(name: str, fn: Callable[[], Any], *, rows: Optional[int] = None) -> dict[str, Any]:
+    """Run `fn` once under tracemalloc and report the peak Python heap allocation."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        "name": name,
+        "rows": rows,
+        "peak_mem_mb": round(peak / 2**20, 2),
+        "bytes_per_row": round(peak / rows, 1) if rows else None,
+        "elapsed_s_traced": round(elapsed, 6),
+    }
+    logger.info("%-45s peak=%.1fMB", name, result["peak_mem_mb"])
+    return result
+
+
+def measure_import_time(
+    module: str,
+    *,
+    repeat: int = 5,
+    budget_ms: Optional[float] = None,
+    cwd: Optional[Path] = None,
+) -> dict[str, Any]:
+    """
+    Time `import module` in fresh interpreters (interpreter startup excluded).
+    With `budget_ms` the result is flagged `over_budget` when the median exceeds it.
+    """
+    code = f"import time; t0 = time.perf_counter(); import {module}; print(time.perf_counter() - t0)"
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=cwd)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    median = statistics.median(times)
+    result = {
+        "name": f"import[{module}]",
+        "rows": None,
+        "repeat": repeat,
+        "min_s": round(min(times), 6),
+        "median_s": round(median, 6),
+        "mean_s": round(statistics.fmean(times), 6),
+        "budget_ms": budget_ms,
+        "over_budget": budget_ms is not None and median * 1000.0 > budget_ms,
+    }
+    logger.info("%-45s median=%.1fms budget=%s", result["name"], median * 1000.0, budget_ms)
+    return result
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info() -> dict[str, Any]:
+    return {
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+    }
+
+
+def save_results(results: list[dict[str, Any]], path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"environment": environment_info(), "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=4)
+    logger.info("Benchmark results saved to %s", path)
+    return path
+
+
+def compare_results(baseline_path: Path, current: list[dict[str, Any]], threshold: float = 1.10) -> list[dict[str, Any]]:
+    """
+    Compare `current` against a previous results JSON.
+
+    Returns one entry per benchmark present in both, flagged as a regression
+    when the median time (or peak memory) grew by more than `threshold` (ratio).
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+
+    rows = []
+    for r in current:
+        old = baseline.get(r["name"])
+        metric = "median_s" if "median_s" in r else "peak_mem_mb"
+        if not old or not old.get(metric):
+            continue
+        ratio = r[metric] / old[metric]
+        rows.append({
+            "name": r["name"],
+            "metric": metric,
+            "baseline": old[metric],
+            "current": r[metric],
+            "ratio": round(ratio, 3),
+            "regression": ratio > threshold,
+        })
+    return rows
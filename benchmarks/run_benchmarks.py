@@ -0,0 +1,281 @@
+# run_benchmarks.py
+"""
+Benchmark suite for the benchmarking system's own hot paths.
+
+Covers import/startup time (the CLI module has a budget),
+dataset loading/sampling, the Runner prompt-building loop, every
+judge's check_answers, evaluator compute and (against a local fake
+OpenAI-compatible server) the model-driven paths end-to-end.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks --quick
+    python -m benchmarks.run_benchmarks --baseline outputs/benchmarks/bench_prev.json
+
+Results are written to outputs/benchmarks/bench_{timestamp}.json.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.harness import (  # noqa: E402
+    compare_results,
+    make_qa_frame,
+    make_results_frame,
+    measure,
+    measure_import_time,
+    measure_peak_memory,
+    save_results,
+    write_dataset,
+)
+from evaluators import AccuracyEvaluator, ScoreEvaluator  # noqa: E402
+from judges import Contains, Equals, MCQExtract  # noqa: E402
+from judges.JSONequality import JSONEquals  # noqa: E402
+from logging_conf import setup_logging  # noqa: E402
+from replay_model import SyntheticModel  # noqa: E402
+from result_store import ResultStore  # noqa: E402
+from runner import Runner  # noqa: E402
+from task import Task, TaskType  # noqa: E402
+from utils import load_dataset, sample_dataset  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def bench_imports(repeat: int, budget_ms: float) -> list[dict[str, Any]]:
+    """Cold import time of the CLI (budgeted) and of the modules its subcommands load."""
+    results = [measure_import_time("cli", repeat=repeat, budget_ms=budget_ms, cwd=REPO_ROOT)]
+    for module in ("pipeline", "judges.equals", "model"):
+        results.append(measure_import_time(module, repeat=repeat, cwd=REPO_ROOT))
+    return results
+
+
+def bench_io(workdir: Path, rows: int, repeat: int) -> list[dict[str, Any]]:
+    results = []
+    df = make_qa_frame(rows).drop(columns=["options"])
+    exts = [".csv", ".jsonl"]
+    if importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet"):
+        exts.append(".parquet")
+    else:
+        logger.warning("No parquet engine installed; skipping parquet benchmarks")
+
+    for ext in exts:
+        path = write_dataset(df, workdir / f"dataset_{rows}{ext}")
+        results.append(measure(f"load_dataset[{ext[1:]}]", lambda p=path: load_dataset(p), rows=rows, repeat=repeat))
+        results.append(measure(
+            f"sample_dataset[{ext[1:]}]",
+            lambda p=path: sample_dataset(p, max(1, rows // 10), seed=42),
+            rows=rows, repeat=repeat,
+        ))
+    return results
+
+
+def bench_runner(workdir: Path, rows: int, repeat: int) -> list[dict[str, Any]]:
+    results = []
+    df = make_qa_frame(rows)
+    mcq = df.assign(answer=df["letter"])
+    write_dataset(df.drop(columns=["options"]), workdir / "runner_open.jsonl")
+    write_dataset(mcq, workdir / "runner_mcq.jsonl")
+
+    runner = Runner(SyntheticModel(latency_ms=0), dedupe=False)
+    open_task = Task.new(TaskType.WITH_TRUE_ANSWER, workdir / "runner_open.jsonl", rows)
+    mcq_task = Task.new(TaskType.MULTIPLE_CHOICE, workdir / "runner_mcq.jsonl", rows)
+    results.append(measure("runner.run[with_true_answer]", lambda: runner.run(open_task, measure_k=0), rows=rows, repeat=repeat))
+    results.append(measure("runner.run[multiple_choice]", lambda: runner.run(mcq_task, measure_k=0), rows=rows, repeat=repeat))
+    return results
+
+
+def bench_judges(workdir: Path, sizes: list[int], repeat: int) -> list[dict[str, Any]]:
+    results = []
+    out_csv = str(workdir / "judged.csv")
+    for n in sizes:
+        base = make_results_frame(n)
+        letters = base.assign(true_answer="A", model_answer=["A" if i % 2 else "b" for i in range(n)])
+        jsons = base.assign(
+            true_answer='{"a": 1, "b": [1, 2]}',
+            model_answer=['{"b": [1, 2], "a": 1}' if i % 2 else '{"a": 2}' for i in range(n)],
+        )
+        phrasings = ["The answer is B.", "(a)", "Answer: C", "B) option 1", "I am not sure", "A or D"]
+        mcq = base.assign(true_answer="B", model_answer=[phrasings[i % len(phrasings)] for i in range(n)])
+        cases = [
+            ("Equals", Equals(), letters),
+            ("Contains", Contains(), base),
+            ("JSONEquals", JSONEquals(), jsons),
+            ("MCQExtract", MCQExtract(), mcq),
+        ]
+        for name, judge, frame in cases:
+            results.append(measure(
+                f"{name}.check_answers",
+                lambda df, j=judge: j.check_answers({}, df, out_csv),
+                setup=lambda f=frame: f.copy(),
+                rows=n, repeat=repeat,
+            ))
+    return results
+
+
+def bench_evaluators(workdir: Path, sizes: list[int], repeat: int) -> list[dict[str, Any]]:
+    import numpy as np
+    import pandas as pd
+
+    results = []
+    out_json = str(workdir / "eval.json")
+    for n in sizes:
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({"is_correct": rng.integers(0, 2, size=n), "score": rng.uniform(0, 10, size=n)})
+        results.append(measure("AccuracyEvaluator.compute", lambda: AccuracyEvaluator().compute({}, df, out_json), rows=n, repeat=repeat))
+        results.append(measure("ScoreEvaluator.compute", lambda: ScoreEvaluator().compute({}, df, out_json), rows=n, repeat=repeat))
+    return results
+
+
+def bench_memory(workdir: Path, rows: int, runner_rows: int) -> list[dict[str, Any]]:
+    """Peak memory of in-run result accumulation and of a full Runner.run."""
+    import pandas as pd
+
+    src = make_qa_frame(rows)
+    qids, questions, answers = (src[c].tolist() for c in ("question_id", "question", "letter"))
+    # per-row copies with repeated content, as produced by JSON parsing and API responses
+    opts = [[f"option {j}" for j in range(4)] for _ in range(rows)]
+    model_answers = [f"The answer is {a}" for a in answers]
+
+    def list_of_dicts() -> None:
+        out = [
+            {"question_id": q, "question": qs, "options": o, "true_answer": a, "model_answer": m}
+            for q, qs, o, a, m in zip(qids, questions, opts, answers, model_answers)
+        ]
+        pd.DataFrame(out)
+
+    def result_store() -> None:
+        store = ResultStore()
+        for q, qs, o, a, m in zip(qids, questions, opts, answers, model_answers):
+            store.append(q, qs, o, a, m)
+        store.to_frame()
+
+    df = make_qa_frame(runner_rows)
+    write_dataset(df.assign(answer=df["letter"]), workdir / "memory_mcq.jsonl")
+    runner = Runner(SyntheticModel(latency_ms=0), dedupe=False)
+    task = Task.new(TaskType.MULTIPLE_CHOICE, workdir / "memory_mcq.jsonl", runner_rows)
+
+    return [
+        measure_peak_memory("results.list_of_dicts", list_of_dicts, rows=rows),
+        measure_peak_memory("results.ResultStore", result_store, rows=rows),
+        measure_peak_memory("runner.run[multiple_choice,peak_mem]", lambda: runner.run(task, measure_k=0), rows=runner_rows),
+    ]
+
+
+def bench_model_paths(workdir: Path, rows: int, latency_ms: float, concurrency: int, repeat: int) -> list[dict[str, Any]]:
+    """End-to-end paths that talk to an OpenAI-compatible endpoint."""
+    if importlib.util.find_spec("openai") is None:
+        logger.warning("openai not installed; skipping model-driven benchmarks")
+        return []
+
+    from benchmarks.fake_server import FakeOpenAIServer
+    from judges import PromptBasedBoolean, PromptBasedScore
+    from model import Model
+
+    results = []
+    df = make_qa_frame(rows).drop(columns=["options"])
+    write_dataset(df, workdir / "model_open.jsonl")
+    task = Task.new(TaskType.WITH_TRUE_ANSWER, workdir / "model_open.jsonl", rows)
+    out_csv = str(workdir / "judged.csv")
+    tag = f"latency={latency_ms:g}ms,concurrency={concurrency}"
+
+    with FakeOpenAIServer(latency_ms=latency_ms) as srv:
+        model = Model("fake-model", api_key="benchmark", base_url=srv.base_url)
+        runner = Runner(model, concurrency=concurrency, dedupe=False)
+        results.append(measure(f"runner.run[fake-server,{tag}]", lambda: runner.run(task, measure_k=0), rows=rows, repeat=repeat, warmup=0))
+
+        judged = make_results_frame(rows)
+        for judge in (PromptBasedBoolean(model, "Is it correct?"), PromptBasedScore(model, "Rate the answer.")):
+            results.append(measure(
+                f"{type(judge).__name__}.check_answers[fake-server,{tag}]",
+                lambda f, j=judge: j.check_answers({}, f, out_csv),
+                setup=lambda: judged.copy(),
+                rows=rows, repeat=repeat, warmup=0,
+            ))
+
+        from pipeline import run_benchmark_pipeline
+
+        results.append(measure(
+            f"run_benchmark_pipeline[fake-server,{tag}]",
+            lambda: run_benchmark_pipeline(
+                task=task, model_under_test=model, judge=Contains(),
+                evaluator=AccuracyEvaluator(), measure_k=0, concurrency=concurrency,
+            ),
+            rows=rows, repeat=repeat, warmup=0,
+        ))
+    return results
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark the benchmarking system.")
+    p.add_argument("--rows", type=int, default=100_000, help="rows for dataset I/O benchmarks")
+    p.add_argument("--runner-rows", type=int, default=50_000, help="rows for the Runner prompt-building benchmark")
+    p.add_argument("--judge-rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--memory-rows", type=int, default=1_000_000, help="rows for result-store memory benchmarks")
+    p.add_argument("--model-rows", type=int, default=200, help="rows for fake-server benchmarks")
+    p.add_argument("--latency-ms", type=float, default=20.0, help="simulated fake-server latency")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--import-budget-ms", type=float, default=100.0, help="max median import time of the CLI module")
+    p.add_argument("--quick", action="store_true", help="small sizes for a fast smoke run")
+    p.add_argument("--skip-model", action="store_true", help="skip fake-server benchmarks")
+    p.add_argument("--output", type=Path, default=None)
+    p.add_argument("--baseline", type=Path, default=None, help="previous results JSON to compare against")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    setup_logging()
+    args = parse_args(argv)
+    if args.quick:
+        args.rows, args.runner_rows, args.judge_rows, args.model_rows, args.repeat = 10_000, 5_000, [10_000], 50, 1
+        args.memory_rows = 100_000
+
+    output = (args.output or REPO_ROOT / "outputs" / "benchmarks" / f"bench_{time.strftime('%Y%m%d%H%M%S')}.json").resolve()
+    baseline = args.baseline.resolve() if args.baseline else None
+
+    results: list[dict[str, Any]] = bench_imports(max(args.repeat, 3), args.import_budget_ms)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        workdir = Path(tmp)
+        # Runner writes to ./outputs/runs; keep benchmark runs out of the real tree
+        os.chdir(workdir)
+        try:
+            results += bench_io(workdir, args.rows, args.repeat)
+            results += bench_runner(workdir, args.runner_rows, args.repeat)
+            results += bench_judges(workdir, args.judge_rows, args.repeat)
+            results += bench_evaluators(workdir, args.judge_rows, args.repeat)
+            results += bench_memory(workdir, args.memory_rows, args.runner_rows)
+            if not args.skip_model:
+                results += bench_model_paths(workdir, args.model_rows, args.latency_ms, args.concurrency, args.repeat)
+        finally:
+            os.chdir(cwd)
+
+    save_results(results, output)
+
+    over_budget = [r["name"] for r in results if r.get("over_budget")]
+    for name in over_budget:
+        logger.error("%s is over its import-time budget", name)
+
+    if baseline is not None:
+        regressions = 0
+        for row in compare_results(baseline, results):
+            flag = "REGRESSION" if row["regression"] else "ok"
+            regressions += row["regression"]
+            logger.info("%-60s x%.3f %s", row["name"], row["ratio"], flag)
+        return 1 if regressions or over_budget else 0
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+# cli.py
+"""
+Command-line entry point for the benchmarking system.
+
+    python cli.py run --dataset data.csv --task-type with_true_answer --model gpt-4o-mini
+    python cli.py judge outputs/runs/<run_id>/run_<run_id>.csv --judge contains
+    python cli.py evaluate judged.csv --evaluator accuracy
+    python cli.py rejudge <run_id> [<run_id> ...] --judge mcq
+    python cli.py suite suite.toml
+
+Heavy dependencies (pandas, the model client, LLM judges) are imported
+inside the subcommand that needs them, so `--help` and string-judge
+workflows start quickly. API keys are read from --api-key or
+OPENAI_API_KEY (a .env file is loaded when python-dotenv is installed).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from errors import BenchmarkError
+from suite import EVALUATORS, LLM_JUDGES, STRING_JUDGES
+
+logger = logging.getLogger(__name__)
+
+TASK_TYPES = ("multiple_choice", "with_true_answer", "no_true_answer")
+
+
+def _key_values(pairs: Sequence[str] | None) -> dict[str, Any]:
+    """["temperature=0", "stop=[\"\\n\"]"] -> {"temperature": 0, "stop": ["\n"]} (JSON values, else strings)."""
+    out: dict[str, Any] = {}
+    for pair in pairs or ():
+        key, sep, value = pair.partition("=")
+        if not sep or not key:
+            raise ValueError(f"Expected KEY=VALUE, got {pair!r}")
+        try:
+            out[key] = json.loads(value)
+        except json.JSONDecodeError:
+            out[key] = value
+    return out
+
+
+def _load_env() -> None:
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def _build_model(args: argparse.Namespace, name: str, system_prompt: str | None = None, params: Sequence[str] | None = None) -> Any:
+    from model import Model
+
+    api_key = args.api_key or os.getenv("OPENAI_API_KEY")
+    return Model(
+        name,
+        api_key=api_key,
+        system_prompt=system_prompt,
+        params=_key_values(params),
+        base_url=args.base_url,
+        backend=args.backend,
+        backend_options=_key_values(args.backend_option),
+    )
+
+
+def _build_hedge(args: argparse.Namespace) -> Any:
+    if args.hedge_after_ms is None and args.hedge_quantile is None:
+        return None
+    from hedging import HedgePolicy
+
+    return HedgePolicy(
+        after_ms=args.hedge_after_ms,
+        quantile=args.hedge_quantile or 0.95,
+        max_extra=args.hedge_budget,
+    )
+
+
+def _build_preflight(args: argparse.Namespace) -> Any:
+    if args.context_limit is None and not args.pilot_size and args.max_cost is None and args.max_total_tokens is None:
+        return None
+    from preflight import PreflightPolicy
+
+    return PreflightPolicy(
+        context_limit=args.context_limit,
+        on_overflow=args.on_overflow,
+        pilot_size=args.pilot_size,
+        price_per_mtok=args.price_per_mtok,
+        max_tokens=args.max_total_tokens,
+        max_cost_usd=args.max_cost,
+    )
+
+
+def _build_judge(args: argparse.Namespace) -> Any:
+    from suite import build_judge
+
+    if args.judge not in LLM_JUDGES:
+        return build_judge(args.judge)
+    if not args.judge_model or not args.judge_prompt:
+        raise ValueError(f"--judge {args.judge} needs --judge-model and --judge-prompt")
+    return build_judge(
+        args.judge,
+        model=_build_model(args, args.judge_model),
+        prompt=args.judge_prompt,
+        timeout=args.timeout,
+        hedge=_build_hedge(args),
+    )
+
+
+def _stratum_sd(args: argparse.Namespace) -> dict[str, float] | None:
+    """--stratum-sd pairs, or per-stratum std of is_correct/score in an earlier judged run."""
+    if args.stratum_sd_from:
+        from sampling import STRATUM_COLUMN, stratum_sd
+        from utils import load_dataset
+
+        df = load_dataset(args.stratum_sd_from)
+        by = STRATUM_COLUMN if STRATUM_COLUMN in df.columns else args.stratify_by
+        column = "is_correct" if "is_correct" in df.columns else "score"
+        return stratum_sd(df, by, column)
+    return {k: float(v) for k, v in _key_values(args.stratum_sd).items()} or None
+
+
+def _build_evaluator(name: str, slices: Optional[list[str]] = None) -> Any:
+    from suite import build_evaluator
+
+    if not slices:
+        return build_evaluator(name)
+    if name not in ("accuracy", "score"):
+        raise ValueError(f"--slice needs the accuracy or score evaluator, not {name!r}")
+    return build_evaluator(name, slices=slices)
+
+
+def _print_json(payload: Any) -> None:
+    json.dump(payload, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    sys.stdout.write("\n")
+
+
+# ---------- subcommands ----------
+
+def cmd_run(args: argparse.Namespace) -> int:
+    from pipeline import run_benchmark_pipeline
+    from task import Task, TaskType
+
+    task = Task.new(
+        TaskType(args.task_type),
+        args.dataset,
+        args.sample_size,
+        prompt_template=args.prompt_template,
+        seed=args.seed,
+        stratify_by=args.stratify_by,
+        allocation=args.allocation,
+        stratum_sd=_stratum_sd(args),
+        weight_column=args.weight_column,
+    )
+    out = run_benchmark_pipeline(
+        task=task,
+        model_under_test=_build_model(args, args.model, args.system_prompt, args.param),
+        judge=_build_judge(args),
+        evaluator=_build_evaluator(args.evaluator, args.slice),
+        measure_k=args.measure_k,
+        concurrency=args.concurrency,
+        dedupe=not args.no_dedupe,
+        prefix_cache_layout=args.prefix_cache_layout,
+        mcq_scoring=args.mcq_scoring,
+        batch_size=args.batch_size,
+        n_samples=args.n_samples,
+        preflight=_build_preflight(args),
+        base_run=args.base_run,
+        timeout=args.timeout,
+        hedge=_build_hedge(args),
+        trace=args.trace,
+    )
+    _print_json({k: v for k, v in out.items() if k != "meta"} | {"run_id": out["meta"]["run_id"]})
+    return 0
+
+
+def cmd_judge(args: argparse.Namespace) -> int:
+    from utils import load_dataset
+
+    source = Path(args.input)
+    output = Path(args.output) if args.output else source.with_name(f"{source.stem}_judged.csv")
+    df = load_dataset(source)
+    meta, _ = _build_judge(args).check_answers({"source": str(source)}, df, str(output))
+    _print_json({"judged_csv": str(output), "judge": meta.get("judge")})
+    return 0
+
+
+def cmd_evaluate(args: argparse.Namespace) -> int:
+    from utils import load_dataset
+
+    source = Path(args.input)
+    output = Path(args.output) if args.output else source.with_name(f"{source.stem}_eval.json")
+    df = load_dataset(source)
+    meta = {"source": str(source)}
+    if args.dataset:
+        meta["dataset_path"] = args.dataset
+    result = _build_evaluator(args.evaluator, args.slice).compute(meta, df, str(output))
+    _print_json({"eval_json": str(output), "out": result.get("out")})
+    return 0
+
+
+def cmd_rejudge(args: argparse.Namespace) -> int:
+    from pipeline import rejudge_runs
+
+    results = rejudge_runs(
+        args.runs,
+        judge=_build_judge(args),
+        evaluator=_build_evaluator(args.evaluator, args.slice),
+        version=args.version,
+        max_workers=args.max_workers,
+    )
+    _print_json([{k: v for k, v in r.items() if k != "meta"} for r in results])
+    return 1 if any("error" in r for r in results) else 0
+
+
+def cmd_suite(args: argparse.Namespace) -> int:
+    from suite import BenchmarkSuite
+
+    result = BenchmarkSuite.from_file(args.spec, max_workers=args.max_workers).run(force=args.force)
+    _print_json({k: v for k, v in result.items() if k != "nodes"})
+    return 1 if result["counts"].get("failed") or result["counts"].get("skipped") else 0
+
+
+# ---------- parser ----------
+
+def _add_model_args(p: argparse.ArgumentParser) -> None:
+    g = p.add_argument_group("model backend")
+    g.add_argument("--api-key", default=None, help="API key (default: $OPENAI_API_KEY)")
+    g.add_argument("--base-url", default=None, help="OpenAI-compatible endpoint, e.g. http://localhost:8000/v1")
+    g.add_argument("--backend", default="openai", help="registered model backend (openai, local, ...)")
+    g.add_argument("--backend-option", action="append", metavar="KEY=VALUE", help="backend constructor argument")
+    g.add_argument("--timeout", type=float, default=None, help="deadline in seconds per model call")
+    g.add_argument("--hedge-quantile", type=float, default=None, help="hedge calls slower than this live latency quantile (e.g. 0.95)")
+    g.add_argument("--hedge-after-ms", type=float, default=None, help="hedge calls slower than this fixed threshold")
+    g.add_argument("--hedge-budget", type=float, default=0.05, help="max duplicate requests per call (default 0.05)")
+
+
+def _add_judge_args(p: argparse.ArgumentParser, default: str | None = None) -> None:
+    g = p.add_argument_group("judge")
+    g.add_argument("--judge", choices=STRING_JUDGES + LLM_JUDGES, default=default, required=default is None)
+    g.add_argument("--judge-model", default=None, help="model name for the bool/score LLM judges")
+    g.add_argument("--judge-prompt", default=None, help="evaluation prompt for the bool/score LLM judges")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="benchmark", description="Run, judge and evaluate LLM benchmarks.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="sample a dataset, run the model, judge and evaluate")
+    p.add_argument("--dataset", required=True, help="CSV / Parquet / JSON / JSONL dataset")
+    p.add_argument("--task-type", choices=TASK_TYPES, required=True)
+    p.add_argument("--sample-size", type=int, default=100)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--prompt-template", default=None, help="instruction appended to each question")
+    p.add_argument("--stratify-by", default=None, help="category column for stratified sampling")
+    p.add_argument("--allocation", choices=("proportional", "neyman"), default="proportional")
+    p.add_argument("--stratum-sd", action="append", metavar="STRATUM=SD", help="metric std per stratum (neyman)")
+    p.add_argument("--stratum-sd-from", default=None, help="judged results of an earlier run to take stratum std from")
+    p.add_argument("--weight-column", default=None, help="numeric column for importance (PPS) sampling")
+    p.add_argument("--model", required=True, help="model under test")
+    p.add_argument("--system-prompt", default=None)
+    p.add_argument("--param", action="append", metavar="KEY=VALUE", help="generation parameter (JSON value)")
+    p.add_argument("--evaluator", choices=EVALUATORS, default="accuracy")
+    p.add_argument("--slice", action="append", metavar="COLUMN[:BINS]", help="break the metric down by a column (repeatable)")
+    p.add_argument("--measure-k", type=int, default=25)
+    p.add_argument("--concurrency", type=int, default=1)
+    p.add_argument("--batch-size", type=int, default=None)
+    p.add_argument("--n-samples", type=int, default=None, help="answers per question in one request (pass@k / majority vote)")
+    p.add_argument("--no-dedupe", action="store_true")
+    p.add_argument("--prefix-cache-layout", action="store_true")
+    p.add_argument("--mcq-scoring", choices=("generate", "logprobs"), default="generate")
+    p.add_argument("--base-run", default=None, help="earlier run to update incrementally (new/changed rows only)")
+    p.add_argument("--trace", action="store_true")
+    g = p.add_argument_group("pre-flight")
+    g.add_argument("--context-limit", type=int, default=None, help="context window; longer prompts are handled per --on-overflow")
+    g.add_argument("--on-overflow", choices=("flag", "truncate", "error"), default="flag")
+    g.add_argument("--pilot-size", type=int, default=0, help="requests to run first for the token/cost/time estimate")
+    g.add_argument("--price-per-mtok", type=float, nargs=2, metavar=("INPUT", "OUTPUT"), default=None, help="USD per million tokens")
+    g.add_argument("--max-total-tokens", type=int, default=None, help="stop if the estimated total tokens exceed this")
+    g.add_argument("--max-cost", type=float, default=None, help="stop if the estimated cost (USD) exceeds this")
+    _add_judge_args(p, default="contains")
+    _add_model_args(p)
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("judge", help="judge an existing results file (no inference)")
+    p.add_argument("input", help="results CSV / Parquet / JSONL with model_answer and true_answer")
+    p.add_argument("-o", "--output", default=None, help="judged CSV (default: <input>_judged.csv)")
+    _add_judge_args(p)
+    _add_model_args(p)
+    p.set_defaults(func=cmd_judge)
+
+    p = sub.add_parser("evaluate", help="summarize a judged results file")
+    p.add_argument("input", help="judged CSV / Parquet / JSONL")
+    p.add_argument("--evaluator", choices=EVALUATORS, default="accuracy")
+    p.add_argument("--slice", action="append", metavar="COLUMN[:BINS]", help="break the metric down by a column (repeatable)")
+    p.add_argument("--dataset", default=None, help="dataset to look up slice columns missing from the input (by question_id)")
+    p.add_argument("-o", "--output", default=None, help="evaluation JSON (default: <input>_eval.json)")
+    p.set_defaults(func=cmd_evaluate)
+
+    p = sub.add_parser("rejudge", help="re-judge and re-evaluate saved runs as a new version")
+    p.add_argument("runs", nargs="+", help="run directories or run ids")
+    p.add_argument("--evaluator", choices=EVALUATORS, default="accuracy")
+    p.add_argument("--slice", action="append", metavar="COLUMN[:BINS]", help="break the metric down by a column (repeatable)")
+    p.add_argument("--version", default=None, help="artifact version tag (default: next vN)")
+    p.add_argument("--max-workers", type=int, default=4)
+    _add_judge_args(p)
+    _add_model_args(p)
+    p.set_defaults(func=cmd_rejudge)
+
+    p = sub.add_parser("suite", help="run a declarative TOML/YAML benchmark suite")
+    p.add_argument("spec", help="suite spec (.toml, or .yaml with pyyaml installed)")
+    p.add_argument("--max-workers", type=int, default=None, help="nodes run at once (default: spec or 4)")
+    p.add_argument("--force", action="store_true", help="ignore cached node outputs")
+    p.set_defaults(func=cmd_suite)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    # results are printed as JSON on stdout, so logs go to stderr
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="[%(levelname)s] %(asctime)s %(name)s:%(lineno)d — %(message)s",
+        stream=sys.stderr,
+    )
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("openai").setLevel(logging.WARNING)
+    _load_env()
+    try:
+        return args.func(args)
+    except (BenchmarkError, FileNotFoundError, FileExistsError, ValueError) as exc:
+        logger.error("%s: %s", type(exc).__name__, exc)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,8 @@ Each module (runner, model, judge, evaluator, etc.) should raise
 these errors instead of generic Python exceptions. This helps
 keep all error handling consistent and easy to catch.
 """
+from __future__ import annotations
+
 
 class BenchmarkError(Exception):
     """Base exception for all benchmark-related errors."""
@@ -30,3 +32,23 @@ class EvaluationError(BenchmarkError):
 class ConfigurationError(BenchmarkError):
     """Raised for missing or invalid configuration values."""
     pass
+
+
+class JobCancelledError(BenchmarkError):
+    """Raised inside a scheduled job when it has been cancelled."""
+    pass
+
+
+class BudgetExceededError(BenchmarkError):
+    """
+    Raised when a run's pre-flight estimate exceeds its token or cost budget.
+
+    Attributes:
+        report: The pre-flight report (pilot usage, estimate) at the stop.
+        pilot_answers: The paid-for pilot answers by dataset row position.
+    """
+
+    def __init__(self, message: str, report: dict | None = None, pilot_answers: dict | None = None) -> None:
+        super().__init__(message)
+        self.report = report or {}
+        self.pilot_answers = pilot_answers or {}
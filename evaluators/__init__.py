@@ -1,9 +1,36 @@
-from .accuracy import AccuracyEvaluator
-from .average_score import ScoreEvaluator
-from .base import BaseEvaluator
+"""Evaluators, imported on first use."""
+from importlib import import_module
 
-__all__=[
-    "BaseEvaluator",
+_EXPORTS = {
+    "AccuracyEvaluator": ".accuracy",
+    "AgreementEvaluator": ".agreement",
+    "BaseEvaluator": ".base",
+    "CalibrationEvaluator": ".calibration",
+    "PassAtKEvaluator": ".pass_at_k",
+    "ScoreEvaluator": ".average_score",
+    "cohen_kappa": ".agreement",
+}
+
+__all__ = [
     "AccuracyEvaluator",
-    "ScoreEvaluator"
-]
\ No newline at end of file
+    "AgreementEvaluator",
+    "BaseEvaluator",
+    "CalibrationEvaluator",
+    "PassAtKEvaluator",
+    "ScoreEvaluator",
+    "cohen_kappa",
+]
+
+
+def __getattr__(name: str):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
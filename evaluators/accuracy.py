@@ -3,14 +3,35 @@ from __future__ import annotations
 import json
 import pandas as pd
 import logging
-from typing import Any
+from typing import Any, Optional, Sequence
 from errors import EvaluationError
+from tracing import span
 from .base import BaseEvaluator
+from .slicing import parse_slices, slice_metrics
+from .weighting import stratum_breakdown, weighted_estimate
 
 logger = logging.getLogger(__name__)
 
 class AccuracyEvaluator(BaseEvaluator):
-    """Evaluator for boolean tasks (computes accuracy)."""
+    """
+    Evaluator for boolean tasks (computes accuracy).
+
+    For stratified / importance samples (`sample_weight` column) accuracy is
+    the design-weighted population estimate, with its standard error and CI
+    under out["weighted"] and per-stratum accuracy under out["strata"].
+
+    With `slices` the metric is also broken down per slice (category,
+    length or latency buckets, ...) with counts and 95% CIs under
+    out["slices"]; see evaluators.slicing.
+    """
+
+    def __init__(self, slices: Optional[Sequence[Any]] = None) -> None:
+        """
+        Args:
+            slices: Column names, "column:bins" strings or {"column", "bins",
+                "name"} dicts to break the metric down by.
+        """
+        self.slices = parse_slices(slices)
 
     def compute(
         self,
@@ -42,10 +63,22 @@ class AccuracyEvaluator(BaseEvaluator):
             },
         }
 
+        # stratified / importance samples: report the population estimate
+        weighted = weighted_estimate(s, df, meta)
+        if weighted is not None:
+            out["metrics"]["accuracy"] = weighted["estimate"]
+            out["weighted"] = weighted
+        strata = stratum_breakdown(s, df)
+        if strata is not None:
+            out["strata"] = strata
+        if self.slices:
+            with span("evaluator.slices", slices=len(self.slices)):
+                out["slices"] = slice_metrics(s, df, meta, self.slices, metric="accuracy", interval="wilson")
+
         result = {"metadata": meta, "out": out}
 
         try:
-            with open(output_json_path, "w", encoding="utf-8") as f:
+            with span("evaluator.write_json"), open(output_json_path, "w", encoding="utf-8") as f:
                 json.dump(result, f, ensure_ascii=False, indent=4)
             logger.info("✅ Accuracy evaluation saved to %s", output_json_path)
         except OSError as e:
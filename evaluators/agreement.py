@@ -0,0 +1,125 @@
+# agreement_eval.py
+from __future__ import annotations
+import json
+import pandas as pd
+import logging
+from itertools import combinations
+from typing import Any, Optional, Sequence
+from errors import EvaluationError
+from tracing import span
+from .base import BaseEvaluator
+
+logger = logging.getLogger(__name__)
+
+
+def cohen_kappa(a: pd.Series, b: pd.Series) -> Optional[float]:
+    """
+    Cohen's kappa between two label series (rows where either is NaN are dropped).
+
+    Labels are compared as categories, so score columns are treated as
+    nominal ratings. Returns None when there are no jointly valid rows.
+    """
+    mask = a.notna() & b.notna()
+    a, b = a[mask], b[mask]
+    if a.empty:
+        return None
+    observed = float((a.to_numpy() == b.to_numpy()).mean())
+    pa = a.value_counts(normalize=True)
+    pb = b.value_counts(normalize=True)
+    expected = float((pa * pb.reindex(pa.index, fill_value=0.0)).sum())
+    if expected >= 1.0:
+        # both raters used one identical label throughout: agreement is perfect
+        return 1.0 if observed == 1.0 else 0.0
+    return (observed - expected) / (1.0 - expected)
+
+
+class AgreementEvaluator(BaseEvaluator):
+    """
+    Evaluator for EnsembleJudge output: per-judge mean verdict plus pairwise
+    percent agreement and Cohen's kappa between judges.
+    """
+
+    def __init__(self, columns: Optional[Sequence[str]] = None) -> None:
+        """
+        Args:
+            columns: Verdict columns to compare. Defaults to
+                meta["judge"]["columns"] as written by EnsembleJudge.
+        """
+        self.columns = list(columns) if columns is not None else None
+
+    def _verdict_columns(self, meta: dict[str, Any]) -> dict[str, str]:
+        if self.columns is not None:
+            return {c: c for c in self.columns}
+        cols = (meta.get("judge") or {}).get("columns")
+        if not cols:
+            raise EvaluationError("No verdict columns given and meta['judge'] has no 'columns' (use EnsembleJudge).")
+        return dict(cols)
+
+    def compute(
+        self,
+        meta: dict[str, Any],
+        df: pd.DataFrame,
+        output_json_path: str,
+    ) -> dict[str, Any]:
+        """Compute per-judge means and pairwise agreement."""
+        if df.empty:
+            raise EvaluationError("Empty dataframe passed to AgreementEvaluator.")
+
+        columns = self._verdict_columns(meta)
+        missing = [c for c in columns.values() if c not in df.columns]
+        if missing:
+            raise EvaluationError(f"Missing verdict column(s): {missing}")
+        if len(columns) < 2:
+            raise EvaluationError("AgreementEvaluator needs at least two verdict columns.")
+
+        # bool/int/float verdicts all become floats so True == 1 == 1.0
+        series = {name: pd.to_numeric(df[col].astype("object"), errors="coerce") for name, col in columns.items()}
+
+        per_judge = {}
+        for name, s in series.items():
+            valid = int(s.notna().sum())
+            per_judge[name] = {
+                "column": columns[name],
+                "valid_count": valid,
+                "invalid_count": int(s.size - valid),
+                "mean": round(float(s.mean(skipna=True)), 4) if valid > 0 else None,
+            }
+
+        pairwise = []
+        for a, b in combinations(series, 2):
+            sa, sb = series[a], series[b]
+            both = sa.notna() & sb.notna()
+            n = int(both.sum())
+            kappa = cohen_kappa(sa, sb)
+            pairwise.append({
+                "judges": [a, b],
+                "n": n,
+                "percent_agreement": round(float((sa[both] == sb[both]).mean()), 4) if n else None,
+                "cohen_kappa": round(kappa, 4) if kappa is not None else None,
+            })
+
+        kappas = [p["cohen_kappa"] for p in pairwise if p["cohen_kappa"] is not None]
+        # a row is valid when every judge produced a verdict for it
+        valid = int(pd.concat(series.values(), axis=1).notna().all(axis=1).sum())
+        out = {
+            "type": "agreement",
+            "valid_count": valid,
+            "invalid_count": int(len(df) - valid),
+            "metrics": {
+                "per_judge": per_judge,
+                "pairwise": pairwise,
+                "mean_cohen_kappa": round(sum(kappas) / len(kappas), 4) if kappas else None,
+            },
+        }
+
+        result = {"metadata": meta, "out": out}
+
+        try:
+            with span("evaluator.write_json"), open(output_json_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=4)
+            logger.info("✅ Agreement evaluation saved to %s", output_json_path)
+        except OSError as e:
+            logger.error("Failed to save agreement evaluation: %s", e)
+            raise EvaluationError(f"Could not save output file: {e}") from e
+
+        return result
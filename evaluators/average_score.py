@@ -3,14 +3,34 @@ from __future__ import annotations
 import json
 import pandas as pd
 import logging
-from typing import Any
+from typing import Any, Optional, Sequence
 from errors import EvaluationError
+from tracing import span
 from .base import BaseEvaluator
+from .slicing import parse_slices, slice_metrics
+from .weighting import stratum_breakdown, weighted_estimate
 
 logger = logging.getLogger(__name__)
 
 class ScoreEvaluator(BaseEvaluator):
-    """Evaluator for numeric scores (e.g., 0–10). Computes average and std."""
+    """
+    Evaluator for numeric scores (e.g., 0–10). Computes average and std.
+
+    For stratified / importance samples the average is the design-weighted
+    population estimate (details in out["weighted"], per stratum in out["strata"]).
+
+    With `slices` the metric is also broken down per slice (category,
+    length or latency buckets, ...) with counts and 95% CIs under
+    out["slices"]; see evaluators.slicing.
+    """
+
+    def __init__(self, slices: Optional[Sequence[Any]] = None) -> None:
+        """
+        Args:
+            slices: Column names, "column:bins" strings or {"column", "bins",
+                "name"} dicts to break the metric down by.
+        """
+        self.slices = parse_slices(slices)
 
     def compute(
         self,
@@ -43,10 +63,22 @@ class ScoreEvaluator(BaseEvaluator):
             },
         }
 
+        # stratified / importance samples: report the population estimate
+        weighted = weighted_estimate(s, df, meta)
+        if weighted is not None:
+            out["metrics"]["avg"] = weighted["estimate"]
+            out["weighted"] = weighted
+        strata = stratum_breakdown(s, df)
+        if strata is not None:
+            out["strata"] = strata
+        if self.slices:
+            with span("evaluator.slices", slices=len(self.slices)):
+                out["slices"] = slice_metrics(s, df, meta, self.slices, metric="avg", interval="normal")
+
         result = {"metadata": meta, "out": out}
 
         try:
-            with open(output_json_path, "w", encoding="utf-8") as f:
+            with span("evaluator.write_json"), open(output_json_path, "w", encoding="utf-8") as f:
                 json.dump(result, f, ensure_ascii=False, indent=4)
             logger.info("✅ Score-based evaluation saved to %s", output_json_path)
         except OSError as e:
@@ -0,0 +1,132 @@
+# calibration_eval.py
+from __future__ import annotations
+import json
+import numpy as np
+import pandas as pd
+import logging
+from typing import Any
+from errors import EvaluationError
+from tracing import span
+from .base import BaseEvaluator
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_probs(value: Any) -> dict[str, float] | None:
+    """choice_probs cells are JSON strings (also after a CSV round trip) or dicts."""
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return None
+    return None
+
+
+class CalibrationEvaluator(BaseEvaluator):
+    """
+    Evaluator for logprob-scored multiple-choice runs (Runner mcq_scoring="logprobs").
+
+    Uses answer_prob (confidence of the chosen letter) and is_correct:
+    accuracy, mean confidence, expected / maximum calibration error over
+    equal-width confidence bins, and the Brier score. With choice_probs and
+    a letter true_answer the multi-class Brier score is reported; otherwise
+    the binary one on the chosen answer.
+    """
+
+    def __init__(self, n_bins: int = 10) -> None:
+        if n_bins < 1:
+            raise ValueError("n_bins must be >= 1")
+        self.n_bins = n_bins
+
+    def _multiclass_brier(self, df: pd.DataFrame, mask: np.ndarray) -> float | None:
+        if "choice_probs" not in df.columns or "true_answer" not in df.columns:
+            return None
+        total, count = 0.0, 0
+        for probs, truth in zip(df["choice_probs"].to_numpy()[mask], df["true_answer"].to_numpy()[mask]):
+            probs = _parse_probs(probs)
+            truth = str(truth).strip().upper() if truth is not None else None
+            if not probs or truth not in probs:
+                return None  # true answers are not option letters: fall back to binary
+            total += sum((p - (1.0 if k == truth else 0.0)) ** 2 for k, p in probs.items())
+            count += 1
+        return total / count if count else None
+
+    def compute(
+        self,
+        meta: dict[str, Any],
+        df: pd.DataFrame,
+        output_json_path: str,
+    ) -> dict[str, Any]:
+        """Compute accuracy, confidence, ECE/MCE, Brier and reliability bins."""
+        if df.empty:
+            raise EvaluationError("Empty dataframe passed to CalibrationEvaluator.")
+        for col in ("answer_prob", "is_correct"):
+            if col not in df.columns:
+                raise EvaluationError(f"Missing required column: '{col}' (run with mcq_scoring='logprobs').")
+
+        conf = pd.to_numeric(df["answer_prob"], errors="coerce").to_numpy(dtype=float)
+        correct = pd.to_numeric(df["is_correct"].astype("object"), errors="coerce").to_numpy(dtype=float)
+        mask = ~(np.isnan(conf) | np.isnan(correct))
+        valid = int(mask.sum())
+        invalid = int(len(df) - valid)
+
+        bins = []
+        ece = mce = brier = accuracy = mean_conf = None
+        if valid > 0:
+            c, y = conf[mask], correct[mask]
+            accuracy = float(y.mean())
+            mean_conf = float(c.mean())
+            # bin i covers (i/n, (i+1)/n]; confidence 0 falls into the first bin
+            idx = np.clip(np.ceil(c * self.n_bins).astype(int) - 1, 0, self.n_bins - 1)
+            ece, mce = 0.0, 0.0
+            for b in range(self.n_bins):
+                in_bin = idx == b
+                n_b = int(in_bin.sum())
+                if not n_b:
+                    continue
+                acc_b, conf_b = float(y[in_bin].mean()), float(c[in_bin].mean())
+                gap = abs(acc_b - conf_b)
+                ece += gap * n_b / valid
+                mce = max(mce, gap)
+                bins.append({
+                    "lower": round(b / self.n_bins, 4),
+                    "upper": round((b + 1) / self.n_bins, 4),
+                    "count": n_b,
+                    "accuracy": round(acc_b, 4),
+                    "confidence": round(conf_b, 4),
+                })
+            brier = self._multiclass_brier(df, mask)
+            brier_type = "multiclass"
+            if brier is None:
+                brier = float(((c - y) ** 2).mean())
+                brier_type = "binary"
+
+        out = {
+            "type": "calibration",
+            "valid_count": valid,
+            "invalid_count": invalid,
+            "metrics": {
+                "accuracy": round(accuracy, 4) if accuracy is not None else None,
+                "mean_confidence": round(mean_conf, 4) if mean_conf is not None else None,
+                "ece": round(ece, 4) if ece is not None else None,
+                "mce": round(mce, 4) if mce is not None else None,
+                "brier": round(brier, 4) if brier is not None else None,
+                "brier_type": brier_type if brier is not None else None,
+                "n_bins": self.n_bins,
+                "reliability": bins,
+            },
+        }
+
+        result = {"metadata": meta, "out": out}
+
+        try:
+            with span("evaluator.write_json"), open(output_json_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=4)
+            logger.info("✅ Calibration evaluation saved to %s", output_json_path)
+        except OSError as e:
+            logger.error("Failed to save calibration evaluation: %s", e)
+            raise EvaluationError(f"Could not save output file: {e}") from e
+
+        return result
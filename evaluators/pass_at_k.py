@@ -0,0 +1,121 @@
+# pass_at_k_eval.py
+from __future__ import annotations
+import json
+import numpy as np
+import pandas as pd
+import logging
+from typing import Any, Sequence
+from errors import EvaluationError
+from tracing import span
+from .base import BaseEvaluator
+from .weighting import stratum_breakdown, weighted_estimate
+
+logger = logging.getLogger(__name__)
+
+
+def pass_at_k(n: np.ndarray, c: np.ndarray, k: int) -> np.ndarray:
+    """
+    Unbiased per-row pass@k = 1 - C(n-c, k) / C(n, k) for n samples with c correct.
+
+    Computed as 1 - prod_{i=n-c+1}^{n} (1 - k/i) to avoid huge binomials;
+    NaN where n < k.
+    """
+    out = np.full(len(n), np.nan)
+    for row, (ni, ci) in enumerate(zip(n, c)):
+        if ni < k:
+            continue
+        if ni - ci < k:
+            out[row] = 1.0
+        else:
+            out[row] = 1.0 - float(np.prod(1.0 - k / np.arange(ni - ci + 1, ni + 1)))
+    return out
+
+
+class PassAtKEvaluator(BaseEvaluator):
+    """
+    Evaluator for multi-sample runs (Runner n_samples) judged by a 0/1 judge.
+
+    Reports the unbiased pass@k estimator (Chen et al., 2021) for each k up
+    to the samples per row, majority-vote (self-consistency) accuracy and
+    the mean per-sample accuracy. Stratified / weighted samples get
+    design-weighted metrics as in AccuracyEvaluator.
+    """
+
+    def __init__(self, ks: Sequence[int] = (1, 5, 10)) -> None:
+        if not ks or any(not isinstance(k, int) or k < 1 for k in ks):
+            raise ValueError("ks must be positive integers")
+        self.ks = tuple(sorted(set(ks)))
+
+    def compute(
+        self,
+        meta: dict[str, Any],
+        df: pd.DataFrame,
+        output_json_path: str,
+    ) -> dict[str, Any]:
+        """Compute pass@k, majority-vote accuracy and per-sample accuracy."""
+        if df.empty:
+            raise EvaluationError("Empty dataframe passed to PassAtKEvaluator.")
+
+        missing = [c for c in ("samples_total", "samples_correct", "majority_correct") if c not in df.columns]
+        if missing:
+            raise EvaluationError(
+                f"Missing required columns: {missing} (run with n_samples and a 0/1 judge)."
+            )
+
+        n = pd.to_numeric(df["samples_total"], errors="coerce")
+        c = pd.to_numeric(df["samples_correct"], errors="coerce")
+        ok = n.notna() & c.notna() & (n > 0)
+        valid = int(ok.sum())
+        n_arr = n.where(ok, 0).to_numpy(dtype=int)
+        c_arr = c.where(ok, 0).to_numpy(dtype=int)
+        max_k = int(n_arr.max()) if valid else 0
+
+        columns: dict[str, pd.Series] = {
+            "sample_accuracy": (c / n).where(ok),
+            "majority_vote_accuracy": pd.to_numeric(df["majority_correct"], errors="coerce").where(ok),
+        }
+        for k in self.ks:
+            if k <= max_k:
+                columns[f"pass@{k}"] = pd.Series(pass_at_k(n_arr, c_arr, k), index=df.index).where(ok)
+
+        metrics: dict[str, Any] = {}
+        weighted: dict[str, Any] = {}
+        strata: dict[str, Any] = {}
+        for name, values in columns.items():
+            est = weighted_estimate(values, df, meta)
+            if est is not None:
+                weighted[name] = est
+                metrics[name] = est["estimate"]
+            else:
+                mean = values.mean(skipna=True)
+                metrics[name] = round(float(mean), 4) if pd.notna(mean) else None
+            breakdown = stratum_breakdown(values, df)
+            if breakdown is not None:
+                strata[name] = {h: s["mean"] for h, s in breakdown.items()}
+
+        out: dict[str, Any] = {
+            "type": "pass_at_k",
+            "valid_count": valid,
+            "invalid_count": int(len(df) - valid),
+            "samples_per_row": max_k,
+            "metrics": metrics,
+        }
+        skipped = [k for k in self.ks if k > max_k]
+        if skipped:
+            out["skipped_k"] = skipped
+        if weighted:
+            out["weighted"] = weighted
+        if strata:
+            out["strata"] = strata
+
+        result = {"metadata": meta, "out": out}
+
+        try:
+            with span("evaluator.write_json"), open(output_json_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=4)
+            logger.info("✅ pass@k evaluation saved to %s", output_json_path)
+        except OSError as e:
+            logger.error("Failed to save pass@k evaluation: %s", e)
+            raise EvaluationError(f"Could not save output file: {e}") from e
+
+        return result
@@ -0,0 +1,265 @@
+# slicing.py
+"""
+Sliced metrics: an evaluator's per-row metric broken down by groups of rows.
+
+A slice groups rows by one column:
+
+- a results column (e.g. stratum, or latency_ms recorded by the Runner),
+- a derived length, question_length / answer_length (characters),
+- a dataset column (e.g. category, difficulty) that is not in the results,
+  looked up in meta["dataset_path"] by question_id.
+
+Numeric slices are bucketed: `bins` as a count gives quantile buckets, as
+a list the bucket edges. Lengths and latency default to quartiles, other
+columns are grouped by value. All slices are computed together in one
+grouped pass (bincounts over stacked group ids). Each group reports its
+row and valid counts, the mean and a 95% CI (Wilson for 0/1 metrics,
+normal otherwise); with a sample_weight column the mean is design-weighted
+and the CI uses Kish's effective sample size.
+
+    AccuracyEvaluator(slices=["category", "latency_ms", {"column": "question_length", "bins": [200, 1000]}])
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from errors import EvaluationError
+from sampling import WEIGHT_COLUMN
+from utils import load_dataset
+
+DERIVED_SLICES = {"question_length": "question", "answer_length": "model_answer"}
+# bucketed by default: a group per distinct value would be meaningless
+CONTINUOUS_SLICES = ("question_length", "answer_length", "latency_ms")
+DEFAULT_BINS = 4
+INTERVALS = ("wilson", "normal")
+MISSING_LABEL = "<missing>"
+_Z95 = 1.96
+
+
+class Slice:
+    """
+    One slice definition.
+
+    Args:
+        column: Results, derived (question_length / answer_length) or dataset column.
+        bins: Quantile bucket count, or increasing bucket edges. Default:
+            quartiles for lengths and latency, else one group per value.
+        name: Key in the output (default: the column).
+    """
+
+    def __init__(
+        self,
+        column: str,
+        bins: Optional[Union[int, Sequence[float]]] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        if not column or not isinstance(column, str):
+            raise ValueError("slice column must be a non-empty string")
+        if bins is None and column in CONTINUOUS_SLICES:
+            bins = DEFAULT_BINS
+        if isinstance(bins, bool) or (isinstance(bins, int) and bins < 2):
+            raise ValueError(f"slice {column!r}: bins must be >= 2 or a list of edges")
+        if bins is not None and not isinstance(bins, int):
+            bins = [float(e) for e in bins]
+            if not bins or any(hi <= lo for lo, hi in zip(bins, bins[1:])):
+                raise ValueError(f"slice {column!r}: bin edges must be increasing")
+        self.column = column
+        self.bins = bins
+        self.name = name or column
+
+    @classmethod
+    def parse(cls, spec: Union[str, Mapping[str, Any], "Slice"]) -> "Slice":
+        """From a Slice, a {"column", "bins", "name"} mapping or "column[:bins]"
+        ("latency_ms:10" for deciles, "question_length:200,1000" for edges)."""
+        if isinstance(spec, Slice):
+            return spec
+        if isinstance(spec, Mapping):
+            unknown = set(spec) - {"column", "bins", "name"}
+            if unknown:
+                raise ValueError(f"Unknown slice keys: {sorted(unknown)}")
+            return cls(**spec)
+        if not isinstance(spec, str):
+            raise ValueError(f"Invalid slice spec: {spec!r}")
+        column, _, bins = spec.partition(":")
+        if not bins:
+            return cls(column)
+        if "," in bins:
+            return cls(column, [float(e) for e in bins.split(",")])
+        return cls(column, int(bins))
+
+    def describe(self) -> dict[str, Any]:
+        return {"column": self.column, "bins": self.bins}
+
+
+def parse_slices(specs: Optional[Sequence[Any]]) -> list[Slice]:
+    """Slice objects for an evaluator's `slices` option (None = no slices)."""
+    if specs is None:
+        return []
+    if isinstance(specs, (str, Mapping)):
+        specs = [specs]
+    slices = [Slice.parse(s) for s in specs]
+    names = [s.name for s in slices]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate slice names: {names}")
+    return slices
+
+
+def _fmt(x: float) -> str:
+    return f"{x:g}"
+
+
+def _slice_values(df: pd.DataFrame, meta: Mapping[str, Any], sl: Slice, datasets: dict[str, pd.DataFrame]) -> pd.Series:
+    """The slice's column for every results row."""
+    if sl.column in DERIVED_SLICES:
+        source = DERIVED_SLICES[sl.column]
+        if source not in df.columns:
+            raise EvaluationError(f"Slice {sl.name!r} needs column {source!r}")
+        return df[source].astype("string").str.len().astype("Float64")
+    if sl.column in df.columns:
+        return df[sl.column]
+
+    path = meta.get("dataset_path")
+    if not path or "question_id" not in df.columns:
+        raise EvaluationError(
+            f"Slice column {sl.column!r} is not in the results and there is no dataset to look it up in"
+        )
+    if path not in datasets:
+        datasets[path] = load_dataset(path)
+    dataset = datasets[path]
+    if sl.column not in dataset.columns or "question_id" not in dataset.columns:
+        raise EvaluationError(f"Slice column {sl.column!r} not found in the results or in {path}")
+    # ids compared as strings: CSV round trips turn "7" into 7
+    dedup = dataset.drop_duplicates("question_id")
+    lookup = dedup.set_index(dedup["question_id"].astype(str))
+    return df["question_id"].astype(str).map(lookup[sl.column])
+
+
+def _group_codes(values: pd.Series, sl: Slice) -> tuple[np.ndarray, list[str], Optional[list[float]]]:
+    """(group code per row, -1 = missing; group labels; bucket edges used)."""
+    if sl.bins is None:
+        codes, uniques = pd.factorize(values, sort=True)
+        return codes, [str(u) for u in uniques], None
+
+    x = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    finite = np.isfinite(x)
+    if isinstance(sl.bins, int):
+        if not finite.any():
+            return np.full(len(x), -1), [], []
+        qs = np.quantile(x[finite], np.linspace(0, 1, sl.bins + 1)[1:-1])
+        edges = [float(e) for e in np.unique(qs)]
+    else:
+        edges = list(sl.bins)
+    codes = np.where(finite, np.searchsorted(edges, np.where(finite, x, 0.0), side="right"), -1)
+    labels = [f"< {_fmt(edges[0])}"] if edges else ["all"]
+    labels += [f"[{_fmt(lo)}, {_fmt(hi)})" for lo, hi in zip(edges, edges[1:])]
+    if edges:
+        labels.append(f">= {_fmt(edges[-1])}")
+    return codes, labels, edges
+
+
+def _wilson(p: np.ndarray, n: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    z2 = _Z95 ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = 1.0 + z2 / n
+        center = (p + z2 / (2 * n)) / denom
+        half = _Z95 * np.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / denom
+    return center - half, center + half
+
+
+def slice_metrics(
+    values: pd.Series,
+    df: pd.DataFrame,
+    meta: Mapping[str, Any],
+    slices: Sequence[Slice],
+    *,
+    metric: str,
+    interval: str = "normal",
+) -> dict[str, dict[str, Any]]:
+    """
+    Per-group metric for every slice, in one grouped pass.
+
+    Args:
+        values: Numeric per-row metric (NaN = invalid, excluded).
+        df: Judged results.
+        meta: Run metadata (dataset_path for dataset columns).
+        slices: Parsed slices.
+        metric: Key for the group mean in the output (e.g. "accuracy").
+        interval: "wilson" (0/1 metrics) or "normal".
+
+    Returns:
+        {slice name: {"column", "bins", "edges", "groups": {label: {"count",
+        "valid_count", metric, "ci95"[, "std"]}}}}; rows whose slice value
+        is missing form the "<missing>" group.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {INTERVALS}")
+    n = len(df)
+    datasets: dict[str, pd.DataFrame] = {}
+    group_ids, group_labels, edges_used = [], [], []
+    offset = 0
+    for sl in slices:
+        codes, labels, edges = _group_codes(_slice_values(df, meta, sl, datasets), sl)
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(labels), codes)
+            labels = labels + [MISSING_LABEL]
+        group_ids.append(codes + offset)
+        group_labels.append(labels)
+        edges_used.append(edges)
+        offset += len(labels)
+
+    # stacked group ids: row r of slice s sits at position s * n + r
+    gid = np.concatenate(group_ids) if group_ids else np.empty(0, dtype=int)
+    y = values.to_numpy(dtype=float, na_value=np.nan)
+    w = (
+        pd.to_numeric(df[WEIGHT_COLUMN], errors="coerce").to_numpy(dtype=float)
+        if WEIGHT_COLUMN in df.columns
+        else np.ones(n)
+    )
+    ok = np.isfinite(y) & np.isfinite(w) & (w > 0)
+    ok_all = np.tile(ok, len(slices))
+    g = gid[ok_all]
+    yv, wv = np.tile(y, len(slices))[ok_all], np.tile(w, len(slices))[ok_all]
+
+    count = np.bincount(gid, minlength=offset)
+    valid = np.bincount(g, minlength=offset)
+    sw = np.bincount(g, weights=wv, minlength=offset)
+    sw2 = np.bincount(g, weights=wv * wv, minlength=offset)
+    swy = np.bincount(g, weights=wv * yv, minlength=offset)
+    swy2 = np.bincount(g, weights=wv * yv * yv, minlength=offset)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = swy / sw
+        var = np.maximum(swy2 / sw - mean * mean, 0.0)
+        n_eff = sw * sw / sw2
+        if interval == "wilson":
+            lo, hi = _wilson(mean, n_eff)
+        else:
+            se = np.sqrt(var / np.maximum(n_eff - 1, 1.0))
+            lo, hi = mean - _Z95 * se, mean + _Z95 * se
+            lo[n_eff < 2] = hi[n_eff < 2] = np.nan
+
+    def num(x: float) -> Optional[float]:
+        return round(float(x), 4) if math.isfinite(x) else None
+
+    out: dict[str, dict[str, Any]] = {}
+    start = 0
+    for sl, labels, edges in zip(slices, group_labels, edges_used):
+        groups: dict[str, Any] = {}
+        for k, label in enumerate(labels, start):
+            if not count[k]:
+                continue
+            entry: dict[str, Any] = {
+                "count": int(count[k]),
+                "valid_count": int(valid[k]),
+                metric: num(mean[k]) if valid[k] else None,
+                "ci95": [num(lo[k]), num(hi[k])] if valid[k] else None,
+            }
+            if interval == "normal":
+                entry["std"] = num(math.sqrt(var[k])) if valid[k] else None
+            groups[label] = entry
+        out[sl.name] = {**sl.describe(), "edges": edges, "groups": groups}
+        start += len(labels)
+    return out
@@ -0,0 +1,112 @@
+# weighting.py
+"""
+Design-weighted estimates for stratified / importance samples.
+
+Rows drawn by `sampling.draw_sample` carry a `sample_weight` (1 / inclusion
+probability) and, when stratified, a `stratum`. The population mean is
+estimated as Σw·y / Σw (Hájek estimator); its standard error uses the
+usual linearization with strata, with the finite-population correction
+only for uniform sampling within strata without replacement.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from sampling import STRATUM_COLUMN, WEIGHT_COLUMN
+
+
+def _strata(df: pd.DataFrame) -> np.ndarray:
+    if STRATUM_COLUMN in df.columns:
+        return df[STRATUM_COLUMN].astype("string").fillna("<missing>").to_numpy()
+    return np.zeros(len(df), dtype=int)
+
+
+def weighted_estimate(values: pd.Series, df: pd.DataFrame, meta: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """
+    Population estimate of the mean of `values` under the sampling design.
+
+    Args:
+        values: Numeric per-row metric (NaN = invalid, excluded).
+        df: Judged results with the design columns.
+        meta: Run metadata (`meta["sampling"]` describes the design).
+
+    Returns:
+        None for uniform samples (no `sample_weight` column), else the
+        estimate, standard error, 95% CI, unweighted mean, Kish effective
+        sample size and design effect (variance vs. a uniform sample of the
+        same size; < 1 means the design paid off).
+    """
+    if WEIGHT_COLUMN not in df.columns:
+        return None
+    w = pd.to_numeric(df[WEIGHT_COLUMN], errors="coerce").to_numpy(dtype=float)
+    y = values.to_numpy(dtype=float)
+    strata = _strata(df)
+    ok = np.isfinite(y) & np.isfinite(w) & (w > 0)
+    w, y, strata = w[ok], y[ok], strata[ok]
+    n = len(y)
+    if n == 0:
+        return None
+
+    total_w = w.sum()
+    mean = float((w * y).sum() / total_w)
+    pop_var = float((w * (y - mean) ** 2).sum() / total_w)
+
+    sampling = meta.get("sampling") or {}
+    use_fpc = not sampling.get("replace", False) and sampling.get("weight_column") is None
+    populations = {h: s["population"] for h, s in (sampling.get("strata") or {}).items()}
+
+    # linearized residuals of the ratio estimator, variance summed over strata
+    z = w * (y - mean) / total_w
+    var = 0.0
+    for h in np.unique(strata):
+        zh = z[strata == h]
+        nh = len(zh)
+        if nh < 2:
+            continue
+        vh = nh / (nh - 1) * float(((zh - zh.mean()) ** 2).sum())
+        if use_fpc:
+            big_n = populations.get(str(h), float(w[strata == h].sum()))
+            vh *= max(0.0, 1.0 - nh / big_n)
+        var += vh
+    se = math.sqrt(var)
+
+    srs_var = pop_var / n if n > 1 else None
+    return {
+        "estimate": round(mean, 4),
+        "std_error": round(se, 4),
+        "ci95": [round(mean - 1.96 * se, 4), round(mean + 1.96 * se, 4)],
+        "unweighted": round(float(y.mean()), 4),
+        "effective_sample_size": round(float(total_w ** 2 / (w ** 2).sum()), 2),
+        "design_effect": round(var / srs_var, 4) if srs_var else None,
+    }
+
+
+def stratum_breakdown(values: pd.Series, df: pd.DataFrame) -> Optional[dict[str, dict[str, Any]]]:
+    """Per-stratum row counts, estimated population and (weighted) mean and std of `values`."""
+    if STRATUM_COLUMN not in df.columns:
+        return None
+    w = (
+        pd.to_numeric(df[WEIGHT_COLUMN], errors="coerce")
+        if WEIGHT_COLUMN in df.columns
+        else pd.Series(1.0, index=df.index)
+    )
+    frame = pd.DataFrame({"y": values.to_numpy(dtype=float), "w": w.to_numpy(dtype=float), "h": _strata(df)})
+    out: dict[str, dict[str, Any]] = {}
+    for h, g in frame.groupby("h", sort=True):
+        valid = g[g["y"].notna() & (g["w"] > 0)]
+        mean = std = None
+        if len(valid):
+            mean = float((valid["w"] * valid["y"]).sum() / valid["w"].sum())
+            std = math.sqrt(float((valid["w"] * (valid["y"] - mean) ** 2).sum() / valid["w"].sum()))
+        out[str(h)] = {
+            "sampled": int(len(g)),
+            "valid_count": int(len(valid)),
+            "population": round(float(g["w"].sum()), 2),
+            "mean": round(mean, 4) if mean is not None else None,
+            "std": round(std, 4) if std is not None else None,
+        }
+    return out
@@ -0,0 +1,267 @@
+# hedging.py
+"""
+Per-call deadlines and hedged requests for model calls.
+
+A hedged call sends the request, and if it has not answered after a
+latency threshold sends one duplicate and returns whichever finishes
+first. The threshold is fixed (`after_ms`) or the live `quantile` of
+recent call latencies, and the number of duplicates is capped at
+`max_extra` x calls so a slow backend is not flooded.
+
+    hedger = HedgePolicy(quantile=0.95, max_extra=0.05).new_hedger(timeout_s=30)
+    text = hedger.call(lambda timeout: model.generate(prompt, timeout=timeout))
+    hedger.stats()   # hedge rate, wins, p95/p99 with and without hedging
+    hedger.close()
+
+The losing request is not cancelled (HTTP clients cannot abort it); it
+finishes or times out in the background and only its latency is kept
+for the "without hedging" estimate.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Optional, TypeVar
+
+from errors import ModelError
+from telemetry import _percentile
+from tracing import bind
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HedgePolicy:
+    """
+    When to send a duplicate request.
+
+    Args:
+        after_ms: Fixed hedge threshold in ms. If None, the `quantile` of
+            the last `window` call latencies is used once `min_samples`
+            calls have finished (no hedging before that).
+        quantile: Live latency quantile used as threshold (e.g. 0.95).
+        max_extra: Duplicates allowed per call started (0.05 = at most 5% extra requests).
+        min_samples: Finished calls needed before the live threshold is trusted.
+        window: Recent latencies kept for the live threshold.
+    """
+
+    def __init__(
+        self,
+        *,
+        after_ms: Optional[float] = None,
+        quantile: float = 0.95,
+        max_extra: float = 0.05,
+        min_samples: int = 20,
+        window: int = 512,
+    ) -> None:
+        if after_ms is not None and after_ms <= 0:
+            raise ValueError("after_ms must be > 0")
+        if not 0.0 < quantile < 1.0:
+            raise ValueError("quantile must be in (0, 1)")
+        if max_extra < 0:
+            raise ValueError("max_extra must be >= 0")
+        if min_samples < 1 or window < min_samples:
+            raise ValueError("need 1 <= min_samples <= window")
+        self.after_ms = after_ms
+        self.quantile = quantile
+        self.max_extra = max_extra
+        self.min_samples = min_samples
+        self.window = window
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "after_ms": self.after_ms,
+            "quantile": None if self.after_ms is not None else self.quantile,
+            "max_extra": self.max_extra,
+        }
+
+    def new_hedger(self, *, timeout_s: Optional[float] = None, max_workers: int = 8) -> "Hedger":
+        return Hedger(self, timeout_s=timeout_s, max_workers=max_workers)
+
+
+class Hedger:
+    """
+    Runs calls with a deadline and (optionally) hedging; keeps the statistics.
+
+    Args:
+        policy: Hedging policy, or None for deadlines only.
+        timeout_s: Deadline per call in seconds (None = no deadline).
+            A hedge gets the time left until the original deadline.
+        max_workers: Threads for in-flight requests (about 2x the caller's concurrency).
+    """
+
+    def __init__(
+        self,
+        policy: Optional[HedgePolicy] = None,
+        *,
+        timeout_s: Optional[float] = None,
+        max_workers: int = 8,
+    ) -> None:
+        if timeout_s is not None and timeout_s <= 0:
+            raise ValueError("timeout_s must be > 0 or None")
+        self.policy = policy
+        self.timeout_s = timeout_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge") if policy else None
+        self._lock = threading.Lock()
+        self._recent: deque[float] = deque(maxlen=policy.window if policy else 1)
+        self._latencies: list[float] = []
+        # latency each call would have had without hedging (primary request only)
+        self._primary_only: list[float] = []
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+        self.timeouts = 0
+
+    # ---------- policy ----------
+
+    def threshold_ms(self) -> Optional[float]:
+        """Current hedge threshold, or None while there is not enough data."""
+        policy = self.policy
+        if policy is None:
+            return None
+        if policy.after_ms is not None:
+            return policy.after_ms
+        with self._lock:
+            if len(self._recent) < policy.min_samples:
+                return None
+            recent = sorted(self._recent)
+        return _percentile(recent, policy.quantile)
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.policy.max_extra * self.calls:
+                self.budget_denied += 1
+                return False
+            self.hedges += 1
+            return True
+
+    def _record(self, latency_ms: float, primary_ms: Optional[float]) -> None:
+        with self._lock:
+            self._recent.append(latency_ms)
+            self._latencies.append(latency_ms)
+            if primary_ms is not None:
+                self._primary_only.append(primary_ms)
+
+    # ---------- calls ----------
+
+    def _remaining(self, t0: float) -> Optional[float]:
+        if self.timeout_s is None:
+            return None
+        left = self.timeout_s - (time.perf_counter() - t0)
+        if left <= 0:
+            raise ModelError(f"Model request timed out after {self.timeout_s:.3f}s")
+        return left
+
+    def call(self, fn: Callable[[Optional[float]], T]) -> T:
+        """
+        Run `fn(timeout)` under the deadline, hedging it if it is slow.
+
+        `fn` must perform one request and honour its timeout argument
+        (e.g. `lambda t: model.generate(prompt, timeout=t)`).
+        """
+        with self._lock:
+            self.calls += 1
+        t0 = time.perf_counter()
+        threshold = self.threshold_ms()
+        if threshold is None:
+            try:
+                out = fn(self.timeout_s)
+            except ModelError:
+                self._count_timeout(t0)
+                raise
+            ms = (time.perf_counter() - t0) * 1000.0
+            self._record(ms, ms)
+            return out
+
+        # pool threads do not inherit the caller's context (active tracer)
+        fn = bind(fn)
+        primary = self._pool.submit(fn, self.timeout_s)
+        done, _ = wait([primary], timeout=threshold / 1000.0)
+        if done or not self._take_budget():
+            try:
+                out = primary.result()
+            except ModelError:
+                self._count_timeout(t0)
+                raise
+            ms = (time.perf_counter() - t0) * 1000.0
+            self._record(ms, ms)
+            return out
+
+        hedge = self._pool.submit(fn, self._remaining(t0))
+        futures: set[Future] = {primary, hedge}
+        error: Optional[BaseException] = None
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is not None:
+                    error = error or fut.exception()
+                    continue
+                ms = (time.perf_counter() - t0) * 1000.0
+                if fut is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                    # the primary keeps running; its latency is the no-hedge counterfactual
+                    primary.add_done_callback(lambda f, ms=ms: self._primary_finished(f, t0, ms))
+                    self._record(ms, None)
+                else:
+                    self._record(ms, ms)
+                return fut.result()
+        self._count_timeout(t0)
+        raise error  # type: ignore[misc]
+
+    def _primary_finished(self, fut: Future, t0: float, hedged_ms: float) -> None:
+        ms = (time.perf_counter() - t0) * 1000.0
+        if fut.exception() is not None and self.timeout_s is not None:
+            ms = max(ms, self.timeout_s * 1000.0)
+        with self._lock:
+            self._primary_only.append(max(ms, hedged_ms))
+
+    def _count_timeout(self, t0: float) -> None:
+        if self.timeout_s is not None and time.perf_counter() - t0 >= self.timeout_s * 0.99:
+            with self._lock:
+                self.timeouts += 1
+
+    # ---------- reporting ----------
+
+    def stats(self) -> dict[str, Any]:
+        """Hedge rate, wins and tail latency with hedging vs. the primary-only estimate."""
+        with self._lock:
+            lat = sorted(self._latencies)
+            primary = sorted(self._primary_only)
+            calls, hedges, wins = self.calls, self.hedges, self.hedge_wins
+            denied, timeouts = self.budget_denied, self.timeouts
+
+        def q(vals: list[float], p: float) -> Optional[float]:
+            v = _percentile(vals, p)
+            return round(v, 2) if v is not None else None
+
+        out: dict[str, Any] = {
+            "timeout_s": self.timeout_s,
+            "policy": self.policy.describe() if self.policy else None,
+            "calls": calls,
+            "timeouts": timeouts,
+            "hedges": hedges,
+            "hedge_rate": round(hedges / calls, 4) if calls else None,
+            "hedge_wins": wins,
+            "budget_denied": denied,
+            "latency_ms_p50": q(lat, 0.50),
+            "latency_ms_p95": q(lat, 0.95),
+            "latency_ms_p99": q(lat, 0.99),
+        }
+        if self.policy is not None:
+            # primaries that lost and are still running are missing: a lower bound
+            out["unhedged_ms_p95"] = q(primary, 0.95)
+            out["unhedged_ms_p99"] = q(primary, 0.99)
+            if out["unhedged_ms_p99"] is not None and out["latency_ms_p99"] is not None:
+                out["p99_saved_ms"] = round(out["unhedged_ms_p99"] - out["latency_ms_p99"], 2)
+        return out
+
+    def close(self) -> None:
+        if self._pool is not None:
+            # do not wait for abandoned requests; they end at their deadline
+            self._pool.shutdown(wait=False)
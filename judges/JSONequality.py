@@ -6,8 +6,9 @@ import logging
 import pandas as pd
 
 from .base import BaseJudge
-from utils import validate_required_columns
+from utils import iter_rows, validate_required_columns
 from errors import EvaluationError
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -61,24 +62,30 @@ class JSONEquals(BaseJudge):
         # Other types: direct comparison
         return a == b
 
+    def judge_row(self, question: Any, model_answer: Any, true_answer: Any) -> int:
+        try:
+            return self.check_single_answer(model_answer, true_answer)
+        except EvaluationError as e:
+            logger.warning("Row failed JSON equality: %s", e)
+            return 0  # invalid JSON or mismatch counts as incorrect
+
     def check_answers(
         self,
         meta: dict[str, Any],
         df: pd.DataFrame,
         output_csv_path: str,
+        **kwargs: Any,
     ) -> tuple[dict[str, Any], pd.DataFrame]:
         """Evaluate multiple JSON-based answers."""
         required_cols = ["model_answer", "true_answer"]
         validate_required_columns(df, required_cols)
 
-        def safe_check(row):
-            try:
-                return self.check_single_answer(row["model_answer"], row["true_answer"])
-            except EvaluationError as e:
-                logger.warning("Row failed JSON equality: %s", e)
-                return 0  # invalid JSON or mismatch counts as incorrect
-
-        df["is_correct"] = df.apply(safe_check, axis=1)
+        with span("judge.check", judge="JSONEquals", rows=len(df)):
+            df["is_correct"] = [
+                self.judge_row(None, r.model_answer, r.true_answer)
+                for r in iter_rows(df, required_cols)
+            ]
+            samples = self.score_samples(df)
 
         meta["judge"] = {
             "type": "JSONEquality",
@@ -86,7 +93,10 @@ class JSONEquals(BaseJudge):
             "model_params": None,
             "eval_prompt": None,
         }
+        if samples is not None:
+            meta["judge"]["samples"] = samples
 
-        df.to_csv(output_csv_path, index=False)
+        with span("judge.write_csv", rows=len(df)):
+            df.to_csv(output_csv_path, index=False)
         logger.info("✅ JSON equality check complete. Results saved to %s", output_csv_path)
         return meta, df
@@ -1,13 +1,42 @@
-from .base import BaseJudge
-from .contains import Contains
-from .equals import Equals
-from .prompt_based_bool import PromptBasedBoolean
-from .prompt_based_score import PromptBasedScore
+"""Judges, imported on first use so a string judge does not load the LLM judges."""
+from importlib import import_module
+
+_EXPORTS = {
+    "BaseJudge": ".base",
+    "CascadeJudge": ".cascade",
+    "Contains": ".contains",
+    "EnsembleJudge": ".ensemble",
+    "Equals": ".equals",
+    "FuzzyMatch": ".fuzzy",
+    "LLMJudge": ".llm_base",
+    "MCQExtract": ".mcq",
+    "PromptBasedBoolean": ".prompt_based_bool",
+    "PromptBasedScore": ".prompt_based_score",
+}
 
 __all__ = [
     "BaseJudge",
+    "CascadeJudge",
     "Contains",
+    "EnsembleJudge",
     "Equals",
+    "FuzzyMatch",
+    "LLMJudge",
+    "MCQExtract",
     "PromptBasedBoolean",
-    "PromptBasedScore"
+    "PromptBasedScore",
 ]
+
+
+def __getattr__(name: str):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,11 +1,20 @@
 # base.py
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Optional
+import copy
+import hashlib
+import json
 import logging
+import numpy as np
 import pandas as pd
 
-from model import Model
+from errors import EvaluationError
+from utils import iter_rows
+
+if TYPE_CHECKING:
+    from model import Model
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +22,11 @@ logger = logging.getLogger(__name__)
 class BaseJudge(ABC):
     """Abstract base class for all judge types."""
 
+    # column check_answers writes the per-row verdict to
+    output_column: str = "is_correct"
+    # run column with all answers per row (Runner n_samples), a JSON list
+    samples_column: str = "samples"
+
     def __init__(self, model: Optional[Model] = None) -> None:
         """Initialize with an optional LLM model."""
         self.model = model
@@ -28,6 +42,118 @@ class BaseJudge(ABC):
         """Compare a single answer and return a judgment (type depends on subclass)."""
         pass
 
+    def judge_row(self, question: Any, model_answer: Any, true_answer: Any) -> Any:
+        """
+        Return the verdict value for one row (what check_answers stores in
+        `output_column`). Raises EvaluationError when the row cannot be judged.
+        Used by judges that combine other judges (e.g. EnsembleJudge).
+        """
+        return self.check_single_answer(model_answer, true_answer)
+
+    def identity(self) -> dict[str, Any]:
+        """
+        What decides this judge's verdicts (type, judge model, prompt, ...).
+        Subclasses with more settings extend it; runtime knobs such as
+        concurrency stay out.
+        """
+        model = getattr(self, "model", None)
+        return {
+            "type": type(self).__name__,
+            "model": None if model is None else {
+                "name": model.get_name(),
+                "params": model.get_params(),
+                "system_prompt": model.get_system_prompt(),
+            },
+        }
+
+    def copy(self) -> BaseJudge:
+        """
+        Copy for a concurrent run: settings and models are shared, per-run
+        state (e.g. an LLM judge's structured-output fallback or hedger) is
+        not. Judges that combine other judges copy their members too.
+        """
+        return copy.copy(self)
+
+    def fingerprint(self) -> str:
+        """Short stable hash of identity(); equal fingerprints judge a row the same way."""
+        blob = json.dumps(self.identity(), sort_keys=True, default=str)
+        return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+    # ---------- multi-sample runs (pass@k / majority vote) ----------
+
+    def sample_verdicts(self, flat: pd.DataFrame) -> pd.Series:
+        """
+        1.0/0.0 (NaN = undecided) for every sample in `flat`, one row per
+        sample with model_answer, true_answer, question and options.
+        Judges with a column-at-a-time `verdicts` use it; others fall back
+        to judge_row per sample.
+        """
+        verdicts = getattr(self, "verdicts", None)
+        if verdicts is not None:
+            return verdicts(flat["model_answer"], flat["true_answer"])
+        out = []
+        for r in iter_rows(flat, ("question", "model_answer", "true_answer")):
+            try:
+                out.append(float(self.judge_row(r.question, r.model_answer, r.true_answer)))
+            except (EvaluationError, TypeError, ValueError):
+                out.append(float("nan"))
+        return pd.Series(out, index=flat.index, dtype=float)
+
+    def vote_keys(self, flat: pd.DataFrame) -> list[Optional[str]]:
+        """Normal form of each sample for majority voting (None = no vote)."""
+        return [
+            " ".join(a.casefold().split()) or None if isinstance(a, str) else None
+            for a in flat["model_answer"].to_numpy()
+        ]
+
+    def score_samples(self, df: pd.DataFrame) -> Optional[dict[str, Any]]:
+        """
+        Judge every sample of a multi-sample run in one pass and add per-row
+        samples_total, samples_correct, majority_answer and majority_correct
+        (the verdict of the most common answer; ties go to the earliest).
+
+        Returns:
+            Summary for meta["judge"]["samples"], or None when `df` has no
+            samples column or the judge does not produce 0/1 verdicts.
+        """
+        if self.samples_column not in df.columns or self.output_column != "is_correct":
+            return None
+        samples = [_parse_samples(v) for v in df[self.samples_column].to_numpy()]
+        counts = np.fromiter((len(s) for s in samples), dtype=int, count=len(samples))
+        pos = np.repeat(np.arange(len(df)), counts)
+        cols = [c for c in ("question", "true_answer", "options") if c in df.columns]
+        flat = df.iloc[pos][cols].reset_index(drop=True)
+        flat["model_answer"] = [a for s in samples for a in s]
+
+        verdicts = np.nan_to_num(self.sample_verdicts(flat).to_numpy(dtype=float), nan=0.0)
+        keys = self.vote_keys(flat)
+
+        correct, majority, majority_ok = [], [], []
+        start = 0
+        for k in counts:
+            v, row_keys = verdicts[start:start + k], keys[start:start + k]
+            correct.append(int(v.sum()))
+            votes = Counter(key for key in row_keys if key is not None)
+            if votes:
+                top = max(votes.values())
+                first = next(i for i, key in enumerate(row_keys) if key is not None and votes[key] == top)
+                majority.append(row_keys[first])
+                majority_ok.append(int(v[first]))
+            else:
+                majority.append(None)
+                majority_ok.append(0)
+            start += k
+
+        df["samples_total"] = counts
+        df["samples_correct"] = correct
+        df["majority_answer"] = majority
+        df["majority_correct"] = majority_ok
+        return {
+            "rows": len(df),
+            "samples": int(counts.sum()),
+            "k": int(counts.max()) if len(counts) else 0,
+        }
+
     @abstractmethod
     def check_answers(
         self,
@@ -38,3 +164,15 @@ class BaseJudge(ABC):
     ):
         """Evaluate multiple answers in a dataset."""
         pass
+
+
+def _parse_samples(value: Any) -> list[Any]:
+    """samples cells are JSON lists (also after a CSV round trip) or lists."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return [value]
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return list(value)
+    return [] if value is None or value != value else [value]
@@ -0,0 +1,210 @@
+# cascade.py
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Sequence, Union
+import logging
+import pandas as pd
+
+from .base import BaseJudge
+from .contains import Contains
+from .equals import Equals
+from .llm_base import LLMJudge
+from utils import iter_rows, usage_delta, usage_snapshot, validate_required_columns
+from tracing import bind, span
+
+logger = logging.getLogger(__name__)
+
+# policy(tier_verdicts) -> Series of resolved verdicts (NaN = send the row to the LLM judge).
+# tier_verdicts has one float column (1.0 / 0.0 / NaN) per string tier, in cascade order.
+CascadePolicy = Callable[[pd.DataFrame], pd.Series]
+
+
+def accept_positives(tier_verdicts: pd.DataFrame) -> pd.Series:
+    """Trust string-judge hits; negatives and undecided rows go to the LLM judge."""
+    hit = (tier_verdicts == 1.0).any(axis=1)
+    return pd.Series(1.0, index=tier_verdicts.index).where(hit)
+
+
+def accept_decided(tier_verdicts: pd.DataFrame) -> pd.Series:
+    """
+    Trust the first tier with a verdict (hit or miss); only rows no string judge
+    could decide go to the LLM judge. Cheapest, but string misses are final.
+    """
+    return tier_verdicts.bfill(axis=1).iloc[:, 0]
+
+
+POLICIES: dict[str, CascadePolicy] = {
+    "accept_positives": accept_positives,
+    "accept_decided": accept_decided,
+}
+
+
+class CascadeJudge(BaseJudge):
+    """
+    Cheap-first judge: vectorized string judges resolve the easy rows, the
+    LLM judge only sees what the policy leaves undecided.
+
+    - Tiers (default Equals, then Contains) run column-at-a-time via .verdicts()
+    - `policy` decides which rows are resolved by the string tiers
+      ("accept_positives" by default, "accept_decided", or a callable)
+    - Remaining rows are judged by `llm_judge` concurrently, with its retries
+    - `is_correct` holds 1/0 (NaN if the LLM could not judge the row),
+      `cascade_tier` names the tier that resolved each row
+    - Cascade stats (rows per tier, LLM calls saved) go to meta["judge"]["cascade"]
+    """
+
+    tier_column = "cascade_tier"
+
+    def __init__(
+        self,
+        llm_judge: LLMJudge,
+        *,
+        tiers: Optional[Sequence[BaseJudge]] = None,
+        policy: Union[str, CascadePolicy] = "accept_positives",
+        concurrency: int = 4,
+    ) -> None:
+        super().__init__(model=llm_judge.model)
+        tiers = list(tiers) if tiers is not None else [Equals(), Contains()]
+        if not tiers:
+            raise ValueError("CascadeJudge needs at least one string tier")
+        for judge in (*tiers, llm_judge):
+            if judge.output_column != self.output_column:
+                raise ValueError(
+                    f"{type(judge).__name__} writes {judge.output_column!r}; cascade tiers must all produce {self.output_column!r}"
+                )
+        for judge in tiers:
+            if not hasattr(judge, "verdicts"):
+                raise ValueError(f"{type(judge).__name__} has no vectorized verdicts() and cannot be a cascade tier")
+        if isinstance(policy, str):
+            if policy not in POLICIES:
+                raise ValueError(f"Unknown cascade policy {policy!r}; expected one of {sorted(POLICIES)}")
+            self.policy_name, self.policy = policy, POLICIES[policy]
+        else:
+            self.policy_name, self.policy = getattr(policy, "__name__", "custom"), policy
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+
+        self.llm_judge = llm_judge
+        self.tiers = tiers
+        self.concurrency = concurrency
+        self.tier_names = [type(t).__name__.lower() for t in tiers]
+
+    def copy(self) -> CascadeJudge:
+        out = super().copy()
+        out.llm_judge = self.llm_judge.copy()
+        return out
+
+    def identity(self) -> dict[str, Any]:
+        out = super().identity()
+        out["llm"] = self.llm_judge.identity()
+        out["tiers"] = [t.identity() for t in self.tiers]
+        out["policy"] = self.policy_name
+        return out
+
+    def check_single_answer(
+        self,
+        question: Optional[str] = None,
+        model_answer: str = "",
+        true_answer: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> int:
+        """Cascade one answer (no retries): string tiers first, then the LLM judge."""
+        df = pd.DataFrame({"question": [question], "model_answer": [model_answer], "true_answer": [true_answer]})
+        resolved = self.policy(self._tier_verdicts(df)).iloc[0]
+        if resolved == resolved:
+            return int(resolved)
+        return int(self.llm_judge.check_single_answer(question, model_answer, true_answer, prompt)[self.llm_judge.result_key])
+
+    def judge_row(self, question: Any, model_answer: Any, true_answer: Any) -> int:
+        return self.check_single_answer(question, model_answer, true_answer)
+
+    def _tier_verdicts(self, df: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame(
+            {name: tier.verdicts(df["model_answer"], df["true_answer"]) for name, tier in zip(self.tier_names, self.tiers)},
+            index=df.index,
+        )
+
+    def _tier_labels(self, tier_verdicts: pd.DataFrame, resolved: pd.Series) -> list[str]:
+        """Name of the first tier whose verdict equals the resolved one."""
+        labels = pd.Series("llm", index=resolved.index, dtype=object)
+        for name in reversed(self.tier_names):
+            labels = labels.mask(resolved.notna() & (tier_verdicts[name] == resolved), name)
+        # custom policies may resolve rows without any matching tier verdict
+        return labels.mask(resolved.notna() & (labels == "llm"), "policy").tolist()
+
+    def check_answers(
+        self,
+        meta: dict[str, Any],
+        df: pd.DataFrame,
+        output_csv_path: str,
+        **kwargs: Any,
+    ) -> tuple[dict[str, Any], pd.DataFrame]:
+        validate_required_columns(df, ["model_answer", "true_answer"])
+        monitor = kwargs.get("monitor")
+        n = len(df)
+        if monitor is not None:
+            monitor.start_stage("judge:CascadeJudge", n)
+
+        with span("judge.check", judge="CascadeJudge", rows=n):
+            with span("judge.cascade.string_tiers", rows=n):
+                tier_verdicts = self._tier_verdicts(df)
+                resolved = self.policy(tier_verdicts).reindex(df.index)
+                tiers = self._tier_labels(tier_verdicts, resolved)
+
+            values: list[Any] = [int(v) if v == v else v for v in resolved.tolist()]
+            llm_rows = [i for i, v in enumerate(values) if v != v]
+            if monitor is not None:
+                monitor.row_completed(n - len(llm_rows))
+
+            usage_before = usage_snapshot(self.llm_judge.model)
+            retried = 0
+            hedging = None
+            if llm_rows:
+                llm_span = span("judge.cascade.llm", rows=len(llm_rows))
+                with llm_span, self.llm_judge.hedging() as hedger, ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                    rows = list(iter_rows(df, ("question", "model_answer", "true_answer")))
+                    judge_row = bind(self.llm_judge.judge_with_retries)
+                    futures = [(i, pool.submit(judge_row, *rows[i], monitor)) for i in llm_rows]
+                    for i, fut in futures:
+                        value, used = fut.result()
+                        values[i] = int(value) if isinstance(value, bool) else value
+                        retried += used
+                        if monitor is not None:
+                            monitor.row_completed()
+                if self.llm_judge.hedge is not None:
+                    hedging = hedger.stats()
+
+        df[self.output_column] = values
+        df[self.tier_column] = tiers
+        invalid = int(pd.isna(pd.Series(values, dtype="object")).sum())
+
+        resolved_by = {name: tiers.count(name) for name in (*self.tier_names, "policy", "llm")}
+        if not resolved_by["policy"]:
+            del resolved_by["policy"]
+        meta["judge"] = {
+            **self.llm_judge._judge_meta(),
+            "type": "Cascade",
+            "llm_judge_type": self.llm_judge.judge_type,
+            "structured_output": self.llm_judge._use_structured_output(),
+            "retried_count": retried,
+            "invalid_count": invalid,
+            "usage": usage_delta(usage_before, usage_snapshot(self.llm_judge.model)),
+            "hedging": hedging,
+            "cascade": {
+                "tiers": self.tier_names,
+                "policy": self.policy_name,
+                "resolved_by": resolved_by,
+                "llm_rows": len(llm_rows),
+                "llm_calls_saved": n - len(llm_rows),
+                "saved_fraction": round((n - len(llm_rows)) / n, 4) if n else None,
+            },
+        }
+        logger.info(
+            "Cascade resolved %d/%d rows without the LLM judge (%s)",
+            n - len(llm_rows), n, ", ".join(f"{k}={v}" for k, v in resolved_by.items()),
+        )
+
+        with span("judge.write_csv", rows=n):
+            df.to_csv(output_csv_path, index=False)
+        logger.info("✅ Cascade judge done. Results saved to %s", output_csv_path)
+        return meta, df
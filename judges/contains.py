@@ -1,28 +1,38 @@
 # contains_judge.py
 from __future__ import annotations
-from typing import Any
+from typing import Any, Optional
 import logging
 import pandas as pd
 import re
 import unicodedata
+from functools import lru_cache
 
 from .base import BaseJudge
 from utils import validate_required_columns
 from errors import EvaluationError
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
+_PUNCT_RE = re.compile(r"[^\w\s’']")
+_SPACE_RE = re.compile(r"\s+")
+
+
 def _normalize_text(s: str) -> str:
     """Normalize text for case-insensitive comparison (Unicode-safe)."""
     if s is None:
         return ""
     # Unicode normalize (NFKC) + lower + basic punctuation cleanup
     s = unicodedata.normalize("NFKC", str(s)).casefold()
-    s = re.sub(r"[^\w\s’']", " ", s)  # remove punctuation, keep apostrophes
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _PUNCT_RE.sub(" ", s)  # remove punctuation, keep apostrophes
+    s = _SPACE_RE.sub(" ", s).strip()
     return s
 
 
+# reference answers repeat across rows (same label set), so cache their normal form
+_normalize_reference = lru_cache(maxsize=65536)(_normalize_text)
+
+
 class Contains(BaseJudge):
     """Judge that checks if the true answer appears in the model's answer (for with_true_answer type tasks)."""
 
@@ -48,11 +58,34 @@ class Contains(BaseJudge):
         )
         return result
 
+    def verdicts(self, model_answers: pd.Series, true_answers: pd.Series) -> pd.Series:
+        """
+        Column-at-a-time check_single_answer: 1.0/0.0 per row, NaN where
+        true_answer is missing or empty (check_single_answer would raise).
+        """
+        out = []
+        for model, truth in zip(model_answers.to_numpy(), true_answers.to_numpy()):
+            if truth is None or truth != truth or truth == "":
+                out.append(float("nan"))
+                continue
+            try:
+                truth_norm = _normalize_reference(truth)
+            except TypeError:  # unhashable reference
+                truth_norm = _normalize_text(truth)
+            model_norm = "" if model != model else _normalize_text(model)  # NaN = no answer
+            out.append(1.0 if truth_norm in model_norm else 0.0)
+        return pd.Series(out, index=model_answers.index, dtype=float)
+
+    def vote_keys(self, flat: pd.DataFrame) -> list[Optional[str]]:
+        """Samples vote by their normalized text (the form check_single_answer compares)."""
+        return [_normalize_text(a) or None if isinstance(a, str) else None for a in flat["model_answer"].to_numpy()]
+
     def check_answers(
         self,
         meta: dict[str, Any],
         df: pd.DataFrame,
         output_csv_path: str,
+        **kwargs: Any,
     ) -> tuple[dict[str, Any], pd.DataFrame]:
         """
         Evaluate multiple string-based answers and mark if model output contains the correct answer.
@@ -60,10 +93,12 @@ class Contains(BaseJudge):
         required_cols = ["model_answer", "true_answer"]
         validate_required_columns(df, required_cols)
 
-        df["is_correct"] = df.apply(
-            lambda r: self.check_single_answer(r["model_answer"], r["true_answer"]),
-            axis=1,
-        )
+        with span("judge.check", judge="Contains", rows=len(df)):
+            verdicts = self.verdicts(df["model_answer"], df["true_answer"])
+            if verdicts.isna().any():
+                raise EvaluationError("true_answer cannot be empty for Contains judge.")
+            df["is_correct"] = verdicts.astype(int)
+            samples = self.score_samples(df)
 
         # Add judge metadata
         meta["judge"] = {
@@ -73,8 +108,11 @@ class Contains(BaseJudge):
             "eval_prompt": None,
             "invalid_count":0
         }
+        if samples is not None:
+            meta["judge"]["samples"] = samples
 
         # Save results
-        df.to_csv(output_csv_path, index=False)
+        with span("judge.write_csv", rows=len(df)):
+            df.to_csv(output_csv_path, index=False)
         logger.info("✅ Contains check complete. Results saved to %s", output_csv_path)
         return meta, df
@@ -0,0 +1,177 @@
+# ensemble.py
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Any, Mapping, Optional, Sequence
+import logging
+import re
+import pandas as pd
+
+from .base import BaseJudge
+from .llm_base import LLMJudge
+from utils import iter_rows, usage_delta, usage_snapshot, validate_required_columns
+from errors import EvaluationError
+from tracing import bind, span
+
+logger = logging.getLogger(__name__)
+
+_NAN = float("nan")
+
+
+def _default_name(judge: BaseJudge) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", type(judge).__name__).lower()
+
+
+class EnsembleJudge(BaseJudge):
+    """
+    Apply several judges (string and LLM) to one results frame in a single pass.
+
+    - Rows are traversed once; string judges run inline, LLM judge calls are
+      dispatched to a shared thread pool (`concurrency` calls in flight)
+    - Unparsable LLM verdicts are retried per cell (up to the judge's max_retries)
+    - Each judge writes `{name}_{output_column}`; the primary judge's verdict is
+      also copied to its plain output column so the usual evaluators work
+    - The CSV is written once, with all verdict columns
+    - meta["judge"]["columns"] lists the verdict columns (see AgreementEvaluator)
+    """
+
+    def __init__(
+        self,
+        judges: Mapping[str, BaseJudge] | Sequence[BaseJudge],
+        *,
+        primary: Optional[str] = None,
+        concurrency: int = 4,
+    ) -> None:
+        super().__init__(model=None)
+        if isinstance(judges, Mapping):
+            members = dict(judges)
+        else:
+            members = {}
+            for judge in judges:
+                name = _default_name(judge)
+                if name in members:
+                    name = f"{name}_{len(members) + 1}"
+                members[name] = judge
+        if not members:
+            raise ValueError("EnsembleJudge needs at least one judge")
+        if primary is not None and primary not in members:
+            raise ValueError(f"Unknown primary judge: {primary!r}")
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+
+        self.judges = members
+        self.primary = primary or next(iter(members))
+        self.concurrency = concurrency
+        self.output_column = members[self.primary].output_column
+
+    def identity(self) -> dict[str, Any]:
+        out = super().identity()
+        out["members"] = {name: judge.identity() for name, judge in self.judges.items()}
+        out["primary"] = self.primary
+        return out
+
+    def copy(self) -> EnsembleJudge:
+        out = super().copy()
+        out.judges = {name: judge.copy() for name, judge in self.judges.items()}
+        return out
+
+    def column_for(self, name: str) -> str:
+        return f"{name}_{self.judges[name].output_column}"
+
+    def check_single_answer(
+        self,
+        question: Optional[str] = None,
+        model_answer: str = "",
+        true_answer: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """Return {judge name: verdict} for one answer (sequential, no retries)."""
+        return {
+            name: judge.judge_row(question, model_answer, true_answer)
+            for name, judge in self.judges.items()
+        }
+
+    def judge_row(self, question: Any, model_answer: Any, true_answer: Any) -> Any:
+        return self.judges[self.primary].judge_row(question, model_answer, true_answer)
+
+    def check_answers(
+        self,
+        meta: dict[str, Any],
+        df: pd.DataFrame,
+        output_csv_path: str,
+        **kwargs: Any,
+    ) -> tuple[dict[str, Any], pd.DataFrame]:
+        validate_required_columns(df, ["model_answer"])
+        monitor = kwargs.get("monitor")
+        if monitor is not None:
+            monitor.start_stage("judge:EnsembleJudge", len(df))
+
+        n = len(df)
+        values: dict[str, list[Any]] = {name: [_NAN] * n for name in self.judges}
+        retried = {name: 0 for name in self.judges}
+        llm_names = [name for name, j in self.judges.items() if isinstance(j, LLMJudge)]
+        usage_before = {name: usage_snapshot(self.judges[name].model) for name in llm_names}
+
+        with span("judge.check", judge="EnsembleJudge", rows=n, judges=len(self.judges)), ExitStack() as stack:
+            hedgers = {name: stack.enter_context(self.judges[name].hedging()) for name in llm_names}
+            pending: list[tuple[str, int, Future]] = []
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                for i, row in enumerate(iter_rows(df, ("question", "model_answer", "true_answer"))):
+                    for name, judge in self.judges.items():
+                        if isinstance(judge, LLMJudge):
+                            pending.append((name, i, pool.submit(bind(judge.judge_with_retries), *row, monitor)))
+                            continue
+                        try:
+                            values[name][i] = judge.judge_row(*row)
+                        except EvaluationError as e:
+                            logger.warning("%s row failed: %s", name, e)
+
+                done = 0  # rows [0, done) fully judged; cells are collected in row order
+                for name, i, fut in pending:
+                    if monitor is not None and i > done:
+                        monitor.row_completed(i - done)
+                        done = i
+                    values[name][i], used = fut.result()
+                    retried[name] += used
+                if monitor is not None and n > done:
+                    monitor.row_completed(n - done)
+
+        columns = {}
+        members_meta = {}
+        for name, judge in self.judges.items():
+            col = self.column_for(name)
+            df[col] = values[name]
+            columns[name] = col
+            invalid = int(pd.isna(pd.Series(values[name], dtype="object")).sum())
+            entry = {
+                "type": type(judge).__name__,
+                "column": col,
+                "judge_model": getattr(judge.model, "get_name", lambda: None)(),
+                "invalid_count": invalid,
+            }
+            if isinstance(judge, LLMJudge):
+                entry.update({
+                    **judge._judge_meta(),
+                    "structured_output": judge._use_structured_output(),
+                    "retried_count": retried[name],
+                    "usage": usage_delta(usage_before[name], usage_snapshot(judge.model)),
+                    "hedging": hedgers[name].stats() if judge.hedge is not None else None,
+                })
+            members_meta[name] = entry
+        df[self.output_column] = df[columns[self.primary]]
+
+        meta["judge"] = {
+            "type": "Ensemble",
+            "judge_model": members_meta[self.primary]["judge_model"],
+            "model_params": None,
+            "eval_prompt": None,
+            "primary": self.primary,
+            "columns": columns,
+            "invalid_count": members_meta[self.primary]["invalid_count"],
+            "members": members_meta,
+        }
+
+        with span("judge.write_csv", rows=n):
+            df.to_csv(output_csv_path, index=False)
+        logger.info("✅ Ensemble of %d judges done. Results saved to %s", len(self.judges), output_csv_path)
+        return meta, df
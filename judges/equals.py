@@ -7,6 +7,7 @@ import pandas as pd
 from .base import BaseJudge
 from utils import validate_required_columns
 from errors import EvaluationError
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -26,19 +27,27 @@ class Equals(BaseJudge):
         logger.debug("MC check: model=%s, true=%s → %d", model_letter, true_letter, result)
         return result
 
+    def verdicts(self, model_answers: pd.Series, true_answers: pd.Series) -> pd.Series:
+        """Vectorized check_single_answer: 1.0/0.0 per row, NaN where true_answer is missing."""
+        model = model_answers.astype(str).str.strip().str.upper()
+        truth = true_answers.astype(str).str.strip().str.upper()
+        return (model == truth).astype(float).mask(true_answers.isna())
+
     def check_answers(
         self,
         meta: dict[str, Any],
         df: pd.DataFrame,
         output_csv_path: str,
+        **kwargs: Any,
     ) -> tuple[dict[str, Any], pd.DataFrame]:
         required_cols = ["model_answer", "true_answer"]
         validate_required_columns(df, required_cols)
 
-        df["is_correct"] = df.apply(
-            lambda r: self.check_single_answer(r["model_answer"], r["true_answer"]),
-            axis=1,
-        )
+        if df["true_answer"].isna().any():
+            raise EvaluationError("true_answer cannot be None for Equals.")
+        with span("judge.check", judge="Equals", rows=len(df)):
+            df["is_correct"] = self.verdicts(df["model_answer"], df["true_answer"]).astype(int)
+            samples = self.score_samples(df)
 
         meta["judge"] = {
             "type":"Equals",
@@ -47,8 +56,11 @@ class Equals(BaseJudge):
             "eval_prompt": None,
             "invalid_count": 0
         }
+        if samples is not None:
+            meta["judge"]["samples"] = samples
 
 
-        df.to_csv(output_csv_path, index=False)
+        with span("judge.write_csv", rows=len(df)):
+            df.to_csv(output_csv_path, index=False)
         logger.info("✅ Equals check complete. Results saved to %s", output_csv_path)
         return meta, df
@@ -0,0 +1,338 @@
+# fuzzy_judge.py
+from __future__ import annotations
+from itertools import chain
+from typing import Any, Optional, Sequence
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .base import BaseJudge
+from .contains import _normalize_text
+from utils import validate_required_columns
+from errors import EvaluationError
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+_ARTICLES = frozenset({"a", "an", "the"})
+# one code point takes 21 bits, so up to three fit exactly into an int64 n-gram key
+_CODE_BASE = 0x110000
+# cells (rows x padded length) per vectorized block, bounds the working memory
+_BLOCK_CELLS = 1 << 22
+
+
+def _normalize_column(values: pd.Series) -> np.ndarray:
+    """Contains normalization of every distinct value; missing values become None."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    normalized = np.array([_normalize_text(u) for u in uniques] + [None], dtype=object)
+    return normalized[codes]
+
+
+def _code_matrix(strings: Sequence[str], width: Optional[int] = None) -> np.ndarray:
+    """Unicode code points as a (rows, width) uint32 matrix, zero-padded."""
+    if width is None:
+        width = max(1, max(map(len, strings), default=0))
+    return np.array(strings, dtype=f"<U{width}").view(np.uint32).reshape(len(strings), width)
+
+
+class _Bags:
+    """
+    Multiset of item ids per unique string, stored CSR-style.
+
+    Within a string the ids are sorted and distinct (with counts), so the
+    expanded row keys row * vocab + id come out globally sorted.
+    """
+
+    def __init__(self, owner: np.ndarray, ids: np.ndarray, n_strings: int) -> None:
+        self.vocab = int(ids.max()) + 1 if len(ids) else 1
+        keys, counts = np.unique(owner * self.vocab + ids, return_counts=True)
+        nnz = np.bincount(keys // self.vocab, minlength=n_strings)
+        self.ids = keys % self.vocab
+        self.counts = counts
+        self.nnz = nnz
+        self.starts = np.cumsum(nnz) - nnz
+        self.sizes = np.bincount(owner, minlength=n_strings)
+
+    def expand(self, codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Sorted row keys and their counts for rows holding the given strings."""
+        sizes = self.nnz[codes]
+        offsets = np.cumsum(sizes) - sizes
+        idx = np.repeat(self.starts[codes] - offsets, sizes) + np.arange(int(sizes.sum()))
+        rows = np.repeat(np.arange(len(codes), dtype=np.int64), sizes)
+        return rows * self.vocab + self.ids[idx], self.counts[idx]
+
+    def dice(self, codes_a: np.ndarray, codes_b: np.ndarray) -> np.ndarray:
+        """2|A∩B| / (|A|+|B|) per row (1.0 when both are empty)."""
+        keys_a, counts_a = self.expand(codes_a)
+        keys_b, counts_b = self.expand(codes_b)
+        overlap = np.zeros(len(codes_a))
+        if len(keys_a) and len(keys_b):
+            pos = np.minimum(np.searchsorted(keys_a, keys_b), len(keys_a) - 1)
+            hit = keys_a[pos] == keys_b
+            overlap = np.bincount(
+                keys_b[hit] // self.vocab,
+                weights=np.minimum(counts_a[pos[hit]], counts_b[hit]),
+                minlength=len(codes_a),
+            )
+        total = self.sizes[codes_a] + self.sizes[codes_b]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(total == 0, 1.0, 2.0 * overlap / total)
+
+
+def _token_bags(strings: Sequence[str]) -> _Bags:
+    """SQuAD tokens (articles dropped) of each string."""
+    tokens = [[t for t in s.split() if t not in _ARTICLES] for s in strings]
+    lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+    words = np.fromiter(chain.from_iterable(tokens), dtype=object, count=int(lengths.sum()))
+    ids = pd.factorize(words)[0].astype(np.int64)
+    return _Bags(np.repeat(np.arange(len(strings), dtype=np.int64), lengths), ids, len(strings))
+
+
+def _ngram_bags(strings: Sequence[str], n: int) -> _Bags:
+    """Character n-grams of each string; a string shorter than n is one gram."""
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+    counts = np.where(lengths == 0, 0, np.maximum(lengths - n + 1, 1))
+    owners, keys = [], []
+    order = np.argsort(lengths, kind="stable")
+    step = max(1, _BLOCK_CELLS // (int(lengths.max(initial=0)) + n))
+    for start in range(0, len(order), step):
+        idx = order[start:start + step]
+        codes = _code_matrix([strings[i] for i in idx]).astype(np.int64)
+        codes = np.pad(codes, ((0, 0), (0, n - 1)))
+        width = codes.shape[1] - n + 1
+        gram = np.zeros((len(idx), width), dtype=np.int64)
+        for k in range(n):
+            gram = gram * _CODE_BASE + codes[:, k:k + width]
+        valid = np.arange(width) < counts[idx][:, None]
+        owners.append(np.broadcast_to(idx[:, None], valid.shape)[valid])
+        keys.append(gram[valid])
+    owner = np.concatenate(owners) if owners else np.empty(0, np.int64)
+    ids = pd.factorize(np.concatenate(keys))[0].astype(np.int64) if keys else np.empty(0, np.int64)
+    return _Bags(owner, ids, len(strings))
+
+
+def _myers_block(text: np.ndarray, len_t: np.ndarray, pattern: np.ndarray, len_p: np.ndarray) -> np.ndarray:
+    """
+    Edit distances by Myers' bit-parallel algorithm (Hyyrö's formulation).
+
+    The pattern (at most 64 characters) lives in the bits of one machine
+    word per row, so each text character costs a dozen word operations for
+    all rows at once instead of a DP row.
+    """
+    bits = 8
+    while bits < pattern.shape[1]:
+        bits *= 2
+    word = np.dtype(f"uint{bits}")
+    pattern = np.pad(pattern, ((0, 0), (0, bits - pattern.shape[1])))
+    one = word.type(1)
+    high = np.where(len_p > 0, one << np.maximum(len_p - 1, 0).astype(word), 0).astype(word)
+    pv = np.full(len(text), ~word.type(0), dtype=word)
+    mv = np.zeros(len(text), dtype=word)
+    score = len_p.astype(np.int64).copy()
+    out = score.copy()  # empty text: insert the whole pattern
+    for i in range(text.shape[1]):
+        eq = np.packbits(pattern == text[:, i:i + 1], axis=1, bitorder="little").view(word).ravel()
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        score += (ph & high) != 0
+        score -= (mh & high) != 0
+        ph = (ph << one) | one
+        mh = mh << one
+        pv = mh | ~(xv | ph)
+        mv = ph & xv
+        done = len_t == i + 1
+        if done.any():
+            out[done] = score[done]
+    return out
+
+
+def _levenshtein_block(a: np.ndarray, len_a: np.ndarray, b: np.ndarray, len_b: np.ndarray) -> np.ndarray:
+    """
+    Edit distances for a block of rows, one DP row per step for all rows.
+
+    The insertion term cur[j] = min(t[j], cur[j-1] + 1) unrolls to
+    j + cummin(t[k] - k), so each step is a handful of array operations.
+    Padding never matters: cell (i, j) only reads a[:i] and b[:j].
+    """
+    rows = np.arange(len(a))
+    j = np.arange(b.shape[1] + 1, dtype=np.int32)
+    prev = np.broadcast_to(j, (len(a), len(j))).copy()
+    out = len_b.astype(np.int32).copy()  # empty a: insert all of b
+    cur = np.empty_like(prev)
+    for i in range(1, a.shape[1] + 1):
+        cur[:, 0] = i
+        np.minimum(prev[:, :-1] + (a[:, i - 1:i] != b), prev[:, 1:] + 1, out=cur[:, 1:])
+        cur -= j
+        np.minimum.accumulate(cur, axis=1, out=cur)
+        cur += j
+        done = len_a == i
+        if done.any():
+            out[done] = cur[rows[done], len_b[done]]
+        prev, cur = cur, prev
+    return out
+
+
+def _levenshtein_similarity(strings: Sequence[str], codes_a: np.ndarray, codes_b: np.ndarray) -> np.ndarray:
+    """1 - edit distance / longer length per row (1.0 when both are empty)."""
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+    # the longer string is the pattern, the shorter one is scanned
+    swap = lengths[codes_a] > lengths[codes_b]
+    pattern = np.where(swap, codes_a, codes_b)
+    text = np.where(swap, codes_b, codes_a)
+    len_p, len_t = lengths[pattern], lengths[text]
+    dist = np.zeros(len(codes_a), dtype=np.int64)
+
+    short = np.flatnonzero((len_p <= 64) & (len_p > 0))
+    # rows of similar length share a block, so padding stays small
+    short = short[np.argsort(len_t[short], kind="stable")]
+    step = max(1, _BLOCK_CELLS // 64)
+    for start in range(0, len(short), step):
+        idx = short[start:start + step]
+        dist[idx] = _myers_block(
+            _code_matrix([strings[i] for i in text[idx]], max(1, int(len_t[idx].max()))), len_t[idx],
+            _code_matrix([strings[i] for i in pattern[idx]]), len_p[idx],
+        )
+
+    long = np.flatnonzero(len_p > 64)
+    long = long[np.argsort(len_p[long], kind="stable")]
+    start = 0
+    while start < len(long):
+        width = int(len_p[long[min(len(long), start + 1024) - 1]]) + 1
+        stop = min(len(long), start + max(1024, _BLOCK_CELLS // width))
+        idx = long[start:stop]
+        dist[idx] = _levenshtein_block(
+            _code_matrix([strings[i] for i in text[idx]]), len_t[idx],
+            _code_matrix([strings[i] for i in pattern[idx]]), len_p[idx],
+        )
+        start = stop
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(len_p == 0, 1.0, 1.0 - dist / len_p)
+
+
+class FuzzyMatch(BaseJudge):
+    """
+    Judge that scores partial matches between model and true answers (for with_true_answer tasks).
+
+    - f1: SQuAD-style token F1 (articles dropped)
+    - levenshtein: 1 - edit distance / longer length
+    - ngram: Dice overlap of character n-grams
+    - All on the Contains normalization, computed column-at-a-time with numpy
+    - Writes all three (fuzzy_f1, fuzzy_levenshtein, fuzzy_ngram) and the chosen
+      `metric` as `score` for ScoreEvaluator; with `threshold`, also is_correct
+    - Rows without a true answer get NaN (counted as invalid by ScoreEvaluator)
+    """
+
+    output_column = "score"
+    METRICS = ("f1", "levenshtein", "ngram")
+
+    def __init__(
+        self,
+        metric: str = "f1",
+        *,
+        ngram: int = 3,
+        threshold: Optional[float] = None,
+        max_chars: int = 256,
+    ) -> None:
+        """
+        Args:
+            metric: Which score goes to the `score` column ("f1", "levenshtein", "ngram").
+            ngram: Character n-gram size (1-3).
+            threshold: Optional cut-off; score >= threshold writes is_correct = 1.
+            max_chars: Answers are compared on their first max_chars normalized
+                characters (edit distance is quadratic in length).
+        """
+        super().__init__()
+        if metric not in self.METRICS:
+            raise ValueError(f"metric must be one of {self.METRICS}")
+        if not 1 <= ngram <= 3:
+            raise ValueError("ngram must be 1, 2 or 3")
+        if threshold is not None and not 0.0 <= threshold <= 1.0:
+            raise ValueError("threshold must be in [0, 1]")
+        if max_chars < 1:
+            raise ValueError("max_chars must be >= 1")
+        self.metric = metric
+        self.ngram = ngram
+        self.threshold = threshold
+        self.max_chars = max_chars
+
+    def identity(self) -> dict[str, Any]:
+        return {
+            **super().identity(),
+            "metric": self.metric,
+            "ngram": self.ngram,
+            "threshold": self.threshold,
+            "max_chars": self.max_chars,
+        }
+
+    def scores(self, model_answers: pd.Series, true_answers: pd.Series) -> pd.DataFrame:
+        """fuzzy_f1 / fuzzy_levenshtein / fuzzy_ngram per row (NaN where true_answer is missing)."""
+        pred = _normalize_column(model_answers)
+        truth = _normalize_column(true_answers)
+        # a missing model answer is an empty answer; a missing reference cannot be scored
+        missing = pd.isna(truth) | (truth == "")
+        n = len(pred)
+
+        # every kernel runs once per distinct string and once per distinct pair
+        both = np.concatenate([pred, truth])
+        codes, strings = pd.factorize(np.where(pd.isna(both), "", both))
+        strings = [s[: self.max_chars] for s in strings]
+        pairs, inverse = np.unique(codes[:n].astype(np.int64) * len(strings) + codes[n:], return_inverse=True)
+        codes_a, codes_b = pairs // len(strings), pairs % len(strings)
+
+        out = pd.DataFrame(index=model_answers.index)
+        with span("judge.fuzzy.f1", rows=n, pairs=len(pairs)):
+            out["fuzzy_f1"] = _token_bags(strings).dice(codes_a, codes_b)[inverse]
+        with span("judge.fuzzy.levenshtein", rows=n, pairs=len(pairs)):
+            out["fuzzy_levenshtein"] = _levenshtein_similarity(strings, codes_a, codes_b)[inverse]
+        with span("judge.fuzzy.ngram", rows=n, pairs=len(pairs)):
+            out["fuzzy_ngram"] = _ngram_bags(strings, self.ngram).dice(codes_a, codes_b)[inverse]
+        out.loc[missing, :] = np.nan
+        return out.round(4)
+
+    def check_single_answer(self, model_answer: str, true_answer: str) -> float:
+        """Return the chosen fuzzy score in [0, 1] for one answer."""
+        if not true_answer:
+            raise EvaluationError("true_answer cannot be empty for FuzzyMatch judge.")
+        row = self.scores(pd.Series([model_answer], dtype=object), pd.Series([true_answer], dtype=object))
+        return float(row[f"fuzzy_{self.metric}"].iloc[0])
+
+    def check_answers(
+        self,
+        meta: dict[str, Any],
+        df: pd.DataFrame,
+        output_csv_path: str,
+        **kwargs: Any,
+    ) -> tuple[dict[str, Any], pd.DataFrame]:
+        """
+        Score every row with token F1, edit similarity and n-gram overlap.
+        """
+        required_cols = ["model_answer", "true_answer"]
+        validate_required_columns(df, required_cols)
+
+        with span("judge.check", judge="FuzzyMatch", rows=len(df)):
+            scores = self.scores(df["model_answer"], df["true_answer"])
+            for col in scores.columns:
+                df[col] = scores[col]
+            df["score"] = scores[f"fuzzy_{self.metric}"]
+            if self.threshold is not None:
+                df["is_correct"] = (df["score"] >= self.threshold).astype(float).mask(df["score"].isna())
+
+        invalid = int(df["score"].isna().sum())
+        meta["judge"] = {
+            "type": "FuzzyMatch",
+            "judge_model": None,
+            "model_params": None,
+            "eval_prompt": None,
+            "metric": self.metric,
+            "ngram": self.ngram,
+            "threshold": self.threshold,
+            "invalid_count": invalid,
+        }
+
+        with span("judge.write_csv", rows=len(df)):
+            df.to_csv(output_csv_path, index=False)
+        logger.info("✅ Fuzzy match complete (%d invalid). Results saved to %s", invalid, output_csv_path)
+        return meta, df
@@ -0,0 +1,287 @@
+# llm_base.py
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, TypeVar
+import logging
+import pandas as pd
+
+from .base import BaseJudge
+from utils import iter_rows, usage_delta, usage_snapshot, validate_required_columns
+from errors import EvaluationError, ModelError
+from hedging import HedgePolicy, Hedger
+from telemetry import track_request
+from tracing import span
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# phrases endpoints use when they reject response_format / json_schema itself
+_UNSUPPORTED_MARKERS = ("response_format", "json_schema", "structured output", "not support", "unsupported")
+
+
+def _rejects_structured_output(exc: BaseException) -> bool:
+    """
+    True if the error (or one it was raised from) says the endpoint does not
+    accept response_format: a 400/422 naming the parameter or saying it is
+    unsupported. Timeouts, rate limits and server errors are not.
+    """
+    seen: set[int] = set()
+    err: BaseException | None = exc
+    while err is not None and id(err) not in seen:
+        seen.add(id(err))
+        status = getattr(err, "status_code", None)
+        text = str(err).lower()
+        if status in (None, 400, 422) and any(m in text for m in _UNSUPPORTED_MARKERS):
+            return True
+        err = err.__cause__ or err.__context__
+    return False
+
+
+class LLMJudge(BaseJudge, ABC):
+    """
+    Shared machinery for LLM-as-a-Judge variants.
+
+    - Requests structured output (response_format JSON schema) when the
+      judge model advertises `supports_structured_output`
+    - Parses responses with a tolerant fast path (see judges.parsing)
+    - Re-judges only the unparsable rows, up to `max_retries` extra passes
+    - Invalid / unparsable after retries → NaN
+    - Optional per-call `timeout` and hedging of slow calls (see hedging)
+
+    Subclasses define the output column, format instructions, JSON schema
+    and how a raw response becomes a value.
+    """
+
+    judge_type: str = "LLM judge"
+    output_column: str = ""
+    result_key: str = ""
+    format_spec: str = ""
+    json_schema: dict[str, Any] = {}
+
+    def __init__(
+        self,
+        model,
+        eval_prompt: str,
+        *,
+        structured_output: bool = True,
+        max_retries: int = 1,
+        prefix_cache_layout: bool = False,
+        timeout: float | None = None,
+        hedge: HedgePolicy | None = None,
+    ) -> None:
+        super().__init__(model=model)
+        if not eval_prompt or not eval_prompt.strip():
+            raise ValueError("eval_prompt must be a non-empty string")
+        if max_retries < 0:
+            raise ValueError("max_retries must be >= 0")
+        self.eval_prompt = eval_prompt.strip()
+        self.structured_output = structured_output
+        self.max_retries = max_retries
+        self.prefix_cache_layout = prefix_cache_layout
+        self.timeout = timeout
+        self.hedge = hedge
+        # set for the duration of a judging pass, see hedging()
+        self._hedger: Hedger | None = None
+
+    # ---------- prompt / response ----------
+
+    def _build_user_message(self, question, model_answer, true_answer) -> str:
+        parts = []
+        if question:
+            parts.append(f"Question:\n{question}")
+        if true_answer is not None:
+            parts.append(f"Reference (ground truth):\n{true_answer}")
+        parts.append(f"Model Answer:\n{model_answer}")
+        ctx = "\n\n".join(parts)
+        if self.prefix_cache_layout:
+            # static rubric + format spec first so every row shares a cacheable prefix
+            return f"{self.eval_prompt}\n\n{self.format_spec}\n\n{ctx}"
+        return f"{self.eval_prompt}\n\n{ctx}\n\n{self.format_spec}"
+
+    def _use_structured_output(self) -> bool:
+        return self.structured_output and bool(getattr(self.model, "supports_structured_output", False))
+
+    def _response_format(self) -> dict[str, Any]:
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": f"judge_{self.result_key}", "strict": True, "schema": self.json_schema},
+        }
+
+    @contextmanager
+    def hedging(self) -> Iterator[Hedger]:
+        """
+        A fresh Hedger for one judging pass (check_answers, or an ensemble /
+        cascade running this judge), shut down when the pass ends so its
+        threads and stats do not outlive it.
+        """
+        hedger = Hedger(self.hedge, timeout_s=self.timeout, max_workers=16)
+        previous, self._hedger = self._hedger, hedger
+        try:
+            yield hedger
+        finally:
+            self._hedger = previous
+            hedger.close()
+
+    def _call(self, fn: Callable[[float | None], T]) -> T:
+        """One judge model request under the pass's deadline/hedging (fn takes the timeout)."""
+        if self._hedger is None:
+            return fn(self.timeout)
+        return self._hedger.call(fn)
+
+    def _generate(self, user_msg: str) -> str:
+        if self._use_structured_output():
+            try:
+                response_format = self._response_format()
+                return self._call(
+                    lambda t: self.model.generate(user_msg, timeout=t, response_format=response_format)
+                )
+            except ModelError as e:
+                # only an endpoint that rejects json_schema switches this judge to plain
+                # prompting for good; transient failures (timeouts, 429s) propagate
+                if not _rejects_structured_output(e):
+                    raise
+                if self.structured_output:
+                    logger.warning("Structured output not supported (%s); falling back to plain JSON prompting", e)
+                self.structured_output = False
+        return self._call(lambda t: self.model.generate(user_msg, timeout=t))
+
+    @abstractmethod
+    def _parse_value(self, text: str) -> Any:
+        """Turn a raw judge response into the output value (raise EvaluationError if invalid)."""
+
+    # ---------- judging ----------
+
+    def check_single_answer(
+        self,
+        question: str | None = None,
+        model_answer: str = "",
+        true_answer: str | None = None,
+        prompt: str | None = None,
+    ):
+        if self.model is None:
+            raise EvaluationError(f"Model required for {type(self).__name__}.")
+        rubric = (prompt or self.eval_prompt).strip()
+        if not rubric:
+            raise EvaluationError("Empty eval prompt.")
+
+        user_msg = self._build_user_message(question, model_answer, true_answer).replace(self.eval_prompt, rubric, 1)
+        try:
+            with span("judge.generate"):
+                out = self._generate(user_msg)
+        except Exception as e:
+            raise ModelError(f"LLM call failed: {e}")
+
+        with span("judge.parse"):
+            value = self._parse_value(out)
+        return {self.result_key: value}
+
+    def judge_row(self, question: Any, model_answer: Any, true_answer: Any) -> Any:
+        return self.check_single_answer(
+            question=question, model_answer=model_answer, true_answer=true_answer
+        )[self.result_key]
+
+    def judge_with_retries(self, question: Any, model_answer: Any, true_answer: Any, monitor=None) -> tuple[Any, int]:
+        """
+        judge_row with per-row retries of unparsable responses (up to max_retries).
+
+        Returns (value, retries used); value is NaN if the row could not be judged.
+        Used by judges that dispatch single rows concurrently (ensemble, cascade).
+        """
+        name = type(self).__name__
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0 and monitor is not None:
+                monitor.record_retry()
+            try:
+                with track_request(monitor, row=False):
+                    return self.judge_row(question, model_answer, true_answer), attempt
+            except EvaluationError as e:
+                logger.warning("%s row failed (attempt %d): %s", name, attempt + 1, e)
+            except ModelError as e:
+                logger.warning("%s row failed: %s", name, e)
+                return float("nan"), attempt
+        return float("nan"), self.max_retries
+
+    def identity(self) -> dict[str, Any]:
+        out = super().identity()
+        out["eval_prompt"] = self.eval_prompt
+        out["prefix_cache_layout"] = self.prefix_cache_layout
+        return out
+
+    def _judge_meta(self) -> dict[str, Any]:
+        return {
+            "type": self.judge_type,
+            "judge_model": getattr(self.model, "get_name", lambda: None)(),
+            "model_params": getattr(self.model, "get_params", lambda: {})(),
+            "eval_prompt": self.eval_prompt,
+        }
+
+    def check_answers(
+        self,
+        meta: dict[str, Any],
+        df: pd.DataFrame,
+        output_csv_path: str,
+        **kwargs: Any,
+    ):
+        required_cols = ["model_answer"]
+        validate_required_columns(df, required_cols)
+
+        name = type(self).__name__
+        monitor = kwargs.get("monitor")
+        if monitor is not None:
+            monitor.start_stage(f"judge:{name}", len(df))
+
+        rows = list(iter_rows(df, ("question", "model_answer", "true_answer")))
+        values: list[Any] = [float("nan")] * len(rows)
+        pending = list(range(len(rows)))
+        retried = 0
+        usage_before = usage_snapshot(self.model)
+
+        with span("judge.check", judge=name, rows=len(df)), self.hedging() as hedger:
+            for attempt in range(self.max_retries + 1):
+                if attempt > 0:
+                    if not pending:
+                        break
+                    logger.info("%s: re-judging %d unparsable row(s) (retry %d)", name, len(pending), attempt)
+                    retried += len(pending)
+                    if monitor is not None:
+                        monitor.record_retry(len(pending))
+
+                unparsable = []
+                for i in pending:
+                    question, model_answer, true_answer = rows[i]
+                    try:
+                        with track_request(monitor, row=attempt == 0):
+                            res = self.check_single_answer(
+                                question=question,
+                                model_answer=model_answer,
+                                true_answer=true_answer,
+                                prompt=kwargs.get("eval_prompt_override"),
+                            )
+                        values[i] = res[self.result_key]
+                    except EvaluationError as e:
+                        logger.warning("%s row failed: %s", name, e)
+                        unparsable.append(i)
+                    except ModelError as e:
+                        logger.warning("%s row failed: %s", name, e)
+                pending = unparsable
+
+        df[self.output_column] = values
+        invalid = int(pd.isna(pd.Series(values, dtype="object")).sum())
+
+        meta["judge"] = {
+            **self._judge_meta(),
+            "structured_output": self._use_structured_output(),
+            "retried_count": retried,
+            "invalid_count": invalid,
+            "prefix_cache_layout": self.prefix_cache_layout,
+            "usage": usage_delta(usage_before, usage_snapshot(self.model)),
+            "timeout_s": self.timeout,
+            "hedging": hedger.stats() if self.hedge is not None else None,
+        }
+
+        with span("judge.write_csv", rows=len(df)):
+            df.to_csv(output_csv_path, index=False)
+        logger.info("✅ %s done.", name)
+        return meta, df
@@ -0,0 +1,230 @@
+# mcq_extract.py
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+import logging
+import re
+import pandas as pd
+
+from .base import BaseJudge
+from .contains import _normalize_reference, _normalize_text
+from utils import validate_required_columns
+from errors import EvaluationError
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+LETTERS = "ABCDEFGHIJ"
+
+# Tried in order; the first pattern that matches decides. Bare capital letters
+# are only trusted with a marker or bracket ("A" / "I" are also words).
+_PATTERNS = (
+    # the whole answer is a letter: "B", "b.", "(B)", "**B**"
+    re.compile(r"^\W*([A-Ja-j])\W*$"),
+    # "Answer: B", "the correct option is (C)", "Choice - D", "answer: c" (lower case only at the end)
+    re.compile(r"(?i:answer|option|choice)(?:\s+is)?\s*[:\-]?\s*\W{0,2}(?:([A-J])\b|([a-j])(?=\W*$))"),
+    # "(b)", "[B]", "B)" anywhere
+    re.compile(r"[(\[]([A-Ja-j])[)\]]|(?<!\w)([A-J])\)"),
+    # leading "B. Paris", "B: Paris", "B - Paris"
+    re.compile(r"^\W*([A-J])(?:[.:]|\s+-)(?:\s|$)"),
+)
+
+# "A or C", "B, D", "A/B": several letters and nothing else → ambiguous
+_LETTER_LIST = re.compile(r"^\W*[A-J](?:\W*(?:or|and|,|/)\W*[A-J])+\W*$")
+_BARE_LETTER = re.compile(r"\b[A-J]\b")
+
+
+def _is_options(options: Any) -> bool:
+    """List/tuple/array of option texts (CSV round-trips leave a string repr: ignored)."""
+    return options is not None and not isinstance(options, str) and hasattr(options, "__len__")
+
+
+@lru_cache(maxsize=1 << 16)
+def _letter_candidates(answer: str) -> tuple[str, ...]:
+    """Distinct letters (upper-cased, in order) found by the first matching pattern."""
+    if _LETTER_LIST.match(answer):
+        return tuple(dict.fromkeys(_BARE_LETTER.findall(answer)))
+    for pattern in _PATTERNS:
+        found = []
+        for m in pattern.finditer(answer):
+            letter = next(g for g in m.groups() if g).upper()
+            if letter not in found:
+                found.append(letter)
+        if found:
+            return tuple(found)
+    return ()
+
+
+def _option_echo(answer: str, options: Sequence[Any]) -> list[str]:
+    """Letters whose option text appears in the answer (longest-match wins on overlap)."""
+    text = _normalize_text(answer)
+    hits = []
+    for j, opt in enumerate(options[: len(LETTERS)]):
+        norm = _normalize_reference(str(opt))
+        if norm and norm in text:
+            hits.append((LETTERS[j], norm))
+    # "Paris" vs "Paris, Texas": drop options contained in another matched option
+    return [l for l, norm in hits if not any(norm != other and norm in other for _, other in hits)]
+
+
+class MCQExtract(BaseJudge):
+    """
+    Judge for multiple-choice tasks that extracts the chosen letter from free text.
+
+    - Letter patterns: "B", "(b)", "B)", "Answer: B", "B. <text>"
+    - Falls back to option-text echo when the options column is available
+    - Several distinct letters (e.g. "A or C") → ambiguous, scored 0
+    - Writes is_correct plus mcq_letter and mcq_ambiguous
+    - true_answer may be a letter or the text of the correct option
+    """
+
+    letter_column = "mcq_letter"
+    ambiguous_column = "mcq_ambiguous"
+
+    def extract(self, model_answer: Any, options: Optional[Sequence[Any]] = None) -> tuple[Optional[str], bool]:
+        """Return (letter or None, ambiguous) for one answer."""
+        return self._decide(self._letters(model_answer, options, {}))
+
+    @staticmethod
+    def _letters(model_answer: Any, options: Any, echo_memo: dict) -> Sequence[str]:
+        if not isinstance(model_answer, str):
+            return ()
+        letters = _letter_candidates(model_answer.strip())
+        if not _is_options(options):
+            return letters
+        if letters:
+            # only letters the row actually offers ("E" with 4 options is not an answer)
+            last = LETTERS[min(len(options), len(LETTERS)) - 1] if len(options) else ""
+            return [l for l in letters if l <= last]
+        key = (model_answer, id(options))
+        if key not in echo_memo:
+            echo_memo[key] = _option_echo(model_answer, options)
+        return echo_memo[key]
+
+    @staticmethod
+    def _decide(letters: Sequence[str]) -> tuple[Optional[str], bool]:
+        if len(letters) == 1:
+            return letters[0], False
+        return None, len(letters) > 1
+
+    def _true_letter(self, true_answer: Any, options: Optional[Sequence[Any]]) -> Optional[str]:
+        if true_answer is None or true_answer != true_answer:
+            return None
+        s = str(true_answer).strip()
+        if len(s) == 1 and s.upper() in LETTERS:
+            return s.upper()
+        if _is_options(options):
+            norm = _normalize_reference(s)
+            for j, opt in enumerate(options[: len(LETTERS)]):
+                if _normalize_reference(str(opt)) == norm:
+                    return LETTERS[j]
+        found = _letter_candidates(s)
+        return found[0] if len(found) == 1 else None
+
+    def _true_letters(self, true_answers: pd.Series, options: Optional[pd.Series]) -> list[Optional[str]]:
+        opts = options.to_numpy() if options is not None else [None] * len(true_answers)
+        memo: dict[tuple[Any, int], Optional[str]] = {}
+        out = []
+        for truth, row_opts in zip(true_answers.to_numpy(), opts):
+            if type(truth) is str and len(truth) == 1 and truth.upper() in LETTERS:
+                out.append(truth.upper())
+                continue
+            key = (truth, id(row_opts))
+            if key not in memo:
+                memo[key] = self._true_letter(truth, row_opts)
+            out.append(memo[key])
+        return out
+
+    def check_single_answer(
+        self,
+        model_answer: str,
+        true_answer: str,
+        options: Optional[Sequence[Any]] = None,
+    ) -> int:
+        """Return 1 if the extracted letter matches the true letter, else 0."""
+        truth = self._true_letter(true_answer, options)
+        if truth is None:
+            raise EvaluationError(f"Cannot map true_answer {true_answer!r} to an option letter.")
+        letter, _ = self.extract(model_answer, options)
+        return 1 if letter == truth else 0
+
+    def extract_all(self, model_answers: pd.Series, options: Optional[pd.Series] = None) -> tuple[list, list]:
+        """Column-at-a-time extract(): (letters, ambiguous flags)."""
+        opts = options.to_numpy() if options is not None else [None] * len(model_answers)
+        # option lists are usually shared objects (ResultStore pools them), so
+        # option-text matches are memoized per (answer, option list) for the call
+        echo_memo: dict = {}
+        letters, ambiguous = [], []
+        for answer, row_opts in zip(model_answers.to_numpy(), opts):
+            letter, amb = self._decide(self._letters(answer, row_opts, echo_memo))
+            letters.append(letter)
+            ambiguous.append(amb)
+        return letters, ambiguous
+
+    def verdicts(
+        self,
+        model_answers: pd.Series,
+        true_answers: pd.Series,
+        options: Optional[pd.Series] = None,
+    ) -> pd.Series:
+        """
+        1.0/0.0 per row; NaN when the row is undecided (no or ambiguous letter,
+        or unknown true letter), so a cascade can hand it to an LLM judge.
+        """
+        letters, _ = self.extract_all(model_answers, options)
+        out = [
+            float("nan") if letter is None or truth is None else float(letter == truth)
+            for letter, truth in zip(letters, self._true_letters(true_answers, options))
+        ]
+        return pd.Series(out, index=model_answers.index, dtype=float)
+
+    def sample_verdicts(self, flat: pd.DataFrame) -> pd.Series:
+        return self.verdicts(flat["model_answer"], flat["true_answer"], flat["options"] if "options" in flat.columns else None)
+
+    def vote_keys(self, flat: pd.DataFrame) -> list[Optional[str]]:
+        """Samples vote by their extracted letter (undecided samples abstain)."""
+        letters, _ = self.extract_all(flat["model_answer"], flat["options"] if "options" in flat.columns else None)
+        return letters
+
+    def check_answers(
+        self,
+        meta: dict[str, Any],
+        df: pd.DataFrame,
+        output_csv_path: str,
+        **kwargs: Any,
+    ) -> tuple[dict[str, Any], pd.DataFrame]:
+        required_cols = ["model_answer", "true_answer"]
+        validate_required_columns(df, required_cols)
+
+        with span("judge.check", judge="MCQExtract", rows=len(df)):
+            options = df["options"] if "options" in df.columns else None
+            letters, ambiguous = self.extract_all(df["model_answer"], options)
+            truths = self._true_letters(df["true_answer"], options)
+            if None in truths:
+                bad = df["true_answer"].iloc[truths.index(None)]
+                raise EvaluationError(f"Cannot map true_answer {bad!r} to an option letter.")
+            correct = [1 if letter == truth else 0 for letter, truth in zip(letters, truths)]
+
+        df["is_correct"] = correct
+        df[self.letter_column] = letters
+        df[self.ambiguous_column] = ambiguous
+        with span("judge.score_samples"):
+            samples = self.score_samples(df)
+
+        ambiguous_count = sum(ambiguous)
+        meta["judge"] = {
+            "type": "MCQExtract",
+            "judge_model": None,
+            "model_params": None,
+            "eval_prompt": None,
+            "invalid_count": 0,
+            "ambiguous_count": ambiguous_count,
+            "unextracted_count": sum(1 for l, a in zip(letters, ambiguous) if l is None and not a),
+        }
+        if samples is not None:
+            meta["judge"]["samples"] = samples
+
+        with span("judge.write_csv", rows=len(df)):
+            df.to_csv(output_csv_path, index=False)
+        logger.info("✅ MCQ extraction complete (%d ambiguous). Results saved to %s", ambiguous_count, output_csv_path)
+        return meta, df
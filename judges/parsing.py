@@ -0,0 +1,86 @@
+# parsing.py
+"""
+Tolerant fast-path parsers for LLM judge outputs.
+
+Strict JSON is tried first; if the model wrapped it in code fences, added
+prose or broke the JSON, a targeted regex recovers the verdict/score.
+Anything still unparsable raises EvaluationError.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Optional
+
+from errors import EvaluationError
+
+_FENCE_RE = re.compile(r"^```[a-zA-Z0-9_-]*\s*(.*?)\s*```$", re.DOTALL)
+_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+_PASSED_RE = re.compile(r'"?passed"?\s*[:=]\s*"?(true|false)\b', re.IGNORECASE)
+# the whole reply is the verdict: "True." yes, "not true" / "it is not false" no
+_BARE_BOOL_RE = re.compile(r"[\W_]*(true|false)[\W_]*", re.IGNORECASE)
+_SCORE_RE = re.compile(r'"?score"?\s*[:=]\s*"?(-?\d+(?:\.\d+)?)', re.IGNORECASE)
+_BARE_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+
+
+def strip_code_fences(text: str) -> str:
+    s = text.strip()
+    m = _FENCE_RE.match(s)
+    return m.group(1).strip() if m else s
+
+
+def _load_object(text: str) -> Optional[dict[str, Any]]:
+    """Parse `text` (or the first {...} inside it) as a JSON object, else None."""
+    for candidate in (text, *(_OBJECT_RE.findall(text)[:1])):
+        try:
+            data = json.loads(candidate)
+        except (ValueError, TypeError):
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def parse_passed(text: str) -> bool:
+    """Extract the boolean "passed" verdict from a judge response."""
+    if text is None:
+        raise EvaluationError("Empty judge response")
+    s = strip_code_fences(str(text))
+
+    data = _load_object(s)
+    if data is not None and isinstance(data.get("passed"), bool):
+        return data["passed"]
+
+    m = _PASSED_RE.search(s)
+    if m:
+        return m.group(1).lower() == "true"
+
+    m = _BARE_BOOL_RE.fullmatch(s)
+    if m:
+        return m.group(1).lower() == "true"
+
+    raise EvaluationError(f'Could not parse "passed" from judge response: {s[:100]!r}')
+
+
+def parse_score(text: str) -> float:
+    """Extract the numeric "score" from a judge response."""
+    if text is None:
+        raise EvaluationError("Empty judge response")
+    s = strip_code_fences(str(text))
+
+    data = _load_object(s)
+    if data is not None and "score" in data:
+        try:
+            return float(data["score"])
+        except (TypeError, ValueError):
+            raise EvaluationError('"score" must be numeric')
+
+    m = _SCORE_RE.search(s)
+    if m:
+        return float(m.group(1))
+
+    bare = _BARE_NUMBER_RE.findall(s)
+    if len(bare) == 1:
+        return float(bare[0])
+
+    raise EvaluationError(f'Could not parse "score" from judge response: {s[:100]!r}')
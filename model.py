@@ -2,93 +2,244 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional, Dict, Any
-
-from openai import OpenAI
+import math
+import threading
+from typing import Optional, Dict, Any, Sequence
 
+from backends import Completion, ModelBackend, create_backend
 from errors import ModelError
 
 logger = logging.getLogger(__name__)
 
 
 class Model:
-    """Thin wrapper around an LLM client for text generation."""
+    """Thin wrapper around an inference backend for text generation."""
 
     def __init__(
-        self, 
-        model_name: str, 
-        api_key: str,
+        self,
+        model_name: str,
+        api_key: str | None = None,
         system_prompt: str | None = None,
-        params: Optional[Dict[str, Any]] = None
+        params: Optional[Dict[str, Any]] = None,
+        base_url: str | None = None,
+        *,
+        backend: str | ModelBackend = "openai",
+        backend_options: Optional[Dict[str, Any]] = None,
     ) -> None:
         """
         Args:
             model_name: Model identifier (e.g., "gpt-4o-mini").
-            api_key: API key for the OpenAI client.
+            api_key: API key for the OpenAI-compatible backend.
             default_params: Default parameters for model generation (e.g., temperature, max_tokens).
+            base_url: Optional OpenAI-compatible endpoint (e.g., a local vLLM / llama.cpp server).
+            backend: Registered backend name ("openai", "local", ...) or a ModelBackend instance.
+            backend_options: Extra constructor arguments for a named backend
+                (e.g. {"model_id": "Qwen/Qwen2.5-0.5B-Instruct"} for "local").
         """
         if not model_name or not isinstance(model_name, str):
             raise ValueError("model_name must be a non-empty string")
-        if not api_key or not isinstance(api_key, str):
-            raise ValueError("api_key must be a non-empty string")
 
         self.model_name = model_name
-        self.client = OpenAI(api_key=api_key)
+        self.base_url = base_url
+        if isinstance(backend, ModelBackend):
+            self.backend = backend
+        elif backend == "openai":
+            self.backend = create_backend("openai", api_key=api_key, base_url=base_url, **(backend_options or {}))
+        else:
+            self.backend = create_backend(backend, **(backend_options or {}))
         self.params = params or {}
         self.system_prompt = system_prompt or (
         "You are a knowledgeable and reliable AI assistant.\n"
         "Answer accurately, clearly, and concisely.\n"
         "Avoid unnecessary explanations unless requested."
     )
+        self._usage_lock = threading.Lock()
+        self._usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+    # LLM judges / Runner check these before using the optional features
+    @property
+    def supports_structured_output(self) -> bool:
+        return self.backend.supports_structured_output
+
+    @property
+    def supports_logprobs(self) -> bool:
+        return self.backend.supports_logprobs
 
+    @property
+    def supports_batching(self) -> bool:
+        return self.backend.supports_batching
+
+    @property
+    def supports_n(self) -> bool:
+        return self.backend.supports_n
 
     def get_name(self) -> str:
 
         return self.model_name
-    
+
     def get_params(self) -> Dict[str, Any]:
 
         return dict(self.params)
-    
+
     def get_system_prompt(self) -> str:
         return self.system_prompt
 
+    def get_usage(self) -> Dict[str, int]:
+        """Cumulative token usage reported by the backend (incl. prefix-cache hits)."""
+        with self._usage_lock:
+            return dict(self._usage)
+
+    def _record_usage(self, usage: Optional[Dict[str, int]]) -> None:
+        if usage is None:
+            return
+        with self._usage_lock:
+            self._usage["calls"] += 1
+            self._usage["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            self._usage["completion_tokens"] += usage.get("completion_tokens", 0)
+            self._usage["cached_tokens"] += usage.get("cached_tokens", 0)
+
+    def _messages(self, prompt: str) -> list[Dict[str, str]]:
+        if not prompt or not isinstance(prompt, str):
+            raise ValueError("prompt must be a non-empty string")
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt},
+        ]
+
+    @staticmethod
+    def _samples(completions: Sequence[Completion], n: int) -> list[str]:
+        texts = [t for c in completions for t in c.texts]
+        if len(texts) != n:
+            raise ModelError(f"Expected {n} choices, got {len(texts)}")
+        # an empty sample is a wrong sample; only a fully empty response is an error
+        if not any(texts):
+            raise ModelError("Empty or invalid content in model response")
+        return texts
+
+    def _complete_n(self, messages: list[Dict[str, str]], n: int, timeout: Optional[float], params: Dict[str, Any]) -> list[Completion]:
+        if self.supports_n:
+            completions = [self.backend.complete(self.model_name, messages, timeout=timeout, n=n, **params)]
+        else:
+            completions = [self.backend.complete(self.model_name, messages, timeout=timeout, **params) for _ in range(n)]
+        for completion in completions:
+            self._record_usage(completion.usage)
+        return completions
 
     def generate(
         self,
         prompt: str,
         *,
         timeout: Optional[float] = None,
+        n: Optional[int] = None,
         **model_params
-    ) -> str:
+    ) -> str | list[str]:
         """
         Generate a completion for the given prompt.
 
         Args:
             prompt: User prompt text.
             timeout: Optional request timeout in seconds.
+            n: Number of samples. When given, returns a list of n completions
+                from a single request (backends without `n` support make n calls).
             **model_params: Extra model parameters (temperature, max_tokens, etc.)
         """
-        if not prompt or not isinstance(prompt, str):
-            raise ValueError("prompt must be a non-empty string")
-
         params = {**self.params, **model_params}
+        if n is not None:
+            if n < 1:
+                raise ValueError("n must be >= 1")
+            return self._samples(self._complete_n(self._messages(prompt), n, timeout, params), n)
+
+        completion = self.backend.complete(self.model_name, self._messages(prompt), timeout=timeout, **params)
+        self._record_usage(completion.usage)
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": self.system_prompt}, 
-                    {"role": "user", "content": prompt},
-                ],
-                timeout=timeout,
-                **params
-            )
-        except Exception as exc:
-            raise ModelError(f"Model request failed: {exc}") from exc
-
-        text = response.choices[0].message.content.strip()
-        if not text:
+        if not completion.text:
             raise ModelError("Empty or invalid content in model response")
+        return completion.text
+
+    def generate_batch(
+        self,
+        prompts: Sequence[str],
+        *,
+        timeout: Optional[float] = None,
+        n: Optional[int] = None,
+        **model_params
+    ) -> list[str] | list[list[str]]:
+        """
+        Generate completions for many prompts in one backend call.
+
+        Batching backends run them together (one forward pass, or concurrent
+        requests a server can batch); others fall back to one call per prompt.
+        With `n`, returns n samples per prompt (see `generate`).
+        Raises ModelError if any completion fails or is empty.
+        """
+        params = {**self.params, **model_params}
+        batch = [self._messages(p) for p in prompts]
+        if n is not None:
+            if n < 1:
+                raise ValueError("n must be >= 1")
+            if not self.supports_n:
+                return [self._samples(self._complete_n(messages, n, timeout, params), n) for messages in batch]
+            completions = self.backend.complete_batch(self.model_name, batch, timeout=timeout, n=n, **params)
+            for completion in completions:
+                self._record_usage(completion.usage)
+            return [self._samples([c], n) for c in completions]
+
+        completions = self.backend.complete_batch(self.model_name, batch, timeout=timeout, **params)
+
+        texts = []
+        for completion in completions:
+            self._record_usage(completion.usage)
+            if not completion.text:
+                raise ModelError("Empty or invalid content in model response")
+            texts.append(completion.text)
+        return texts
+
+    def score_choices(
+        self,
+        prompt: str,
+        choices: Sequence[str],
+        *,
+        timeout: Optional[float] = None,
+        top_logprobs: int = 20,
+        **model_params
+    ) -> Dict[str, float]:
+        """
+        Score answer options with a single one-token completion.
+
+        Requests max_tokens=1 with the top logprobs of that token and returns
+        the probability of each choice (e.g. option letters), renormalized over
+        `choices`. Token variants such as " B" or "b" count towards "B".
 
-        return text
\ No newline at end of file
+        Args:
+            prompt: User prompt text (should ask for the option letter only).
+            choices: Candidate first tokens, e.g. ("A", "B", "C", "D").
+            timeout: Optional request timeout in seconds.
+            top_logprobs: How many alternatives the API should return (max 20).
+            **model_params: Extra model parameters.
+
+        Raises:
+            ModelError: If the request fails or no choice appears among the top tokens.
+        """
+        if not choices:
+            raise ValueError("choices must be non-empty")
+        if not self.supports_logprobs:
+            raise ModelError(f"Backend {self.backend.name!r} does not support logprobs")
+
+        params = {**self.params, **model_params, "max_tokens": 1, "logprobs": True, "top_logprobs": top_logprobs}
+        completion = self.backend.complete(self.model_name, self._messages(prompt), timeout=timeout, **params)
+        self._record_usage(completion.usage)
+
+        if not completion.top_logprobs:
+            raise ModelError("Model response has no logprobs (endpoint may not support them)")
+
+        wanted = {str(c).strip().upper(): str(c) for c in choices}
+        mass = {c: 0.0 for c in choices}
+        for token, logprob in completion.top_logprobs:
+            key = token.strip().strip("().:*").upper()
+            if key in wanted:
+                mass[wanted[key]] += math.exp(logprob)
+
+        total = sum(mass.values())
+        if total <= 0.0:
+            raise ModelError(f"None of the choices {list(choices)} among the top {top_logprobs} tokens")
+        return {c: m / total for c, m in mass.items()}
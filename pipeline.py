@@ -0,0 +1,399 @@
+# pipeline.py
+"""
+Benchmark pipeline: inference (Runner) → judge → evaluator, plus re-judging
+of existing runs. Kept free of model/backend imports so that string-judge
+workflows over saved runs do not pay for them.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional
+
+import pandas as pd
+
+from runner import Runner
+from task import Task
+from telemetry import RunMonitor
+from tracing import span, tracing
+from utils import load_dataset, resolve_run_dir, run_results_path
+
+if TYPE_CHECKING:
+    from evaluators import BaseEvaluator
+    from hedging import HedgePolicy
+    from preflight import PreflightPolicy
+    from judges import BaseJudge
+    from model import Model
+
+logger = logging.getLogger(__name__)
+
+
+def run_benchmark_pipeline(
+    *,
+    task: Task,
+    model_under_test: Model,
+    judge: BaseJudge,
+    evaluator: BaseEvaluator,
+    measure_k: int = 25,
+    concurrency: int = 1,
+    dedupe: bool = True,
+    prefix_cache_layout: bool = False,
+    mcq_scoring: str = "generate",
+    batch_size: int | None = None,
+    n_samples: int | None = None,
+    preflight: PreflightPolicy | None = None,
+    base_run: str | Path | None = None,
+    timeout: float | None = None,
+    hedge: HedgePolicy | None = None,
+    trace: bool = False,
+    status_interval_s: float | None = None,
+    metrics_port: int | None = None,
+) -> Dict[str, Any]:
+    """
+    Core pipeline used by the backend.
+
+    Steps:
+      1. Run the model on the given Task via Runner.
+      2. Apply a Judge to compute is_correct/score columns.
+      3. Apply an Evaluator to summarize results to JSON.
+      4. Return metadata and output file paths for the frontend/backend.
+
+    Args:
+        task:
+            Task specification (type, dataset_path, sample_size, prompts...).
+        model_under_test:
+            Model instance to be evaluated.
+        judge:
+            (Equals, Contains, JSONEquals,
+            PromptBasedScore, PromptBasedBoolean).
+        evaluator:
+            evaluator (e.g., ScoreEvaluator).
+        measure_k:
+            How many rows to use for latency measurement.
+        concurrency:
+            Maximum number of model calls in flight during inference.
+        dedupe:
+            Share one model call between identical prompts in the run
+            (disable for stochastic sampling).
+        prefix_cache_layout:
+            Put the task instruction before the question so inference
+            requests share a cacheable prompt prefix (LLM judges take
+            the same option in their constructor).
+        mcq_scoring:
+            "generate" or "logprobs" (MULTIPLE_CHOICE only): score the option
+            letters from one max_tokens=1 call per question and keep the
+            per-option probabilities (see CalibrationEvaluator).
+        batch_size:
+            Send inference in model.generate_batch calls of this many
+            prompts when the model's backend supports batching
+            (e.g. backend="local").
+        n_samples:
+            Answers per question from one request (model.generate(n=k)).
+            String judges score every sample; use PassAtKEvaluator for
+            pass@k and majority-vote accuracy.
+        preflight:
+            Optional PreflightPolicy: local token counts and context-limit
+            handling before any call, plus a pilot-based token / cost / time
+            estimate and budget (meta["preflight"] holds estimate and actuals).
+        base_run:
+            Earlier run (dir or run_id) to update incrementally: only rows
+            that are new or changed since then go through the model and,
+            if the judge is unchanged (same fingerprint), through the judge.
+            See Runner.run.
+        timeout:
+            Deadline in seconds for each inference call.
+        hedge:
+            Optional HedgePolicy for inference calls: duplicate calls slower
+            than the policy threshold and keep the first answer (LLM judges
+            take the same options in their constructor).
+        trace:
+            Record per-stage timing spans. The breakdown is stored in
+            meta["timings"] and a Chrome trace is written to the run dir.
+        status_interval_s:
+            If set, rewrite a live status.json (rows done, in-flight,
+            RPS, p50/p99 latency, errors, ETA) in the run dir this often.
+        metrics_port:
+            If set, serve the same progress as Prometheus text on
+            http://127.0.0.1:{port}/metrics while the pipeline runs.
+
+    Returns:
+        dict with:
+            - "meta": final metadata dict
+            - "results_csv": path to raw run CSV
+            - "judged_csv": path to judged CSV
+            - "eval_json": path to evaluation JSON
+            - "trace_json": path to Chrome trace (only when trace=True)
+    """
+    monitor = None
+    if status_interval_s is not None or metrics_port is not None:
+        monitor = RunMonitor(status_interval_s=status_interval_s, metrics_port=metrics_port)
+    runner = Runner(
+        model_under_test,
+        concurrency=concurrency,
+        dedupe=dedupe,
+        monitor=monitor,
+        prefix_cache_layout=prefix_cache_layout,
+        mcq_scoring=mcq_scoring,
+        batch_size=batch_size,
+        n_samples=n_samples,
+        preflight=preflight,
+        timeout=timeout,
+        hedge=hedge,
+    )
+
+    with tracing() if trace else nullcontext() as tracer, monitor or nullcontext():
+        # 1) Run base model and get answers
+        with span("pipeline.run"):
+            meta, df = runner.run(task=task, measure_k=measure_k, base_run=base_run)
+        run_id = meta["run_id"]
+
+        # Runner already saved run_{run_id}.csv; path is:
+        results_csv = runner.get_path(f"run_{run_id}.csv")
+
+        judged_csv = None
+        eval_json = None
+
+        judged_csv = runner.get_path(f"judge_{run_id}.csv")
+        with span("pipeline.judge", judge=type(judge).__name__):
+            judged = None
+            if meta.get("incremental"):
+                judged = _judge_incremental(judge, meta, df, judged_csv, monitor)
+            if judged is None:
+                judged = _judge_all(judge, meta, df, judged_csv, monitor)
+            meta, df = judged
+
+        eval_json = runner.get_path(f"eval_{run_id}.json")
+        # timings so far (run + judge) go into the eval JSON; the final
+        # breakdown including the evaluator is attached to the returned meta
+        if tracer is not None:
+            meta["timings"] = tracer.summary()
+        with span("pipeline.evaluate", evaluator=type(evaluator).__name__):
+            evaluator.compute(meta, df, str(eval_json))
+
+    out = {
+        "meta": meta,
+        "results_csv": str(results_csv),
+        "judged_csv": str(judged_csv) ,
+        "eval_json": str(eval_json) ,
+    }
+    if tracer is not None:
+        meta["timings"] = tracer.summary()
+        out["trace_json"] = str(tracer.export_chrome_trace(runner.get_path(f"trace_{run_id}.json")))
+    return out
+
+
+
+def _judge_all(
+    judge: BaseJudge,
+    meta: Dict[str, Any],
+    df: pd.DataFrame,
+    judged_csv: Path,
+    monitor: RunMonitor | None,
+) -> tuple[Dict[str, Any], pd.DataFrame]:
+    """judge.check_answers over every row, recording the judge fingerprint."""
+    fingerprint = judge.fingerprint()
+    meta, df = judge.check_answers(meta, df, str(judged_csv), monitor=monitor)
+    meta["judge"]["fingerprint"] = fingerprint
+    return meta, df
+
+
+def _judge_incremental(
+    judge: BaseJudge,
+    meta: Dict[str, Any],
+    df: pd.DataFrame,
+    judged_csv: Path,
+    monitor: RunMonitor | None,
+) -> Optional[tuple[Dict[str, Any], pd.DataFrame]]:
+    """
+    Judge only the rows an incremental run generated; copy the base run's
+    verdicts for the reused rows. Returns None when the base run's judging
+    is not reusable (other judge, or artifacts missing), so the caller
+    judges every row.
+    """
+    base_id = meta["incremental"]["base_run_id"]
+    base_dir = resolve_run_dir(base_id)
+    judged_path = base_dir / f"judge_{base_id}.csv"
+    _, previous_judge = _load_run_meta(base_dir, base_id)
+    fingerprint = judge.fingerprint()
+    if not judged_path.exists() or (previous_judge or {}).get("fingerprint") != fingerprint:
+        logger.info("Judge differs from base run %s; judging all rows", base_id)
+        return None
+
+    base_judged = load_dataset(judged_path)
+    if "row_hash" not in base_judged.columns:
+        return None
+    judge_cols = [c for c in base_judged.columns if c not in df.columns]
+    base_rows = {
+        (str(q), h): j
+        for j, (q, h) in enumerate(zip(base_judged["question_id"].to_numpy(), base_judged["row_hash"].to_numpy()))
+    }
+
+    reused = (df["source_run_id"] != meta["run_id"]).to_numpy()
+    keys = zip(df["question_id"].to_numpy(), df["row_hash"].to_numpy())
+    base_idx = [base_rows.get((str(q), h)) for (q, h), r in zip(keys, reused) if r]
+    if any(j is None for j in base_idx):
+        logger.warning("Base run %s has no verdict for some reused rows; judging all rows", base_id)
+        return None
+
+    delta = df.loc[~reused].reset_index(drop=True)
+    if len(delta):
+        meta, delta = judge.check_answers(meta, delta, str(judged_csv), monitor=monitor)
+        judge_cols += [c for c in delta.columns if c not in df.columns and c not in judge_cols]
+    else:
+        meta["judge"] = dict(previous_judge)
+
+    for col in judge_cols:
+        values = pd.Series(None, index=df.index, dtype=object)
+        if col in base_judged.columns:
+            values[reused] = base_judged[col].to_numpy()[base_idx]
+        if col in delta.columns:
+            values[~reused] = delta[col].to_numpy()
+        df[col] = values.infer_objects()
+
+    meta["judge"]["fingerprint"] = fingerprint
+    meta["judge"]["incremental"] = {
+        "base_run_id": base_id,
+        "judged_rows": int(len(delta)),
+        "reused_rows": int(reused.sum()),
+    }
+    with span("judge.write_csv", rows=len(df)):
+        df.to_csv(judged_csv, index=False)
+    logger.info("Judged %d new/changed rows, reused %d verdicts from %s", len(delta), int(reused.sum()), base_id)
+    return meta, df
+
+
+def _load_run_meta(run_dir: Path, run_id: str) -> tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Run meta (meta_{run_id}.json, else the metadata embedded in the original
+    eval JSON) and the original judge meta, if the run was judged.
+    """
+    eval_meta = None
+    eval_path = run_dir / f"eval_{run_id}.json"
+    if eval_path.exists():
+        with open(eval_path, encoding="utf-8") as f:
+            eval_meta = json.load(f).get("metadata") or {}
+    previous_judge = (eval_meta or {}).get("judge")
+
+    meta_path = run_dir / f"meta_{run_id}.json"
+    if meta_path.exists():
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f), previous_judge
+    if eval_meta is not None:
+        logger.warning("No meta_%s.json; using metadata from %s", run_id, eval_path.name)
+        return dict(eval_meta), previous_judge
+    logger.warning("No saved metadata for run %s; continuing with run_id only", run_id)
+    return {"run_id": run_id}, None
+
+
+def _next_version(run_dir: Path, run_id: str) -> str:
+    """Next free artifact version: the original judge/eval files count as v1."""
+    pattern = re.compile(rf"^(?:judge|eval)_{re.escape(run_id)}_v(\d+)\.")
+    taken = [int(m.group(1)) for f in run_dir.iterdir() if (m := pattern.match(f.name))]
+    return f"v{max(taken, default=1) + 1}"
+
+
+def rejudge_run(
+    run: str | Path,
+    *,
+    judge: BaseJudge,
+    evaluator: BaseEvaluator,
+    version: Optional[str] = None,
+    monitor: RunMonitor | None = None,
+) -> Dict[str, Any]:
+    """
+    Apply a (new) judge and evaluator to an existing run without re-running inference.
+
+    Loads outputs/runs/{run_id}/run_{run_id}.csv (or .parquet) plus its saved meta
+    and writes judge_{run_id}_{version}.csv / eval_{run_id}_{version}.json next to
+    the originals, which are left untouched.
+
+    Args:
+        run:
+            Run directory or run_id.
+        judge:
+            Judge to apply (same choices as run_benchmark_pipeline).
+        evaluator:
+            Evaluator to summarize the judged results.
+        version:
+            Artifact version tag; defaults to the next free "vN" (original = v1).
+        monitor:
+            Optional RunMonitor passed to the judge.
+
+    Returns:
+        dict with "meta", "results_csv", "judged_csv", "eval_json" and "version".
+    """
+    run_dir = resolve_run_dir(run)
+    run_id = run_dir.name
+    results_path = run_results_path(run_dir)
+
+    with span("rejudge.load", run_id=run_id):
+        df = load_dataset(results_path)
+        meta, previous_judge = _load_run_meta(run_dir, run_id)
+
+    version = version or _next_version(run_dir, run_id)
+    if not re.fullmatch(r"[\w.-]+", version):
+        raise ValueError(f"Invalid version tag: {version!r}")
+    judged_csv = run_dir / f"judge_{run_id}_{version}.csv"
+    eval_json = run_dir / f"eval_{run_id}_{version}.json"
+    if judged_csv.exists() or eval_json.exists():
+        raise FileExistsError(f"Artifacts for version {version!r} already exist in {run_dir}")
+
+    meta.pop("judge", None)
+    meta.pop("timings", None)
+    meta["rejudge"] = {
+        "version": version,
+        "source": results_path.name,
+        "previous_judge": previous_judge,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+    }
+
+    with span("pipeline.judge", judge=type(judge).__name__, run_id=run_id):
+        meta, df = _judge_all(judge, meta, df, judged_csv, monitor)
+    with span("pipeline.evaluate", evaluator=type(evaluator).__name__, run_id=run_id):
+        evaluator.compute(meta, df, str(eval_json))
+
+    logger.info("Re-judged run %s as %s", run_id, version)
+    return {
+        "meta": meta,
+        "results_csv": str(results_path),
+        "judged_csv": str(judged_csv),
+        "eval_json": str(eval_json),
+        "version": version,
+    }
+
+
+def rejudge_runs(
+    runs: Iterable[str | Path],
+    *,
+    judge: BaseJudge,
+    evaluator: BaseEvaluator,
+    version: Optional[str] = None,
+    max_workers: int = 4,
+) -> list[Dict[str, Any]]:
+    """
+    rejudge_run over many run dirs in parallel (one thread per run, up to max_workers).
+    Each run judges with its own judge.copy(), so per-run judge state is
+    not shared between threads.
+
+    A failing run does not stop the others: its entry is
+    {"run": ..., "error": "..."} instead of the rejudge_run result.
+    Results are returned in input order.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be >= 1")
+    runs = list(dict.fromkeys(str(r) for r in runs))
+
+    def one(run: str) -> Dict[str, Any]:
+        try:
+            return rejudge_run(run, judge=judge.copy(), evaluator=evaluator, version=version)
+        except Exception as e:
+            logger.error("Re-judging %s failed: %s", run, e)
+            return {"run": run, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(one, runs))
@@ -0,0 +1,217 @@
+# preflight.py
+"""
+Pre-flight token budgeting and pilot-based cost / time estimates.
+
+With `Runner(preflight=PreflightPolicy(...))`, every built prompt is
+tokenized locally before any API call (tiktoken when installed, else
+about four characters per token). Rows whose prompt plus the reserved
+output would not fit `context_limit` are skipped ("flag"), have their
+question truncated ("truncate") or fail the run up front ("error").
+
+With `pilot_size` a small random subset of the requests runs first.
+Its measured usage and latency are extrapolated to the whole run:
+tokens, cost (with `price_per_mtok`) and wall-clock time at the run's
+concurrency. The run stops before the remaining calls if the estimate
+exceeds `max_tokens` or `max_cost_usd`. The pilot's answers are kept,
+so the pilot costs no extra calls; when the run stops, they and the
+estimate travel on the BudgetExceededError (`pilot_answers`, `report`).
+Estimate and actuals are recorded side by side in meta["preflight"].
+
+    policy = PreflightPolicy(context_limit=128_000, pilot_size=20,
+                             price_per_mtok=(0.15, 0.60), max_cost_usd=5.0)
+"""
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_ACTIONS = ("flag", "truncate", "error")
+# chat framing around the system and user message (~4 per message + 3 for the reply)
+MESSAGE_OVERHEAD_TOKENS = 11
+CHARS_PER_TOKEN = 4
+DEFAULT_RESERVED_OUTPUT = 256
+
+
+class TokenCounter:
+    """
+    Local tokenizer for pre-flight counts.
+
+    Uses tiktoken (the model's encoding, else `o200k_base`) when the optional
+    package is installed, otherwise a characters/4 approximation; the pilot
+    calibrates either against the token counts the API reports.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, encoding: Optional[str] = None) -> None:
+        try:
+            import tiktoken
+        except ImportError:
+            self._enc = None
+            self.name = f"heuristic:{CHARS_PER_TOKEN}chars"
+            return
+        if encoding is not None:
+            enc = tiktoken.get_encoding(encoding)
+        else:
+            try:
+                enc = tiktoken.encoding_for_model(model_name or "")
+            except KeyError:
+                enc = tiktoken.get_encoding("o200k_base")
+        self._enc = enc
+        self.name = f"tiktoken:{enc.name}"
+
+    def count(self, text: Any) -> int:
+        if not text:
+            return 0
+        text = str(text)
+        if self._enc is None:
+            return math.ceil(len(text) / CHARS_PER_TOKEN)
+        return len(self._enc.encode(text, disallowed_special=()))
+
+    def truncate(self, text: Any, max_tokens: int) -> str:
+        """`text` cut to at most `max_tokens` tokens."""
+        text = str(text)
+        if max_tokens <= 0:
+            return ""
+        if self._enc is None:
+            return text[: max_tokens * CHARS_PER_TOKEN]
+        ids = self._enc.encode(text, disallowed_special=())
+        return text if len(ids) <= max_tokens else self._enc.decode(ids[:max_tokens])
+
+
+class PreflightPolicy:
+    """
+    Pre-flight settings for a run.
+
+    Args:
+        context_limit: Model context window in tokens (None = no limit check).
+        reserve_output_tokens: Tokens kept free for the answer. Default: the
+            model's max_tokens / max_completion_tokens param, else 256.
+        on_overflow: "flag" (skip the row, answer left empty), "truncate"
+            (shorten the question to fit) or "error" (fail before any call).
+        pilot_size: Requests to run first for the estimate (0 = local counts only).
+        price_per_mtok: (input, output) USD per million tokens, for cost figures.
+        max_tokens: Abort if the estimated total tokens exceed this.
+        max_cost_usd: Abort if the estimated cost exceeds this.
+        encoding: tiktoken encoding name overriding the model's.
+    """
+
+    def __init__(
+        self,
+        *,
+        context_limit: Optional[int] = None,
+        reserve_output_tokens: Optional[int] = None,
+        on_overflow: str = "flag",
+        pilot_size: int = 0,
+        price_per_mtok: Optional[tuple[float, float]] = None,
+        max_tokens: Optional[int] = None,
+        max_cost_usd: Optional[float] = None,
+        encoding: Optional[str] = None,
+    ) -> None:
+        if on_overflow not in OVERFLOW_ACTIONS:
+            raise ValueError(f"on_overflow must be one of {OVERFLOW_ACTIONS}")
+        if context_limit is not None and context_limit < 1:
+            raise ValueError("context_limit must be a positive integer or None")
+        if pilot_size < 0:
+            raise ValueError("pilot_size must be >= 0")
+        if price_per_mtok is not None and len(price_per_mtok) != 2:
+            raise ValueError("price_per_mtok must be (input, output) USD per million tokens")
+        if max_cost_usd is not None and price_per_mtok is None:
+            raise ValueError("max_cost_usd needs price_per_mtok")
+        self.context_limit = context_limit
+        self.reserve_output_tokens = reserve_output_tokens
+        self.on_overflow = on_overflow
+        self.pilot_size = pilot_size
+        self.price_per_mtok = tuple(price_per_mtok) if price_per_mtok is not None else None
+        self.max_tokens = max_tokens
+        self.max_cost_usd = max_cost_usd
+        self.encoding = encoding
+
+    def reserved_output(self, model_params: Mapping[str, Any]) -> int:
+        if self.reserve_output_tokens is not None:
+            return self.reserve_output_tokens
+        value = model_params.get("max_tokens") or model_params.get("max_completion_tokens")
+        return int(value) if value else DEFAULT_RESERVED_OUTPUT
+
+    def cost(self, prompt_tokens: Optional[float], completion_tokens: Optional[float]) -> Optional[float]:
+        """USD for the given token counts (None without prices or prompt tokens)."""
+        if self.price_per_mtok is None or prompt_tokens is None:
+            return None
+        price_in, price_out = self.price_per_mtok
+        return round((prompt_tokens * price_in + (completion_tokens or 0) * price_out) / 1e6, 4)
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "context_limit": self.context_limit,
+            "on_overflow": self.on_overflow,
+            "pilot_size": self.pilot_size,
+            "price_per_mtok": list(self.price_per_mtok) if self.price_per_mtok else None,
+            "max_tokens": self.max_tokens,
+            "max_cost_usd": self.max_cost_usd,
+        }
+
+
+def estimate_run(
+    policy: PreflightPolicy,
+    *,
+    calls: int,
+    local_prompt_tokens: int,
+    parallel: int,
+    pilot: Optional[Mapping[str, Any]] = None,
+) -> dict[str, Any]:
+    """
+    Extrapolate a run's totals.
+
+    Args:
+        policy: Prices for the cost figure.
+        calls: Requests the run makes (unique prompts, pilot included).
+        local_prompt_tokens: Locally counted prompt tokens over those calls.
+        parallel: Requests in flight at once (concurrency x batch size).
+        pilot: {"calls", "local_prompt_tokens", "usage", "wall_s"} of the pilot.
+
+    Returns:
+        calls, prompt/completion/total tokens, cost_usd and wall_s. Without a
+        pilot only the local prompt count is known (cost is then a lower bound).
+    """
+    out: dict[str, Any] = {
+        "basis": "local_tokenizer",
+        "calls": calls,
+        "prompt_tokens": local_prompt_tokens,
+        "completion_tokens": None,
+        "total_tokens": None,
+        "cost_usd": policy.cost(local_prompt_tokens, None),
+        "wall_s": None,
+    }
+    if not pilot or not pilot.get("calls"):
+        return out
+
+    out["basis"] = "pilot"
+    per_call = calls / pilot["calls"]
+    usage = pilot.get("usage") or {}
+    if usage.get("prompt_tokens") and pilot["local_prompt_tokens"]:
+        # calibrate the local tokenizer against what the API actually counted
+        ratio = usage["prompt_tokens"] / pilot["local_prompt_tokens"]
+        out["prompt_tokens"] = round(local_prompt_tokens * ratio)
+        out["tokenizer_ratio"] = round(ratio, 4)
+    if "completion_tokens" in usage:
+        out["completion_tokens"] = round(usage["completion_tokens"] * per_call)
+        out["total_tokens"] = out["prompt_tokens"] + out["completion_tokens"]
+    out["cost_usd"] = policy.cost(out["prompt_tokens"], out["completion_tokens"])
+
+    # the pilot ran in waves of `parallel` requests; the run needs more waves
+    pilot_waves = math.ceil(pilot["calls"] / max(1, min(parallel, pilot["calls"])))
+    run_waves = math.ceil(calls / max(1, min(parallel, calls)))
+    out["wall_s"] = round(pilot["wall_s"] / pilot_waves * run_waves, 2)
+    return out
+
+
+def check_budget(policy: PreflightPolicy, estimate: Mapping[str, Any]) -> Optional[str]:
+    """Reason the estimate breaks the policy's budget, or None."""
+    tokens = estimate.get("total_tokens") or estimate.get("prompt_tokens")
+    if policy.max_tokens is not None and tokens is not None and tokens > policy.max_tokens:
+        return f"estimated {tokens} tokens > max_tokens {policy.max_tokens}"
+    cost = estimate.get("cost_usd")
+    if policy.max_cost_usd is not None and cost is not None and cost > policy.max_cost_usd:
+        return f"estimated ${cost:.4f} > max_cost_usd ${policy.max_cost_usd:.4f}"
+    return None
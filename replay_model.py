@@ -0,0 +1,366 @@
+# replay_model.py
+"""
+Offline stand-ins for `Model` used for load testing without an API.
+
+- RecordingModel: wraps a real model and records request/response pairs
+  (with latencies) to a compact gzip JSONL file.
+- ReplayModel: replays a recording with the original, scaled or
+  resampled latency distribution.
+- SyntheticModel: generates deterministic answers with configurable
+  latency and error rates.
+
+All three expose the same interface as `Model` (get_name, get_params,
+get_system_prompt, generate) and are safe to call from multiple threads.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from errors import ConfigurationError, ModelError
+from utils import PathLike, request_key
+
+logger = logging.getLogger(__name__)
+
+RECORDING_FORMAT = "benchmark-replay"
+RECORDING_VERSION = 1
+
+
+def _sleep_with_timeout(latency_s: float, timeout: Optional[float]) -> None:
+    """Sleep for the simulated latency; raise ModelError if it exceeds `timeout`."""
+    if timeout is not None and latency_s > timeout:
+        time.sleep(timeout)
+        raise ModelError(f"Model request timed out after {timeout:.3f}s")
+    if latency_s > 0:
+        time.sleep(latency_s)
+
+
+class RecordingModel:
+    """Wraps a model and appends every generate call to a recording file."""
+
+    def __init__(self, model: Any, path: PathLike) -> None:
+        """
+        Args:
+            model: Model to record (must provide generate/get_name/get_params/get_system_prompt).
+            path: Recording file (gzip JSONL). Appended to if it already exists.
+        """
+        if not hasattr(model, "generate"):
+            raise ValueError("model must provide a .generate(prompt) method")
+        self.model = model
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._fh = gzip.open(self.path, "at", encoding="utf-8")
+        self._write({
+            "format": RECORDING_FORMAT,
+            "version": RECORDING_VERSION,
+            "model_name": model.get_name(),
+            "system_prompt": model.get_system_prompt(),
+            "params": model.get_params(),
+        })
+
+    @property
+    def supports_n(self) -> bool:
+        return bool(getattr(self.model, "supports_n", False))
+
+    def get_name(self) -> str:
+        return self.model.get_name()
+
+    def get_params(self) -> Dict[str, Any]:
+        return self.model.get_params()
+
+    def get_system_prompt(self) -> str:
+        return self.model.get_system_prompt()
+
+    def _write(self, record: dict[str, Any]) -> None:
+        with self._lock:
+            self._fh.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def generate(self, prompt: str, *, timeout: Optional[float] = None, **model_params) -> str:
+        params = {**self.model.get_params(), **model_params}
+        key = request_key(self.get_name(), self.get_system_prompt(), params, prompt)
+        t0 = time.perf_counter()
+        try:
+            text = self.model.generate(prompt, timeout=timeout, **model_params)
+        except Exception as exc:
+            self._write({"key": key, "error": str(exc), "latency_ms": round((time.perf_counter() - t0) * 1000.0, 3)})
+            raise
+        self._write({"key": key, "response": text, "latency_ms": round((time.perf_counter() - t0) * 1000.0, 3)})
+        return text
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._fh.closed:
+                self._fh.close()
+
+    def __enter__(self) -> "RecordingModel":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class ReplayModel:
+    """
+    Replays responses from a recording made by RecordingModel.
+
+    Latency modes:
+        "original":     sleep for the latency recorded for that response
+        "distribution": sleep for a latency sampled from all recorded latencies
+        "none":         return immediately
+    All modes are multiplied by `latency_scale`.
+
+    Requests with `n` (multi-sample) replay the recorded list of samples.
+    """
+
+    LATENCY_MODES = ("original", "distribution", "none")
+    supports_n = True
+
+    def __init__(
+        self,
+        path: PathLike,
+        *,
+        latency_mode: str = "original",
+        latency_scale: float = 1.0,
+        strict: bool = True,
+        fallback_answer: str = "",
+        seed: int = 42,
+    ) -> None:
+        """
+        Args:
+            path: Recording file written by RecordingModel.
+            latency_mode: One of LATENCY_MODES.
+            latency_scale: Multiplier applied to replayed latencies.
+            strict: Raise ModelError for requests missing from the recording;
+                    otherwise return `fallback_answer`.
+            fallback_answer: Answer used for misses when strict=False.
+            seed: Seed for latency resampling.
+        """
+        if latency_mode not in self.LATENCY_MODES:
+            raise ConfigurationError(f"latency_mode must be one of {self.LATENCY_MODES}")
+        if latency_scale < 0:
+            raise ConfigurationError("latency_scale must be >= 0")
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Recording not found: {self.path}")
+
+        self.latency_mode = latency_mode
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.fallback_answer = fallback_answer
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self._header: dict[str, Any] = {}
+        self._records: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        self._cursor: dict[str, int] = defaultdict(int)
+        self._latencies: list[float] = []
+        self._load()
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                if rec.get("format") == RECORDING_FORMAT:
+                    # keep the first header; later ones come from appended sessions
+                    self._header = self._header or rec
+                    continue
+                self._records[rec["key"]].append(rec)
+                self._latencies.append(float(rec.get("latency_ms") or 0.0))
+        if not self._header:
+            raise ConfigurationError(f"Not a replay recording: {self.path}")
+        logger.info(
+            "Loaded replay recording %s (%d responses, %d unique requests)",
+            self.path.name, len(self._latencies), len(self._records),
+        )
+
+    def get_name(self) -> str:
+        return self._header["model_name"]
+
+    def get_params(self) -> Dict[str, Any]:
+        return dict(self._header.get("params") or {})
+
+    def get_system_prompt(self) -> str:
+        return self._header["system_prompt"]
+
+    def _next_record(self, key: str) -> Optional[dict[str, Any]]:
+        """Cycle through the recorded responses for `key` (several for stochastic runs)."""
+        with self._lock:
+            recs = self._records.get(key)
+            if not recs:
+                return None
+            i = self._cursor[key]
+            self._cursor[key] = i + 1
+            return recs[i % len(recs)]
+
+    def _latency_s(self, rec: Optional[dict[str, Any]]) -> float:
+        if self.latency_mode == "none":
+            return 0.0
+        if self.latency_mode == "distribution" or rec is None:
+            if not self._latencies:
+                return 0.0
+            with self._lock:
+                ms = self._rng.choice(self._latencies)
+        else:
+            ms = float(rec.get("latency_ms") or 0.0)
+        return ms * self.latency_scale / 1000.0
+
+    def generate(self, prompt: str, *, timeout: Optional[float] = None, **model_params) -> str:
+        if not prompt or not isinstance(prompt, str):
+            raise ValueError("prompt must be a non-empty string")
+        params = {**self.get_params(), **model_params}
+        key = request_key(self.get_name(), self.get_system_prompt(), params, prompt)
+        rec = self._next_record(key)
+
+        if rec is None and self.strict:
+            raise ModelError(f"No recorded response for request {key[:12]}")
+
+        _sleep_with_timeout(self._latency_s(rec), timeout)
+
+        n = model_params.get("n")
+        if rec is None:
+            return [self.fallback_answer] * n if n is not None else self.fallback_answer
+        if rec.get("error") is not None:
+            raise ModelError(rec["error"])
+        response = rec["response"]
+        # requests with n were recorded with their list of samples (n is part of the key)
+        if n is not None and not isinstance(response, list):
+            raise ModelError(f"Recorded response for request {key[:12]} is not a list of {n} samples")
+        return response
+
+
+def _default_synthetic_answer(prompt: str, digest: int) -> str:
+    if "Options:" in prompt:
+        n_opts = sum(1 for line in prompt.splitlines() if len(line) > 1 and line[1] == ")" and line[0].isupper())
+        return chr(65 + digest % max(1, n_opts))
+    if '"passed"' in prompt:
+        return json.dumps({"passed": digest % 2 == 0})
+    if '"score"' in prompt:
+        return json.dumps({"score": digest % 11})
+    return f"Synthetic answer {digest % 1000}."
+
+
+class SyntheticModel:
+    """
+    Model stand-in producing deterministic answers with simulated latency and errors.
+
+    Latency is log-normal with median `latency_ms` and shape `latency_sigma`
+    (sigma=0 gives a constant latency). Answers depend only on the prompt
+    (and the sample index with `n`), so repeated runs are reproducible.
+    """
+
+    supports_n = True
+
+    def __init__(
+        self,
+        model_name: str = "synthetic",
+        *,
+        latency_ms: float = 50.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        answer_fn: Optional[Callable[[str], str]] = None,
+        system_prompt: str | None = None,
+        params: Optional[Dict[str, Any]] = None,
+        seed: int = 42,
+    ) -> None:
+        """
+        Args:
+            model_name: Name reported by get_name().
+            latency_ms: Median simulated latency.
+            latency_sigma: Log-normal shape parameter of the latency distribution.
+            error_rate: Probability in [0, 1] that a call raises ModelError.
+            answer_fn: Optional prompt -> answer function overriding the defaults.
+            system_prompt: System prompt reported by get_system_prompt().
+            params: Params reported by get_params().
+            seed: Seed for latency and error sampling.
+        """
+        if latency_ms < 0 or latency_sigma < 0:
+            raise ConfigurationError("latency_ms and latency_sigma must be >= 0")
+        if not 0.0 <= error_rate <= 1.0:
+            raise ConfigurationError("error_rate must be in [0, 1]")
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.answer_fn = answer_fn
+        self.system_prompt = system_prompt or "synthetic"
+        self.params = params or {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.call_count = 0
+
+    def get_name(self) -> str:
+        return self.model_name
+
+    def get_params(self) -> Dict[str, Any]:
+        return dict(self.params)
+
+    def get_system_prompt(self) -> str:
+        return self.system_prompt
+
+    def _draw(self) -> tuple[float, bool]:
+        with self._lock:
+            self.call_count += 1
+            if self.latency_ms == 0:
+                ms = 0.0
+            elif self.latency_sigma == 0:
+                ms = self.latency_ms
+            else:
+                ms = self._rng.lognormvariate(math.log(self.latency_ms), self.latency_sigma)
+            fail = self._rng.random() < self.error_rate
+        return ms / 1000.0, fail
+
+    def generate(
+        self, prompt: str, *, timeout: Optional[float] = None, n: Optional[int] = None, **model_params
+    ) -> str | list[str]:
+        """One answer, or a list of `n` answers in one simulated call (the first equals the n=None answer)."""
+        if not prompt or not isinstance(prompt, str):
+            raise ValueError("prompt must be a non-empty string")
+        if n is not None and n < 1:
+            raise ValueError("n must be >= 1")
+        latency_s, fail = self._draw()
+        _sleep_with_timeout(latency_s, timeout)
+        if fail:
+            raise ModelError("Model request failed: synthetic error")
+
+        answers = [self._answer(prompt, i) for i in range(n or 1)]
+        return answers if n is not None else answers[0]
+
+    def _answer(self, prompt: str, sample: int) -> str:
+        if self.answer_fn is not None:
+            return self.answer_fn(prompt)
+        # sample i > 0 hashes a salted prompt, so samples differ but stay reproducible
+        salted = prompt if sample == 0 else f"{prompt}\x00{sample}"
+        digest = int(hashlib.sha1(salted.encode("utf-8")).hexdigest()[:8], 16)
+        return _default_synthetic_answer(prompt, digest)
+
+    def score_choices(self, prompt: str, choices: Sequence[str], *, timeout: Optional[float] = None, **model_params) -> Dict[str, float]:
+        """Deterministic per-prompt distribution over `choices` (same latency/error model as generate)."""
+        if not prompt or not isinstance(prompt, str):
+            raise ValueError("prompt must be a non-empty string")
+        if not choices:
+            raise ValueError("choices must be non-empty")
+        latency_s, fail = self._draw()
+        _sleep_with_timeout(latency_s, timeout)
+        if fail:
+            raise ModelError("Model request failed: synthetic error")
+
+        if len(choices) == 1:
+            return {choices[0]: 1.0}
+        digest = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        top = digest % len(choices)
+        # confidence of the top choice spread over [0.3, 0.95]
+        p_top = 0.3 + 0.65 * ((digest >> 8) % 1000) / 999
+        rest = (1.0 - p_top) / (len(choices) - 1)
+        return {c: (p_top if j == top else rest) for j, c in enumerate(choices)}
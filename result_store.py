@@ -0,0 +1,94 @@
+# result_store.py
+"""
+Memory-compact accumulator for per-row run results.
+
+Runner used to build one dict per row and hand the list to pandas, which
+peaks at several GB for million-row synthetic suites. ResultStore keeps one
+list per column instead and interns repeated values (true answers, option
+lists, short model answers such as MCQ letters), so identical values share a
+single object both while accumulating and in the final DataFrame.
+"""
+from __future__ import annotations
+
+import sys
+from typing import Any, Iterable, Optional
+
+import pandas as pd
+
+# strings longer than this are rarely repeated; interning them only costs time
+_INTERN_MAX_LEN = 256
+
+
+def _intern(value: Any) -> Any:
+    if type(value) is str and len(value) <= _INTERN_MAX_LEN:
+        return sys.intern(value)
+    return value
+
+
+class ResultStore:
+    """
+    Column-oriented store for Runner results.
+
+    Columns: question_id, question, options, true_answer, model_answer
+    (plus any extra columns registered via `extra_columns`; an extra not
+    passed to `append` is None for that row).
+    """
+
+    __slots__ = ("_cols", "_extra", "_options_pool", "_n")
+
+    BASE_COLUMNS = ("question_id", "question", "options", "true_answer", "model_answer")
+
+    def __init__(self, extra_columns: Iterable[str] = ()) -> None:
+        self._cols: dict[str, list[Any]] = {c: [] for c in (*self.BASE_COLUMNS, *extra_columns)}
+        self._extra = tuple(c for c in self._cols if c not in self.BASE_COLUMNS)
+        self._options_pool: dict[tuple, list] = {}
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _pool_options(self, options: Any) -> Any:
+        """Share one list object between rows with identical option lists."""
+        if options is None or isinstance(options, str):
+            return options
+        try:
+            key = tuple(options)
+            hash(key)
+        except TypeError:
+            return options
+        pooled = self._options_pool.get(key)
+        if pooled is None:
+            pooled = [_intern(o) for o in key]
+            self._options_pool[key] = pooled
+        return pooled
+
+    def append(
+        self,
+        question_id: Any,
+        question: Any,
+        options: Any,
+        true_answer: Any,
+        model_answer: Any,
+        **extra: Any,
+    ) -> None:
+        cols = self._cols
+        cols["question_id"].append(question_id)
+        cols["question"].append(question)
+        cols["options"].append(self._pool_options(options))
+        cols["true_answer"].append(_intern(true_answer))
+        cols["model_answer"].append(_intern(model_answer))
+        unknown = extra.keys() - self._extra
+        if unknown:
+            raise KeyError(f"Unregistered result columns: {sorted(unknown)}")
+        # missing extras are padded so every column keeps one value per row
+        for name in self._extra:
+            cols[name].append(_intern(extra.get(name)))
+        self._n += 1
+
+    def column(self, name: str) -> list[Any]:
+        return self._cols[name]
+
+    def to_frame(self, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Build the results DataFrame (columns are handed to pandas without per-row dicts)."""
+        names = list(columns) if columns is not None else list(self._cols)
+        return pd.DataFrame({name: self._cols[name] for name in names})
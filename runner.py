@@ -1,28 +1,122 @@
 # runner.py
 from __future__ import annotations
 
+import json
 import logging
 import random
 import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 
-from errors import EvaluationError, ModelError
+from errors import BudgetExceededError, ConfigurationError, EvaluationError, ModelError
+from hedging import HedgePolicy, Hedger
+from preflight import MESSAGE_OVERHEAD_TOKENS, PreflightPolicy, TokenCounter, check_budget, estimate_run
+from result_store import ResultStore
+from sampling import STRATUM_COLUMN, WEIGHT_COLUMN
 from task import Task, TaskType
-from utils import sample_dataset
+from telemetry import RunMonitor
+from tracing import bind, span
+from utils import (
+    iter_rows,
+    load_dataset,
+    request_key,
+    resolve_run_dir,
+    row_hashes,
+    run_results_path,
+    sample_dataset,
+    usage_delta,
+    usage_snapshot,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class Runner:
 
-    def __init__(self, model: Any) -> None:
+    MCQ_SCORING_MODES = ("generate", "logprobs")
+    LOGPROB_INSTRUCTION = "Respond with the letter of the correct option only."
+    LOGPROB_COLUMNS = ("choice_probs", "answer_prob")
+
+    def __init__(
+        self,
+        model: Any,
+        *,
+        concurrency: int = 1,
+        dedupe: bool = True,
+        monitor: RunMonitor | None = None,
+        prefix_cache_layout: bool = False,
+        mcq_scoring: str = "generate",
+        batch_size: int | None = None,
+        timeout: float | None = None,
+        hedge: HedgePolicy | None = None,
+        n_samples: int | None = None,
+        preflight: PreflightPolicy | None = None,
+    ) -> None:
+        """
+        Args:
+            model: Object providing a .generate(prompt) method (usually a Model).
+            concurrency: Maximum number of generate calls in flight at once.
+            dedupe: Share one generate call between identical requests in a run.
+                    Disable for stochastic sampling where every row needs its own draw.
+            monitor: Optional RunMonitor receiving live progress (status.json / metrics).
+            prefix_cache_layout: Put the static task instruction before the per-row
+                    question so requests share a cacheable prompt prefix.
+            mcq_scoring: "generate" (free-text answer) or "logprobs": for MULTIPLE_CHOICE
+                    tasks, one max_tokens=1 call per question scored over the option
+                    letters (needs model.score_choices); the per-option distribution
+                    is kept in the choice_probs column.
+            batch_size: Send generate requests in batches of this many unique prompts
+                    via model.generate_batch (when the model supports batching);
+                    `concurrency` then bounds the batches in flight. None = one call per row.
+            timeout: Deadline in seconds for each model call (None = the client default).
+            hedge: Optional HedgePolicy: send a duplicate of calls slower than the
+                    policy threshold (e.g. the live p95) and keep the first answer.
+                    Hedge rate and tail latency are reported in meta["hedging"].
+                    Batched generation (batch_size) gets the deadline but is not hedged.
+            n_samples: Draw this many answers per question in one request
+                    (model.generate(prompt, n=k)) for pass@k / majority vote.
+                    All answers go to the `samples` column as a JSON list;
+                    model_answer holds the first. Not combinable with
+                    mcq_scoring="logprobs".
+            preflight: Optional PreflightPolicy: count prompt tokens locally before
+                    any call, skip/truncate rows over the context limit, and
+                    estimate tokens, cost and time from a pilot sample (recorded
+                    with the actuals in meta["preflight"]). Skipped rows get an
+                    empty answer and "skipped" in the `preflight` column.
+        """
         if not hasattr(model, "generate"):
             raise ValueError("model must provide a .generate(prompt) method")
+        if not isinstance(concurrency, int) or concurrency < 1:
+            raise ValueError("concurrency must be a positive integer")
+        if mcq_scoring not in self.MCQ_SCORING_MODES:
+            raise ValueError(f"mcq_scoring must be one of {self.MCQ_SCORING_MODES}")
+        if mcq_scoring == "logprobs" and not hasattr(model, "score_choices"):
+            raise ValueError("mcq_scoring='logprobs' needs a model with .score_choices(prompt, choices)")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be > 0 or None")
+        if n_samples is not None and (not isinstance(n_samples, int) or n_samples < 1):
+            raise ValueError("n_samples must be a positive integer or None")
+        if batch_size is not None and (not isinstance(batch_size, int) or batch_size < 1):
+            raise ValueError("batch_size must be a positive integer or None")
+        if batch_size is not None and not getattr(model, "supports_batching", False):
+            logger.warning("Model %s does not support batching; batch_size ignored", model.get_name())
+            batch_size = None
         self.model = model
+        self.mcq_scoring = mcq_scoring
+        self.concurrency = concurrency
+        self.dedupe = dedupe
+        self.monitor = monitor
+        self.prefix_cache_layout = prefix_cache_layout
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.hedge = hedge
+        self.n_samples = n_samples
+        self.preflight = preflight
+        self._hedger: Hedger | None = None
         self._current_run_id: str | None = None
         self._current_run_dir: Path | None = None
 
@@ -56,9 +150,530 @@ class Runner:
         out.parent.mkdir(parents=True, exist_ok=True)
         return out
 
+    def _request_key(self, prompt: str) -> str:
+        """Identity of a generate request: model, system prompt, params and prompt."""
+        return request_key(
+            self.model.get_name(), self.model.get_system_prompt(), self.model.get_params(), prompt
+        )
+
+    def _inference_identity(self, task: Task) -> dict[str, Any]:
+        """Settings that decide a row's answer; keys as in the run meta."""
+        return {
+            "task_type": str(task.type),
+            "model_name": self.model.get_name(),
+            "model_params": self.model.get_params(),
+            "system_prompt": self.model.get_system_prompt(),
+            "user prompt": task.prompt_template,
+            "prefix_cache_layout": self.prefix_cache_layout,
+            "mcq_scoring": self.mcq_scoring if task.type == TaskType.MULTIPLE_CHOICE else None,
+            "n_samples": self.n_samples,
+        }
+
+    def _load_base_run(self, base_run: str | Path, task: Task, score_choices: bool) -> dict[str, Any]:
+        """Columns of an earlier run needed to reuse its answers, plus what changed since."""
+        run_dir = resolve_run_dir(base_run)
+        run_id = run_dir.name
+        df = load_dataset(run_results_path(run_dir))
+        meta_path = run_dir / f"meta_{run_id}.json"
+        base_meta: dict[str, Any] = {}
+        if meta_path.exists():
+            with open(meta_path, encoding="utf-8") as f:
+                base_meta = json.load(f)
+
+        current = self._inference_identity(task)
+        if not base_meta:
+            changed = ["meta"]
+        else:
+            # JSON round trip so tuples/ints compare like the saved meta
+            current = json.loads(json.dumps(current, default=str))
+            changed = [k for k, v in current.items() if base_meta.get(k) != v]
+        missing = [c for c in ("question_id", "row_hash", "model_answer") if c not in df.columns]
+        if score_choices:
+            missing += [c for c in self.LOGPROB_COLUMNS if c not in df.columns]
+
+        n = len(df)
+        base = {
+            "run_id": run_id,
+            "changed": changed,
+            "missing_columns": missing,
+            "question_id": df["question_id"].to_numpy() if "question_id" in df.columns else [],
+            "row_hash": df["row_hash"].to_numpy() if "row_hash" in df.columns else [],
+            "source_run_id": (
+                df["source_run_id"].to_numpy() if "source_run_id" in df.columns else [run_id] * n
+            ),
+        }
+        if self.n_samples is not None and "samples" not in df.columns:
+            missing.append("samples")
+        for col in ("model_answer", "samples", "latency_ms", "preflight") + self.LOGPROB_COLUMNS:
+            if col in df.columns:
+                base[col] = df[col].to_numpy()
+        return base
+
+    @staticmethod
+    def _diff_base_run(
+        base: dict[str, Any], df: pd.DataFrame, hashes: list[str]
+    ) -> tuple[list[int | None], dict[str, Any]]:
+        """
+        Match current rows to base rows by question_id + row_hash.
+
+        Returns:
+            (base row index per current row, or None when the row must be run;
+             provenance for meta["incremental"])
+        """
+        n = len(df)
+        provenance: dict[str, Any] = {
+            "base_run_id": base["run_id"],
+            "rows": n,
+            "reused": 0,
+            "new": n,
+            "changed": 0,
+            "retried": 0,
+            "removed": 0,
+            "invalidated_by": None,
+        }
+        if base["changed"] or base["missing_columns"] or "question_id" not in df.columns:
+            # different model/prompt settings (or a pre-row_hash run): nothing is reusable
+            reason = base["changed"] or [f"missing column {c}" for c in base["missing_columns"]] or ["question_id"]
+            logger.warning("Base run %s not reusable (%s); running all rows", base["run_id"], ", ".join(reason))
+            provenance["invalidated_by"] = reason
+            return [None] * n, provenance
+
+        # ids compared as strings: CSV round trips turn "7" into 7
+        by_id: dict[str, tuple[int, str]] = {}
+        for j, (qid, h) in enumerate(zip(base["question_id"], base["row_hash"])):
+            by_id.setdefault(str(qid), (j, h))
+
+        # rows a previous pre-flight skipped have no answer; run them again
+        skipped = base.get("preflight")
+        reused: list[int | None] = []
+        seen: set[str] = set()
+        new = changed = retried = 0
+        for qid, h in zip(df["question_id"].to_numpy(), hashes):
+            key = str(qid)
+            seen.add(key)
+            hit = by_id.get(key)
+            if hit is None:
+                new += 1
+                reused.append(None)
+            elif hit[1] != h:
+                changed += 1
+                reused.append(None)
+            elif skipped is not None and skipped[hit[0]] == "skipped":
+                retried += 1
+                reused.append(None)
+            else:
+                reused.append(hit[0])
+        provenance.update(
+            reused=n - new - changed - retried,
+            new=new,
+            changed=changed,
+            retried=retried,
+            removed=sum(1 for key in by_id if key not in seen),
+        )
+        return reused, provenance
+
+    def _build_prompt(self, task: Task, question: Any, opts: Any) -> str:
+        """Build the user prompt for one dataset row (question, options, instruction)."""
+        ttype = task.type
+
+        # Task.prompt_template yalnızca yönerge/snippet, soru/options burada kurulur
+        instruction = task.prompt_template or ""
+
+        if ttype == TaskType.MULTIPLE_CHOICE:
+            if opts is None:
+                raise EvaluationError("MULTIPLE_CHOICE row missing 'options'")
+
+            prompt = f"{question}\nOptions:\n"
+            for j, opt in enumerate(opts):
+                prompt += f"{chr(65 + j)}) {opt}\n"
+            if instruction and self.prefix_cache_layout:
+                prompt = f"{instruction}\n\n{prompt}"
+            elif instruction:
+                prompt += "\n" + instruction
+            if self.mcq_scoring == "logprobs":
+                # the single scored token must be the option letter
+                prompt += "\n" + self.LOGPROB_INSTRUCTION
+
+        elif ttype in (TaskType.WITH_TRUE_ANSWER, TaskType.NO_TRUE_ANSWER):
+            prompt = f"{question}\n"
+            if instruction and self.prefix_cache_layout:
+                prompt = f"{instruction}\n\n{prompt}"
+            elif instruction:
+                prompt += instruction
+
+        else:
+            raise EvaluationError(f"Unknown task type: {ttype}")
+
+        return prompt
+
+    @staticmethod
+    def _timeout_kwargs(timeout: float | None) -> dict[str, Any]:
+        # models written against the old interface take only the prompt
+        return {"timeout": timeout} if timeout is not None else {}
+
+    def _generate_kwargs(self, timeout: float | None) -> dict[str, Any]:
+        kwargs = self._timeout_kwargs(timeout)
+        if self.n_samples is not None:
+            kwargs["n"] = self.n_samples
+        return kwargs
+
+    def _check_samples(self, ans: Any) -> Any:
+        """With n_samples, a generate result must be a list of n answers."""
+        if self.n_samples is not None and not (isinstance(ans, list) and len(ans) == self.n_samples):
+            # models that swallow `n` in **params return one string; slicing it would corrupt the results
+            got = f"list of {len(ans)}" if isinstance(ans, list) else type(ans).__name__
+            raise ModelError(
+                f"Model {self.model.get_name()} returned {got} for n={self.n_samples}; "
+                "it does not support multi-sample generation"
+            )
+        return ans
+
+    def _call(self, fn: Any) -> Any:
+        """One model request under the run's deadline/hedging (fn takes the timeout)."""
+        if self._hedger is None:
+            return fn(self.timeout)
+        return self._hedger.call(fn)
+
+    def _timed_generate(self, prompt: str, choices: tuple[str, ...] | None = None) -> tuple[Any, float]:
+        monitor = self.monitor
+        if monitor is not None:
+            monitor.request_started()
+        ok = False
+        t0 = time.perf_counter()
+        try:
+            if choices is not None:
+                with span("runner.score_choices"):
+                    ans = self._call(lambda t: self.model.score_choices(prompt, choices, **self._timeout_kwargs(t)))
+            else:
+                with span("runner.generate"):
+                    ans = self._check_samples(self._call(lambda t: self.model.generate(prompt, **self._generate_kwargs(t))))
+            ok = True
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            if monitor is not None:
+                monitor.request_finished(ms, ok=ok)
+        return ans, ms
+
+    def _timed_generate_batch(self, prompts: list[str]) -> tuple[list[str], float]:
+        monitor = self.monitor
+        if monitor is not None:
+            for _ in prompts:
+                monitor.request_started()
+        ok = False
+        t0 = time.perf_counter()
+        try:
+            with span("runner.generate_batch", size=len(prompts)):
+                answers = [
+                    self._check_samples(a)
+                    for a in self.model.generate_batch(prompts, **self._generate_kwargs(self.timeout))
+                ]
+            ok = True
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            if monitor is not None:
+                for _ in prompts:
+                    monitor.request_finished(ms, ok=ok)
+        return answers, ms
+
+    def _generate_all(
+        self,
+        prompts: list[str],
+        measure_idx: set[int],
+        choices: list[tuple[str, ...]] | None = None,
+    ) -> tuple[list[Any], list[float], int, list[float]]:
+        """
+        Run generate (or score_choices, when per-row `choices` are given) for
+        every prompt, single-flighting identical requests.
+
+        Returns:
+            (answers in row order, measured latencies in ms, number of saved
+             calls, latency in ms of the call that answered each row)
+        """
+        if self.batch_size is not None and choices is None:
+            return self._generate_batched(prompts, measure_idx)
+        inflight: dict[str, Future] = {}
+        row_futures: list[tuple[Future, bool]] = []
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            for i, prompt in enumerate(prompts):
+                row_choices = choices[i] if choices is not None else None
+                key = self._request_key(prompt) if self.dedupe else None
+                fut = inflight.get(key) if key is not None else None
+                if fut is None:
+                    fut = pool.submit(bind(self._timed_generate), prompt, row_choices)
+                    if key is not None:
+                        inflight[key] = fut
+                    row_futures.append((fut, True))
+                else:
+                    row_futures.append((fut, False))
+                if self.monitor is not None:
+                    fut.add_done_callback(lambda _: self.monitor.row_completed())
+
+            answers: list[Any] = []
+            times_ms: list[float] = []
+            row_ms: list[float] = []
+            for i, (fut, owner) in enumerate(row_futures):
+                try:
+                    ans, ms = fut.result()
+                except Exception as exc:
+                    logger.error("Model generation failed at row %d: %s", i, exc)
+                    raise ModelError(f"Generation failed at row {i}: {exc}") from exc
+                answers.append(ans)
+                row_ms.append(ms)
+                # shared rows did not pay for a call, so they are not latency samples
+                if owner and i in measure_idx:
+                    times_ms.append(ms)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        saved = len(prompts) - sum(1 for _, owner in row_futures if owner)
+        return answers, times_ms, saved, row_ms
+
+    def _generate_batched(
+        self, prompts: list[str], measure_idx: set[int]
+    ) -> tuple[list[Any], list[float], int, list[float]]:
+        """
+        _generate_all for batching models: unique prompts go out in
+        model.generate_batch calls of `batch_size`, `concurrency` batches at a
+        time. A measured row's latency is that of its whole batch.
+        """
+        unique: list[str] = []
+        owner_row: list[int] = []  # first row of each unique prompt
+        slot_of_row: list[int] = []
+        seen: dict[str, int] = {}
+        for i, prompt in enumerate(prompts):
+            key = self._request_key(prompt) if self.dedupe else None
+            slot = seen.get(key) if key is not None else None
+            if slot is None:
+                slot = len(unique)
+                unique.append(prompt)
+                owner_row.append(i)
+                if key is not None:
+                    seen[key] = slot
+            slot_of_row.append(slot)
+        del seen
+
+        size = self.batch_size
+        rows_per_batch = [0] * ((len(unique) + size - 1) // size)
+        for slot in slot_of_row:
+            rows_per_batch[slot // size] += 1
+
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            futures = []
+            for b, start in enumerate(range(0, len(unique), size)):
+                fut = pool.submit(bind(self._timed_generate_batch), unique[start:start + size])
+                if self.monitor is not None:
+                    fut.add_done_callback(lambda _, n=rows_per_batch[b]: self.monitor.row_completed(n))
+                futures.append(fut)
+
+            results: list[tuple[list[str], float]] = []
+            for b, fut in enumerate(futures):
+                try:
+                    results.append(fut.result())
+                except Exception as exc:
+                    row = owner_row[b * size]
+                    logger.error("Model generation failed in batch starting at row %d: %s", row, exc)
+                    raise ModelError(f"Generation failed at row {row}: {exc}") from exc
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        answers = [results[slot // size][0][slot % size] for slot in slot_of_row]
+        times_ms = [
+            results[slot // size][1]
+            for i, slot in enumerate(slot_of_row)
+            if i in measure_idx and owner_row[slot] == i
+        ]
+        row_ms = [results[slot // size][1] for slot in slot_of_row]
+        return answers, times_ms, len(prompts) - len(unique), row_ms
+
+    def _preflight_prompts(
+        self, task: Task, todo_df: pd.DataFrame, prompts: list[str]
+    ) -> tuple[list[int], list[str], dict[str, Any]]:
+        """
+        Count prompt tokens locally and apply the context limit (no API calls).
+        Truncated rows get their prompt rebuilt in `prompts`.
+
+        Returns:
+            (tokens per prompt incl. system prompt, status per prompt
+             "ok" / "truncated" / "skipped", report for meta["preflight"])
+        """
+        policy = self.preflight
+        counter = TokenCounter(self.model.get_name(), policy.encoding)
+        base = counter.count(self.model.get_system_prompt()) + MESSAGE_OVERHEAD_TOKENS
+        tokens = [base + counter.count(p) for p in prompts]
+        status = ["ok"] * len(prompts)
+
+        over: list[int] = []
+        reserved = None
+        if policy.context_limit is not None:
+            reserved = policy.reserved_output(self.model.get_params())
+            limit = policy.context_limit - reserved
+            over = [i for i, t in enumerate(tokens) if t > limit]
+            if over and policy.on_overflow == "error":
+                raise ConfigurationError(
+                    f"{len(over)} prompts exceed the context limit ({limit} prompt tokens "
+                    f"after reserving {reserved} for output); largest is {max(tokens[i] for i in over)}"
+                )
+            if over and policy.on_overflow == "truncate":
+                rows = list(iter_rows(todo_df, ("question", "options")))
+                for i in over:
+                    question, options = rows[i]
+                    keep = counter.count(question) - (tokens[i] - limit)
+                    # token counts of cut text are not exactly additive: retry a little shorter
+                    for _ in range(3):
+                        if keep <= 0:
+                            break
+                        prompts[i] = self._build_prompt(task, counter.truncate(question, keep), options)
+                        tokens[i] = base + counter.count(prompts[i])
+                        if tokens[i] <= limit:
+                            break
+                        keep -= tokens[i] - limit
+                    status[i] = "truncated" if keep > 0 and tokens[i] <= limit else "skipped"
+            else:
+                for i in over:
+                    status[i] = "skipped"
+            if over:
+                logger.warning(
+                    "Pre-flight: %d/%d prompts over the context limit (%s)",
+                    len(over), len(prompts), policy.on_overflow,
+                )
+
+        report = {
+            "policy": policy.describe(),
+            "tokenizer": counter.name,
+            "reserved_output_tokens": reserved,
+            "prompt_tokens_max": max(tokens, default=0),
+            "over_limit": len(over),
+            "truncated": status.count("truncated"),
+            "skipped": status.count("skipped"),
+        }
+        return tokens, status, report
+
+    def _generate_preflighted(
+        self,
+        prompts: list[str],
+        measure_idx: set[int],
+        choices: list[tuple[str, ...]] | None,
+        tokens: list[int],
+        status: list[str],
+        report: dict[str, Any],
+        rng: random.Random,
+    ) -> tuple[list[Any], list[float], int, list[float | None]]:
+        """
+        _generate_all with pre-flight: skipped rows get None, a pilot of
+        unique requests runs first, and the run stops with
+        BudgetExceededError (carrying the report and the pilot answers)
+        when the extrapolated totals break the budget.
+        """
+        policy = self.preflight
+        answers: list[Any] = [None] * len(prompts)
+        row_ms: list[float | None] = [None] * len(prompts)
+        if self.monitor is not None and status.count("skipped"):
+            self.monitor.row_completed(status.count("skipped"))
+
+        keys = [self._request_key(p) if self.dedupe else i for i, p in enumerate(prompts)]
+        unique: dict[Any, int] = {}
+        for i, s in enumerate(status):
+            if s != "skipped":
+                unique.setdefault(keys[i], i)
+        calls = len(unique)
+
+        def run(positions: list[int]) -> tuple[list[Any], list[float], int, list[float]]:
+            sub_measure = {j for j, i in enumerate(positions) if i in measure_idx}
+            sub_choices = [choices[i] for i in positions] if choices is not None else None
+            return self._generate_all([prompts[i] for i in positions], sub_measure, sub_choices)
+
+        times_ms: list[float] = []
+        saved = 0
+        done: dict[Any, Any] = {}
+        pilot = None
+        pilot_pos = sorted(rng.sample(list(unique.values()), min(policy.pilot_size, calls)))
+        if pilot_pos:
+            usage_before = usage_snapshot(self.model)
+            t0 = time.perf_counter()
+            with span("runner.pilot", rows=len(pilot_pos)):
+                pilot_answers, times_ms, _, pilot_ms = run(pilot_pos)
+            pilot = {
+                "calls": len(pilot_pos),
+                "local_prompt_tokens": sum(tokens[i] for i in pilot_pos),
+                "usage": usage_delta(usage_before, usage_snapshot(self.model)),
+                "wall_s": round(time.perf_counter() - t0, 3),
+            }
+            for i, ans, ms in zip(pilot_pos, pilot_answers, pilot_ms):
+                answers[i] = ans
+                row_ms[i] = ms
+                done[keys[i]] = (ans, ms)
+
+        estimate = estimate_run(
+            policy,
+            calls=calls,
+            local_prompt_tokens=sum(tokens[i] for i in unique.values()),
+            parallel=self.concurrency * (self.batch_size or 1),
+            pilot=pilot,
+        )
+        report["pilot"] = pilot
+        report["estimate"] = estimate
+        logger.info(
+            "Pre-flight estimate (%s): %d calls, %s tokens, cost=%s, wall=%ss",
+            estimate["basis"], calls, estimate["total_tokens"] or estimate["prompt_tokens"],
+            estimate["cost_usd"], estimate["wall_s"],
+        )
+        reason = check_budget(policy, estimate)
+        if reason is not None:
+            # the pilot is already paid for: hand its answers back with the estimate
+            raise BudgetExceededError(
+                f"Run stopped before {calls - len(pilot_pos)} remaining calls: {reason}",
+                report=report,
+                pilot_answers={i: answers[i] for i in pilot_pos},
+            )
+
+        rest = []
+        pilot_set = set(pilot_pos)
+        for i, s in enumerate(status):
+            if s == "skipped" or i in pilot_set:
+                continue
+            if keys[i] in done:
+                # duplicates of pilot prompts share the pilot's answer
+                answers[i], row_ms[i] = done[keys[i]]
+                saved += 1
+                if self.monitor is not None:
+                    self.monitor.row_completed()
+            else:
+                rest.append(i)
+        rest_answers, rest_times, rest_saved, rest_ms = run(rest)
+        for i, ans, ms in zip(rest, rest_answers, rest_ms):
+            answers[i] = ans
+            row_ms[i] = ms
+        return answers, times_ms + rest_times, saved + rest_saved, row_ms
+
     # ---------- main ----------
 
-    def run(self, task: Task, measure_k: int = 25) -> tuple[dict, pd.DataFrame]:
+    def run(
+        self,
+        task: Task,
+        measure_k: int = 25,
+        sampled_df: pd.DataFrame | None = None,
+        base_run: str | Path | None = None,
+    ) -> tuple[dict, pd.DataFrame]:
+        """
+        Run the model over a sample of the task's dataset and save run_{run_id}.csv.
+
+        Each row keeps latency_ms, the latency of the call that answered it
+        (for latency slices in the evaluators).
+
+        Args:
+            task: Task to run.
+            measure_k: How many rows to use for latency measurement.
+            sampled_df: Pre-sampled rows (e.g. shared by several models in a
+                suite); by default the dataset is sampled per task.sample_size / seed.
+            base_run: Earlier run (dir or run_id) to update incrementally. The run
+                covers every row of the current dataset (or `sampled_df`), but
+                only rows whose question_id is new or whose content hash changed
+                are sent to the model; the others reuse the base run's answers.
+                Provenance is recorded in meta["incremental"] and the
+                source_run_id column.
+        """
         if not isinstance(task, Task):
             raise ValueError("task must be a Task")
         if task.sample_size <= 0:
@@ -75,86 +690,187 @@ class Runner:
             dataset_path, sample_size, seed, self.model.get_name()
         )
 
-        # ---- sample dataset
-        sampled_df = sample_dataset(dataset_path, sample_size, seed)
+        # ---- run folder: outputs/runs/{run_id}/
+        run_id = self._new_run_id()
+        run_dir = Path("outputs") / "runs" / run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        self._current_run_id = run_id
+        self._current_run_dir = run_dir
+
+        if self.monitor is not None:
+            self.monitor.attach_run_dir(run_dir)
+
+        # ---- sample dataset (incremental runs cover the whole current dataset)
+        if sampled_df is None and base_run is not None:
+            with span("runner.load_dataset"):
+                sampled_df = load_dataset(dataset_path)
+        elif sampled_df is None:
+            with span("runner.sample_dataset"):
+                sampled_df = sample_dataset(
+                    dataset_path, sample_size, seed,
+                    stratify_by=task.stratify_by,
+                    allocation=task.allocation,
+                    stratum_sd=task.stratum_sd,
+                    weight_column=task.weight_column,
+                )
         if sampled_df.empty:
             raise EvaluationError("Sampled dataset is empty")
+        if "question" not in sampled_df.columns:
+            raise EvaluationError("Dataset row missing required 'question'")
 
         n = len(sampled_df)
-        k = min(measure_k, n)
+        with span("runner.row_hashes", rows=n):
+            hashes = row_hashes(sampled_df)
+        score_choices = task.type == TaskType.MULTIPLE_CHOICE and self.mcq_scoring == "logprobs"
+        if score_choices and self.n_samples is not None:
+            raise ValueError("n_samples cannot be combined with mcq_scoring='logprobs'")
+
+        # ---- incremental: reuse answers of unchanged rows from the base run
+        reused: list[int | None] = [None] * n
+        base = provenance = None
+        if base_run is not None:
+            with span("runner.diff_base_run"):
+                base = self._load_base_run(base_run, task, score_choices)
+                reused, provenance = self._diff_base_run(base, sampled_df, hashes)
+            logger.info(
+                "Incremental run over %s: %d reused, %d new, %d changed, %d retried, %d removed",
+                base["run_id"], provenance["reused"], provenance["new"], provenance["changed"],
+                provenance["retried"], provenance["removed"],
+            )
+        todo = [i for i in range(n) if reused[i] is None]
+
+        m = len(todo)
+        k = min(measure_k, m)
         rng = random.Random(seed)
-        measure_idx = set(rng.sample(range(n), k)) if k > 0 else set()
-        times_ms: list[float] = []
-
-        rows: list[dict] = []
+        measure_idx = set(rng.sample(range(m), k)) if k > 0 else set()
+
+        # ---- prompt building
+        todo_df = sampled_df if m == n else sampled_df.iloc[todo]
+        with span("runner.build_prompts", rows=m):
+            prompts = [
+                self._build_prompt(task, row.question, row.options)
+                for row in iter_rows(todo_df, ("question", "options"))
+            ]
+
+        # ---- pre-flight: local token counts against the context limit, before any call
+        preflight = None
+        if self.preflight is not None:
+            with span("runner.preflight", rows=m):
+                tokens, preflight_status, preflight = self._preflight_prompts(task, todo_df, prompts)
 
         # ---- inference
-        for i, (_, row) in enumerate(sampled_df.iterrows()):
-            if "question" not in row:
-                raise EvaluationError("Dataset row missing required 'question'")
-
-            question = row["question"]
-            ttype = task.type
-
-            # Task.prompt_template yalnızca yönerge/snippet, soru/options burada kurulur
-            instruction = task.prompt_template or ""
-
-            if ttype == TaskType.MULTIPLE_CHOICE:
-                opts = row.get("options")
-                if opts is None:
-                    raise EvaluationError("MULTIPLE_CHOICE row missing 'options'")
-
-                prompt = f"{question}\nOptions:\n"
-                for j, opt in enumerate(opts):
-                    prompt += f"{chr(65 + j)}) {opt}\n"
-                if instruction:
-                    prompt += "\n" + instruction
-
-            elif ttype == TaskType.WITH_TRUE_ANSWER:
-                prompt = f"{question}\n"
-                if instruction:
-                    prompt += instruction
-
-            elif ttype == TaskType.NO_TRUE_ANSWER:
-                prompt = f"{question}\n"
-                if instruction:
-                    prompt += instruction
-
-            else:
-                raise EvaluationError(f"Unknown task type: {ttype}")
-
-            try:
-                if i in measure_idx:
-                    t0 = time.perf_counter()
-                    ans = self.model.generate(prompt)
-                    t1 = time.perf_counter()
-                    times_ms.append((t1 - t0) * 1000.0)
+        choices = None
+        if score_choices:
+            choices = [
+                tuple(chr(65 + j) for j in range(len(opts)))
+                for opts in todo_df["options"].to_numpy()
+            ]
+        del todo_df
+        usage_before = usage_snapshot(self.model)
+        if self.monitor is not None:
+            self.monitor.start_stage("inference", m)
+        if self.hedge is not None:
+            self._hedger = Hedger(self.hedge, timeout_s=self.timeout, max_workers=2 * self.concurrency)
+        t_inference = time.perf_counter()
+        try:
+            with span("runner.inference", rows=m, concurrency=self.concurrency):
+                if preflight is None:
+                    answers, times_ms, saved_calls, row_ms = self._generate_all(prompts, measure_idx, choices)
                 else:
-                    ans = self.model.generate(prompt)
-            except Exception as exc:
-                logger.error("Model generation failed at row %d: %s", i, exc)
-                raise ModelError(f"Generation failed at row {i}: {exc}") from exc
-
-            rows.append({
-                "question_id": row.get("question_id"),
-                "question": question,
-                "options": row.get("options"),
-                "true_answer": row.get("answer"),
-                "model_answer": ans,
-            })
-
-        results_df = pd.DataFrame(rows)
-
-        # ---- run folder: outputs/runs/{run_id}/
-        run_id = self._new_run_id()
-        run_dir = Path("outputs") / "runs" / run_id
-        run_dir.mkdir(parents=True, exist_ok=True)
-        self._current_run_id = run_id
-        self._current_run_dir = run_dir
+                    answers, times_ms, saved_calls, row_ms = self._generate_preflighted(
+                        prompts, measure_idx, choices, tokens, preflight_status, preflight, rng
+                    )
+        finally:
+            hedging = None
+            if self._hedger is not None:
+                hedging = self._hedger.stats()
+                self._hedger.close()
+                self._hedger = None
+        del prompts, choices
+        if saved_calls:
+            logger.info("Deduplicated %d/%d generate calls", saved_calls, m)
+        usage = usage_delta(usage_before, usage_snapshot(self.model))
+        if preflight is not None:
+            skipped = preflight["skipped"]
+            preflight["actual"] = {
+                "calls": m - skipped - saved_calls,
+                "prompt_tokens": usage.get("prompt_tokens") if usage else None,
+                "completion_tokens": usage.get("completion_tokens") if usage else None,
+                "cost_usd": self.preflight.cost(usage.get("prompt_tokens"), usage.get("completion_tokens")) if usage else None,
+                "wall_s": round(time.perf_counter() - t_inference, 2),
+            }
+
+        with span("runner.collect_results", rows=n):
+            extra_columns = ("row_hash", "latency_ms") + (self.LOGPROB_COLUMNS if score_choices else ())
+            if self.n_samples is not None:
+                extra_columns += ("samples",)
+            if base is not None:
+                extra_columns += ("source_run_id",)
+            if preflight is not None:
+                extra_columns += ("preflight",)
+                new_status = iter(preflight_status)
+            # stratified / weighted samples keep their design for the evaluators
+            design_columns = tuple(c for c in (WEIGHT_COLUMN, STRATUM_COLUMN) if c in sampled_df.columns)
+            store = ResultStore(extra_columns=extra_columns + design_columns)
+            rows = iter_rows(sampled_df, ("question_id", "question", "options", "answer") + design_columns)
+            new_answers = iter(answers)
+            new_ms = iter(row_ms)
+            for i, row in enumerate(rows):
+                extra = {"row_hash": hashes[i]}
+                for c in design_columns:
+                    extra[c] = getattr(row, c)
+                j = reused[i]
+                if j is not None:
+                    ans = base["model_answer"][j]
+                    if score_choices:
+                        extra["choice_probs"] = base["choice_probs"][j]
+                        extra["answer_prob"] = base["answer_prob"][j]
+                    if self.n_samples is not None:
+                        extra["samples"] = base["samples"][j]
+                    extra["source_run_id"] = base["source_run_id"][j]
+                    if preflight is not None:
+                        extra["preflight"] = "reused"
+                    # base runs from before the latency column have none
+                    extra["latency_ms"] = base["latency_ms"][j] if "latency_ms" in base else None
+                else:
+                    ans = next(new_answers)
+                    ms = next(new_ms)
+                    # the call that answered the row (shared by deduplicated rows, whole batch when batching)
+                    extra["latency_ms"] = round(ms, 1) if ms is not None else None
+                    if preflight is not None:
+                        extra["preflight"] = next(new_status)
+                    if ans is None:
+                        # skipped by pre-flight: no answer, nothing else to unpack
+                        if self.n_samples is not None:
+                            extra["samples"] = "[]"
+                    elif self.n_samples is not None:
+                        # one JSON list per row; the first sample doubles as model_answer
+                        extra["samples"] = json.dumps(ans, ensure_ascii=False)
+                        ans = ans[0]
+                    if score_choices and ans is not None:
+                        # ans is {letter: prob}; the answer is the most likely letter
+                        letter = max(ans, key=ans.get)
+                        extra["choice_probs"] = json.dumps(ans)
+                        extra["answer_prob"] = ans[letter]
+                        ans = letter
+                    if base is not None:
+                        extra["source_run_id"] = run_id
+                store.append(
+                    question_id=row.question_id,
+                    question=row.question,
+                    options=row.options,
+                    true_answer=row.answer,
+                    model_answer=ans,
+                    **extra,
+                )
+            del answers, base
+            results_df = store.to_frame()
+            del store
 
         # ---- save results CSV
         run_csv = run_dir / f"run_{run_id}.csv"
-        results_df.to_csv(run_csv, index=False)
+        with span("runner.write_csv", rows=n):
+            results_df.to_csv(run_csv, index=False)
 
         avg_ms = (sum(times_ms) / len(times_ms)) if times_ms else None
 
@@ -169,6 +885,7 @@ class Runner:
             "dataset_name": Path(task.dataset_path).name,
             "sample_size": task.sample_size,
             "seed": task.seed,
+            "sampling": sampled_df.attrs.get("sampling"),
             "system_prompt": self.model.get_system_prompt(),
             "user prompt":task.prompt_template,  
 
@@ -176,10 +893,28 @@ class Runner:
             "model_name": self.model.get_name(),
             "model_params": self.model.get_params(),
 
+            # --- execution ---
+            "concurrency": self.concurrency,
+            "dedupe": self.dedupe,
+            "dedup_saved_calls": saved_calls,
+            "prefix_cache_layout": self.prefix_cache_layout,
+            "batch_size": self.batch_size,
+            "timeout_s": self.timeout,
+            "hedging": hedging,
+            "n_samples": self.n_samples,
+            "preflight": preflight,
+            "mcq_scoring": self.mcq_scoring if task.type == TaskType.MULTIPLE_CHOICE else None,
+            "usage": usage,
+            "incremental": provenance,
+
             # --- latency summary ---
             "measured_count": len(times_ms),
             "latency_ms_avg": round(avg_ms, 2) if avg_ms is not None else None,
         }
 
+        # meta next to the CSV so the run can be re-judged later without inference
+        with open(run_dir / f"meta_{run_id}.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=4)
+
         logger.info("Run finished: run_id=%s avg_ms=%s", run_id, meta["latency_ms_avg"])
         return meta, results_df
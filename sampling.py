@@ -0,0 +1,235 @@
+# sampling.py
+"""
+Stratified and importance (probability-proportional-to-size) sampling.
+
+Uniform sampling wastes calls on heterogeneous datasets: large easy
+strata dominate the sample while small hard ones get a handful of rows.
+`draw_sample` can instead
+
+- stratify by a category column with proportional allocation
+  (n_h ∝ N_h) or Neyman allocation (n_h ∝ N_h·S_h, given per-stratum
+  standard deviations S_h, e.g. from an earlier run via `stratum_sd`);
+- sample rows with probability proportional to a weight column
+  (difficulty, importance) using systematic PPS sampling;
+- or both (PPS within each stratum).
+
+Every sampled row gets a design weight in `sample_weight` (1 / inclusion
+probability) and, when stratified, its stratum label in `stratum`, so
+the evaluators can report population estimates instead of sample means.
+A summary of the design is stored in `df.attrs["sampling"]`.
+"""
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ALLOCATIONS = ("proportional", "neyman")
+WEIGHT_COLUMN = "sample_weight"
+STRATUM_COLUMN = "stratum"
+
+
+def allocate(
+    sizes: Mapping[str, int],
+    n: int,
+    *,
+    allocation: str = "proportional",
+    sd: Optional[Mapping[str, float]] = None,
+    replace: bool = False,
+) -> dict[str, int]:
+    """Split a sample of `n` rows across strata.
+
+    Every stratum gets at least one row; without replacement no stratum
+    gets more rows than it has.
+
+    Args:
+        sizes: Rows per stratum (N_h).
+        n: Total sample size.
+        allocation: "proportional" (n_h ∝ N_h) or "neyman" (n_h ∝ N_h·S_h).
+        sd: Per-stratum standard deviation S_h of the metric (Neyman only).
+        replace: Whether strata are sampled with replacement (no size cap).
+
+    Returns:
+        Rows to draw per stratum, summing to `n`.
+
+    Raises:
+        ValueError: On an unknown allocation, missing S_h, or an `n` that
+            cannot cover every stratum.
+    """
+    if allocation not in ALLOCATIONS:
+        raise ValueError(f"allocation must be one of {ALLOCATIONS}, got {allocation!r}")
+    if n < len(sizes):
+        raise ValueError(f"sample_size ({n}) is smaller than the number of strata ({len(sizes)})")
+    if not replace and n > sum(sizes.values()):
+        raise ValueError(f"sample_size ({n}) > dataset size ({sum(sizes.values())})")
+
+    if allocation == "neyman":
+        missing = [h for h in sizes if sd is None or h not in sd]
+        if missing:
+            raise ValueError(f"Neyman allocation needs stratum_sd for strata {missing}")
+        scores = {h: sizes[h] * max(float(sd[h]), 0.0) for h in sizes}
+        if sum(scores.values()) <= 0.0:
+            # every stratum has zero variance: nothing to optimise
+            scores = {h: float(sizes[h]) for h in sizes}
+    else:
+        scores = {h: float(sizes[h]) for h in sizes}
+
+    total = sum(scores.values())
+    target = {h: n * s / total for h, s in scores.items()}
+    cap = {h: math.inf if replace else sizes[h] for h in sizes}
+    alloc = {h: int(min(max(math.floor(target[h]), 1), cap[h])) for h in sizes}
+
+    # the minimum of one row can overshoot n; take back from the most over-served strata
+    while sum(alloc.values()) > n:
+        h = max((h for h in alloc if alloc[h] > 1), key=lambda h: alloc[h] / max(target[h], 1e-12))
+        alloc[h] -= 1
+    # floors and caps undershoot; give the rest to the most under-served strata
+    while sum(alloc.values()) < n:
+        h = min((h for h in alloc if alloc[h] < cap[h]), key=lambda h: (alloc[h] + 1) / max(target[h], 1e-12))
+        alloc[h] += 1
+    return alloc
+
+
+def _pps_probabilities(size: np.ndarray, n: int) -> np.ndarray:
+    """Inclusion probabilities π_i = n·x_i/Σx, with rows at π >= 1 taken with certainty."""
+    pi = np.zeros(len(size))
+    certain = np.zeros(len(size), dtype=bool)
+    while True:
+        rest = ~certain
+        k = n - int(certain.sum())
+        pi[rest] = k * size[rest] / size[rest].sum()
+        over = rest & (pi >= 1.0)
+        if not over.any():
+            break
+        certain |= over
+    pi[certain] = 1.0
+    return pi
+
+
+def pps_sample(
+    size: np.ndarray,
+    n: int,
+    rng: np.random.Generator,
+    *,
+    replace: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Draw `n` positions with probability proportional to `size`.
+
+    Without replacement this is systematic PPS over a random ordering, whose
+    inclusion probabilities are exactly π_i (rows with π_i = 1 are always
+    drawn); with replacement it is a multinomial draw with expected hits n·p_i.
+
+    Returns:
+        (positions, design weights 1/π_i of the drawn positions)
+    """
+    size = np.asarray(size, dtype=float)
+    if len(size) == 0 or not np.isfinite(size).all() or (size <= 0).any():
+        raise ValueError("Sampling weights must be finite and > 0")
+    if replace:
+        p = size / size.sum()
+        picks = rng.choice(len(size), size=n, replace=True, p=p)
+        return picks, 1.0 / (n * p[picks])
+    if n > len(size):
+        raise ValueError(f"sample_size ({n}) > rows available ({len(size)})")
+
+    pi = _pps_probabilities(size, n)
+    order = rng.permutation(len(size))
+    cum = np.cumsum(pi[order])
+    points = rng.random() + np.arange(n)
+    hits = np.minimum(np.searchsorted(cum, points, side="right"), len(size) - 1)
+    picks = order[hits]
+    return picks, 1.0 / pi[picks]
+
+
+def _draw(df: pd.DataFrame, n: int, rng: np.random.Generator, weight_column: Optional[str], replace: bool) -> pd.DataFrame:
+    if weight_column is None:
+        out = df.sample(n=n, replace=replace, random_state=rng)
+        return out.assign(**{WEIGHT_COLUMN: len(df) / n})
+    size = pd.to_numeric(df[weight_column], errors="coerce").to_numpy(dtype=float)
+    picks, weights = pps_sample(size, n, rng, replace=replace)
+    return df.iloc[picks].assign(**{WEIGHT_COLUMN: weights})
+
+
+def draw_sample(
+    df: pd.DataFrame,
+    n: int,
+    *,
+    seed: Optional[int] = None,
+    stratify_by: Optional[str] = None,
+    allocation: str = "proportional",
+    stratum_sd: Optional[Mapping[str, float]] = None,
+    weight_column: Optional[str] = None,
+    replace: bool = False,
+) -> pd.DataFrame:
+    """Stratified and/or PPS sample of `df` with design weights.
+
+    Args:
+        df: Full dataset.
+        n: Total sample size.
+        seed: Random seed (the draw is deterministic for a given seed).
+        stratify_by: Category column to stratify by (None = one stratum).
+        allocation: "proportional" or "neyman" (see `allocate`).
+        stratum_sd: Per-stratum standard deviation for Neyman allocation.
+        weight_column: Positive numeric column; rows are drawn with
+            probability proportional to it (None = equal probability).
+        replace: Sample with replacement.
+
+    Returns:
+        Sampled rows (index reset, shuffled) with `sample_weight` and, when
+        stratified, `stratum` columns; the design is in `attrs["sampling"]`.
+
+    Raises:
+        ValueError: On missing columns, invalid weights or impossible sizes.
+    """
+    for col in (stratify_by, weight_column):
+        if col is not None and col not in df.columns:
+            raise ValueError(f"Sampling column {col!r} not in dataset")
+    rng = np.random.default_rng(seed)
+
+    strata: dict[str, Any] = {}
+    if stratify_by is None:
+        parts = [_draw(df, n, rng, weight_column, replace)]
+    else:
+        labels = df[stratify_by].astype("string").fillna("<missing>")
+        groups = {str(h): g for h, g in df.groupby(labels, sort=True)}
+        sizes = {h: len(g) for h, g in groups.items()}
+        alloc = allocate(sizes, n, allocation=allocation, sd=stratum_sd, replace=replace)
+        parts = [
+            _draw(groups[h], alloc[h], rng, weight_column, replace).assign(**{STRATUM_COLUMN: h})
+            for h in sizes
+        ]
+        strata = {h: {"population": sizes[h], "sampled": alloc[h]} for h in sizes}
+
+    sampled = pd.concat(parts)
+    # strata come out in blocks; shuffle so row order carries no design information
+    sampled = sampled.sample(frac=1.0, random_state=rng).reset_index(drop=True)
+    sampled.attrs["sampling"] = {
+        "strategy": "stratified" if stratify_by else "pps",
+        "stratify_by": stratify_by,
+        "allocation": allocation if stratify_by else None,
+        "weight_column": weight_column,
+        "replace": replace,
+        "seed": seed,
+        "population": len(df),
+        "strata": strata or None,
+    }
+    return sampled
+
+
+def stratum_sd(df: pd.DataFrame, by: str, column: str = "is_correct") -> dict[str, float]:
+    """Per-stratum standard deviation of `column`, for Neyman allocation.
+
+    Typically computed from the judged results of an earlier (pilot) run:
+    `stratum_sd(load_dataset("judged.csv"), "category")`.
+    """
+    if by not in df.columns or column not in df.columns:
+        raise ValueError(f"Need columns {by!r} and {column!r} to estimate stratum_sd")
+    values = pd.to_numeric(df[column], errors="coerce")
+    labels = df[by].astype("string").fillna("<missing>")
+    sd = values.groupby(labels).std(ddof=1)
+    return {str(h): float(s) if pd.notna(s) else 0.0 for h, s in sd.items()}
@@ -0,0 +1,419 @@
+# scheduler.py
+"""
+Fair multi-tenant scheduler for concurrent benchmark submissions.
+
+Jobs are pipeline invocations described by a JSON-serializable spec. A
+user-supplied `job_factory(spec)` turns a spec into keyword arguments for
+`run_benchmark_pipeline` (task, model_under_test, judge, evaluator, ...).
+
+Every model call made by a job goes through a per-model FairLimiter that
+enforces a global concurrency cap and request-rate budget shared by all
+jobs. Free slots are granted to the waiting job with the highest priority,
+then the lowest weighted usage (calls / weight), so concurrent jobs share
+the API quota fairly.
+
+Job state is persisted to a JSON file on every change; on restart queued
+jobs are kept and jobs that were running are re-queued.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from errors import ConfigurationError, JobCancelledError
+from utils import PathLike
+
+logger = logging.getLogger(__name__)
+
+JobFactory = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class FairLimiter:
+    """
+    Concurrency + rate limiter shared by all jobs calling one model.
+
+    Args:
+        max_concurrency: Maximum calls in flight across all jobs.
+        rate_per_s: Maximum call starts per second (None = unlimited).
+    """
+
+    def __init__(self, max_concurrency: int, rate_per_s: Optional[float] = None) -> None:
+        if max_concurrency < 1:
+            raise ConfigurationError("max_concurrency must be >= 1")
+        if rate_per_s is not None and rate_per_s <= 0:
+            raise ConfigurationError("rate_per_s must be > 0 or None")
+        self.max_concurrency = max_concurrency
+        self.rate_per_s = rate_per_s
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._tokens = float(max(1.0, rate_per_s or 1.0))
+        self._last_refill = time.monotonic()
+        self._vtime: dict[str, float] = {}
+        self._weights: dict[str, float] = {}
+        self._priorities: dict[str, int] = {}
+        self._waiting: dict[int, str] = {}  # ticket -> job_id
+        self._tickets = itertools.count()
+
+    def register(self, job_id: str, weight: float, priority: int) -> None:
+        with self._cond:
+            self._weights[job_id] = weight
+            self._priorities[job_id] = priority
+            # join at the current minimum so a new job neither starves nor is starved
+            self._vtime[job_id] = min(self._vtime.values(), default=0.0)
+
+    def unregister(self, job_id: str) -> None:
+        with self._cond:
+            self._vtime.pop(job_id, None)
+            self._weights.pop(job_id, None)
+            self._priorities.pop(job_id, None)
+            self._cond.notify_all()
+
+    def _refill(self) -> None:
+        if self.rate_per_s is None:
+            return
+        now = time.monotonic()
+        burst = max(1.0, self.rate_per_s)
+        self._tokens = min(burst, self._tokens + (now - self._last_refill) * self.rate_per_s)
+        self._last_refill = now
+
+    def _next_ticket(self) -> Optional[int]:
+        if not self._waiting:
+            return None
+        return min(
+            self._waiting,
+            key=lambda t: (-self._priorities.get(self._waiting[t], 0), self._vtime.get(self._waiting[t], 0.0), t),
+        )
+
+    def acquire(self, job_id: str, cancelled: Callable[[], bool] = lambda: False) -> None:
+        with self._cond:
+            ticket = next(self._tickets)
+            self._waiting[ticket] = job_id
+            try:
+                while True:
+                    if cancelled():
+                        raise JobCancelledError(f"Job {job_id} cancelled")
+                    self._refill()
+                    wait: Optional[float] = 0.5
+                    if self._next_ticket() == ticket and self._in_flight < self.max_concurrency:
+                        if self.rate_per_s is None or self._tokens >= 1.0:
+                            break
+                        wait = (1.0 - self._tokens) / self.rate_per_s
+                    self._cond.wait(timeout=wait)
+            finally:
+                del self._waiting[ticket]
+            if self.rate_per_s is not None:
+                self._tokens -= 1.0
+            self._in_flight += 1
+            self._vtime[job_id] = self._vtime.get(job_id, 0.0) + 1.0 / self._weights.get(job_id, 1.0)
+            self._cond.notify_all()
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+
+class ThrottledModel:
+    """Model proxy that routes generate/generate_batch/score_choices calls of one job through a FairLimiter."""
+
+    def __init__(self, model: Any, limiter: FairLimiter, job_id: str, cancelled: Callable[[], bool]) -> None:
+        self._model = model
+        self._limiter = limiter
+        self._job_id = job_id
+        self._cancelled = cancelled
+
+    def generate(self, prompt: str, **kwargs: Any) -> str:
+        self._limiter.acquire(self._job_id, self._cancelled)
+        try:
+            return self._model.generate(prompt, **kwargs)
+        finally:
+            self._limiter.release()
+
+    def generate_batch(self, prompts: Any, **kwargs: Any) -> list[str]:
+        # a batch holds one slot: the backend sends it as one unit of work
+        self._limiter.acquire(self._job_id, self._cancelled)
+        try:
+            return self._model.generate_batch(prompts, **kwargs)
+        finally:
+            self._limiter.release()
+
+    def score_choices(self, prompt: str, choices: Any, **kwargs: Any) -> Any:
+        self._limiter.acquire(self._job_id, self._cancelled)
+        try:
+            return self._model.score_choices(prompt, choices, **kwargs)
+        finally:
+            self._limiter.release()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+
+
+class JobScheduler:
+    """
+    Queue of pipeline jobs with fair sharing of per-model API budgets.
+
+    Args:
+        job_factory: spec -> run_benchmark_pipeline kwargs.
+        state_path: JSON file where job state is persisted.
+        max_parallel_jobs: How many jobs run at the same time.
+        model_limits: {model_name: {"max_concurrency": int, "rate_per_s": float}}.
+                      Models without an entry use `default_limit`.
+        default_limit: Limits for models not listed in `model_limits`.
+        pipeline_fn: Pipeline to call (defaults to pipeline.run_benchmark_pipeline).
+    """
+
+    def __init__(
+        self,
+        job_factory: JobFactory,
+        state_path: PathLike = Path("outputs") / "scheduler" / "jobs.json",
+        *,
+        max_parallel_jobs: int = 4,
+        model_limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        default_limit: Optional[Dict[str, Any]] = None,
+        pipeline_fn: Optional[Callable[..., Dict[str, Any]]] = None,
+    ) -> None:
+        if max_parallel_jobs < 1:
+            raise ConfigurationError("max_parallel_jobs must be >= 1")
+        self.job_factory = job_factory
+        self.state_path = Path(state_path)
+        self.max_parallel_jobs = max_parallel_jobs
+        self.model_limits = model_limits or {}
+        self.default_limit = default_limit or {"max_concurrency": 8, "rate_per_s": None}
+        self._pipeline_fn = pipeline_fn
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._jobs: dict[str, dict[str, Any]] = {}
+        self._cancel_flags: dict[str, threading.Event] = {}
+        self._limiters: dict[str, FairLimiter] = {}
+        self._workers: list[threading.Thread] = []
+        self._stopping = False
+        self._seq = itertools.count()
+        self._load_state()
+
+    # ---------- persistence ----------
+
+    def _load_state(self) -> None:
+        if not self.state_path.exists():
+            return
+        with open(self.state_path, encoding="utf-8") as f:
+            jobs = json.load(f).get("jobs", [])
+        for job in jobs:
+            if job["state"] == RUNNING:
+                # pipelines are not resumable mid-run; start them again
+                job["state"] = QUEUED
+                logger.info("Re-queueing job %s interrupted by a restart", job["job_id"])
+            self._jobs[job["job_id"]] = job
+            self._cancel_flags[job["job_id"]] = threading.Event()
+        self._seq = itertools.count(max((j["seq"] for j in jobs), default=-1) + 1)
+        logger.info("Loaded %d job(s) from %s", len(jobs), self.state_path)
+
+    def _save_state_locked(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"jobs": sorted(self._jobs.values(), key=lambda j: j["seq"])}, f, indent=2, default=str)
+        os.replace(tmp, self.state_path)
+
+    # ---------- public API ----------
+
+    def submit(self, spec: Dict[str, Any], *, weight: float = 1.0, priority: int = 0, owner: str | None = None) -> str:
+        """Queue a job and return its id. Higher priority runs first; weight sets the fair share."""
+        if weight <= 0:
+            raise ConfigurationError("weight must be > 0")
+        try:
+            json.dumps(spec)
+        except TypeError as exc:
+            raise ConfigurationError(f"Job spec must be JSON-serializable: {exc}") from exc
+
+        job_id = time.strftime("%Y%m%d%H%M%S", time.localtime()) + "-" + uuid.uuid4().hex[:8]
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "seq": next(self._seq),
+                "owner": owner,
+                "spec": spec,
+                "weight": weight,
+                "priority": priority,
+                "state": QUEUED,
+                "attempts": 0,
+                "submitted_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._cancel_flags[job_id] = threading.Event()
+            self._save_state_locked()
+            self._wakeup.notify_all()
+        logger.info("Submitted job %s (priority=%d, weight=%s)", job_id, priority, weight)
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it already finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job["state"] in FINISHED_STATES:
+                return False
+            self._cancel_flags[job_id].set()
+            if job["state"] == QUEUED:
+                job["state"] = CANCELLED
+                job["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime())
+            self._save_state_locked()
+        logger.info("Cancellation requested for job %s", job_id)
+        return True
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._jobs[job_id])
+
+    def list_jobs(self) -> list[Dict[str, Any]]:
+        with self._lock:
+            return [dict(j) for j in sorted(self._jobs.values(), key=lambda j: j["seq"])]
+
+    def start(self) -> "JobScheduler":
+        with self._lock:
+            self._stopping = False
+        for i in range(self.max_parallel_jobs):
+            t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+        return self
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop taking new jobs; running jobs finish (or are re-queued on next start if not waited for)."""
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify_all()
+        if wait:
+            for t in self._workers:
+                t.join()
+        self._workers.clear()
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._jobs[job_id]["state"] not in FINISHED_STATES:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._wakeup.wait(timeout=remaining)
+            return dict(self._jobs[job_id])
+
+    # ---------- execution ----------
+
+    def _limiter_for(self, model_name: str) -> FairLimiter:
+        with self._lock:
+            lim = self._limiters.get(model_name)
+            if lim is None:
+                cfg = {**self.default_limit, **self.model_limits.get(model_name, {})}
+                lim = FairLimiter(cfg["max_concurrency"], cfg.get("rate_per_s"))
+                self._limiters[model_name] = lim
+            return lim
+
+    def _throttle(self, model: Any, job: Dict[str, Any], used: list[FairLimiter]) -> ThrottledModel:
+        if isinstance(model, ThrottledModel):
+            # already throttled for another job: throttle the real model for this one
+            model = model._model
+        limiter = self._limiter_for(model.get_name())
+        limiter.register(job["job_id"], job["weight"], job["priority"])
+        used.append(limiter)
+        flag = self._cancel_flags[job["job_id"]]
+        return ThrottledModel(model, limiter, job["job_id"], flag.is_set)
+
+    def _throttle_judge(
+        self, judge: Any, job: Dict[str, Any], used: list[FairLimiter], wrapped: Dict[int, ThrottledModel]
+    ) -> None:
+        """
+        Throttle the model of `judge` and of every sub-judge (ensemble members,
+        cascade LLM) in place; callers pass the job's own judge.copy().
+        """
+        model = getattr(judge, "model", None)
+        if model is not None:
+            # a model shared by several sub-judges gets one wrapper, not nested ones
+            if id(model) not in wrapped:
+                wrapped[id(model)] = self._throttle(model, job, used)
+            judge.model = wrapped[id(model)]
+        for member in (getattr(judge, "judges", None) or {}).values():
+            self._throttle_judge(member, job, used, wrapped)
+        if getattr(judge, "llm_judge", None) is not None:
+            self._throttle_judge(judge.llm_judge, job, used, wrapped)
+
+    def _next_job_locked(self) -> Optional[Dict[str, Any]]:
+        queued = [j for j in self._jobs.values() if j["state"] == QUEUED]
+        if not queued:
+            return None
+        return min(queued, key=lambda j: (-j["priority"], j["seq"]))
+
+    def _worker(self) -> None:
+        while True:
+            with self._lock:
+                job = self._next_job_locked()
+                while job is None and not self._stopping:
+                    self._wakeup.wait()
+                    job = self._next_job_locked()
+                if self._stopping:
+                    return
+                job["state"] = RUNNING
+                job["attempts"] += 1
+                job["started_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime())
+                self._save_state_locked()
+            self._run_job(job)
+
+    def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id = job["job_id"]
+        used: list[FairLimiter] = []
+        result = error = None
+        try:
+            kwargs = dict(self.job_factory(job["spec"]))
+            kwargs["model_under_test"] = self._throttle(kwargs["model_under_test"], job, used)
+            if kwargs.get("judge") is not None:
+                # the factory may hand the same judge to several jobs: throttle a copy
+                kwargs["judge"] = kwargs["judge"].copy()
+                self._throttle_judge(kwargs["judge"], job, used, {})
+
+            pipeline_fn = self._pipeline_fn
+            if pipeline_fn is None:
+                from pipeline import run_benchmark_pipeline as pipeline_fn
+
+            out = pipeline_fn(**kwargs)
+            result = {k: v for k, v in out.items() if k != "meta"}
+            result["run_id"] = out["meta"]["run_id"]
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            if not self._cancel_flags[job_id].is_set():
+                logger.error("Job %s failed: %s\n%s", job_id, exc, traceback.format_exc())
+        finally:
+            for lim in used:
+                lim.unregister(job_id)
+
+        with self._lock:
+            if self._cancel_flags[job_id].is_set():
+                job["state"] = CANCELLED
+            elif error is not None:
+                job["state"] = FAILED
+            else:
+                job["state"] = SUCCEEDED
+            job["result"] = result
+            job["error"] = error
+            job["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime())
+            self._save_state_locked()
+            self._wakeup.notify_all()
+        logger.info("Job %s finished: %s", job_id, job["state"])
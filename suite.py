@@ -0,0 +1,651 @@
+# suite.py
+"""
+Declarative benchmark suites executed as a dependency graph.
+
+A suite spec (TOML, or YAML when PyYAML is installed) names models, tasks,
+judges and evaluators and lists the runs to combine them:
+
+    [suite]
+    name = "contains-demo"
+    max_workers = 4
+
+    [models.nano]
+    model = "gpt-5-nano"
+    params = { reasoning_effort = "minimal" }
+    max_concurrency = 8          # global limit shared by every node using this model
+
+    [tasks.contains]
+    type = "with_true_answer"
+    dataset = "contains_test.csv"  # relative to the spec file
+    sample_size = 10
+    # optional: stratify_by = "category", allocation = "neyman",
+    #           stratum_sd = { easy = 0.2, hard = 0.5 }, weight_column = "difficulty"
+
+    [judges.contains]
+    type = "contains"
+
+    [evaluators.accuracy]
+    type = "accuracy"
+    slices = ["category", "latency_ms"]  # optional per-slice breakdowns
+
+    [[runs]]
+    task = "contains"
+    models = ["nano"]
+    judges = ["contains"]
+    evaluators = ["accuracy"]
+    concurrency = 8
+    timeout = 60                 # per-call deadline (s)
+    hedge = { quantile = 0.95, max_extra = 0.05 }
+    preflight = { context_limit = 128000, pilot_size = 10, price_per_mtok = [0.05, 0.40], max_cost_usd = 1.0 }
+
+The spec compiles into sample → infer → judge → evaluate nodes. Identical
+nodes are merged, so one dataset sample is shared by all models of a
+task and one inference run by all judges of a (task, model). Independent
+nodes run concurrently (suite.max_workers) and model calls go through
+one FairLimiter per model.
+
+Each node is keyed by a content hash of its configuration and of its
+inputs (dataset file bytes for sampling). Finished nodes are cached under
+outputs/suite_cache/; re-running an unchanged suite skips them, and
+upstream nodes are only executed when a dependent actually needs them.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import pickle
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from errors import ConfigurationError
+
+if TYPE_CHECKING:
+    from evaluators import BaseEvaluator
+    from judges import BaseJudge
+    from utils import PathLike
+
+logger = logging.getLogger(__name__)
+
+# bump when node artifacts change shape, to invalidate old cache entries
+CACHE_VERSION = 1
+
+STRING_JUDGES = ("equals", "contains", "json", "mcq", "fuzzy")
+LLM_JUDGES = ("bool", "score")
+COMPOSITE_JUDGES = ("ensemble", "cascade")
+EVALUATORS = ("accuracy", "score", "agreement", "calibration", "pass_at_k")
+
+RUN_OPTIONS = (
+    "concurrency", "dedupe", "prefix_cache_layout", "mcq_scoring", "batch_size", "measure_k", "timeout", "hedge",
+    "n_samples", "preflight",
+)
+# judge settings that only change how fast verdicts arrive
+JUDGE_RUNTIME_OPTIONS = ("timeout", "hedge", "concurrency")
+# task keys that change which rows are sampled
+SAMPLING_OPTIONS = ("stratify_by", "allocation", "stratum_sd", "weight_column")
+# options that change what inference produces (the rest only change how fast)
+INFERENCE_KEY_OPTIONS = ("prefix_cache_layout", "mcq_scoring", "dedupe")
+
+SAMPLE, INFER, JUDGE, EVALUATE = "sample", "infer", "judge", "evaluate"
+
+
+# ---------- factories ----------
+
+def build_judge(
+    kind: str,
+    *,
+    model: Any = None,
+    prompt: Optional[str] = None,
+    members: Optional[Dict[str, "BaseJudge"]] = None,
+    llm: Optional["BaseJudge"] = None,
+    **options: Any,
+) -> "BaseJudge":
+    """
+    Instantiate a judge by its spec/CLI name.
+
+    Args:
+        kind: One of STRING_JUDGES, LLM_JUDGES or COMPOSITE_JUDGES.
+        model: Judge model (bool/score).
+        prompt: Evaluation prompt (bool/score).
+        members: Member judges by name (ensemble).
+        llm: LLM judge behind the string tiers (cascade).
+        **options: Extra constructor arguments (e.g. max_retries, primary, policy).
+    """
+    if kind == "json":
+        from judges.JSONequality import JSONEquals
+        return JSONEquals(**options)
+    if kind in STRING_JUDGES:
+        import judges
+        return {
+            "equals": judges.Equals,
+            "contains": judges.Contains,
+            "mcq": judges.MCQExtract,
+            "fuzzy": judges.FuzzyMatch,
+        }[kind](**options)
+    if kind in LLM_JUDGES:
+        if model is None or not prompt:
+            raise ConfigurationError(f"Judge type {kind!r} needs a model and a prompt")
+        from judges import PromptBasedBoolean, PromptBasedScore
+        cls = PromptBasedBoolean if kind == "bool" else PromptBasedScore
+        return cls(model, prompt, **options)
+    if kind == "ensemble":
+        if not members:
+            raise ConfigurationError("Judge type 'ensemble' needs members")
+        from judges import EnsembleJudge
+        return EnsembleJudge(members, **options)
+    if kind == "cascade":
+        if llm is None:
+            raise ConfigurationError("Judge type 'cascade' needs an llm judge")
+        from judges import CascadeJudge
+        return CascadeJudge(llm, **options)
+    raise ConfigurationError(
+        f"Unknown judge type {kind!r}; expected one of {STRING_JUDGES + LLM_JUDGES + COMPOSITE_JUDGES}"
+    )
+
+
+def build_evaluator(kind: str, **options: Any) -> "BaseEvaluator":
+    """Instantiate an evaluator by its spec/CLI name."""
+    import evaluators
+
+    classes = {
+        "accuracy": evaluators.AccuracyEvaluator,
+        "score": evaluators.ScoreEvaluator,
+        "agreement": evaluators.AgreementEvaluator,
+        "calibration": evaluators.CalibrationEvaluator,
+        "pass_at_k": evaluators.PassAtKEvaluator,
+    }
+    if kind not in classes:
+        raise ConfigurationError(f"Unknown evaluator type {kind!r}; expected one of {EVALUATORS}")
+    return classes[kind](**options)
+
+
+# ---------- spec loading ----------
+
+def load_suite_spec(path: PathLike) -> Dict[str, Any]:
+    """Parse a suite spec file (.toml, or .yaml/.yml with PyYAML installed)."""
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"Suite spec not found: {p}")
+    ext = p.suffix.lower()
+    if ext == ".toml":
+        import tomllib
+        with open(p, "rb") as f:
+            return tomllib.load(f)
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ConfigurationError("YAML suite specs need the optional 'pyyaml' package") from e
+        with open(p, encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    raise ConfigurationError(f"Unsupported suite spec extension: {ext} (use .toml or .yaml)")
+
+
+def _digest(payload: Any) -> str:
+    blob = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:24]
+
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class SuiteNode:
+    """One stage of the suite graph (sample, infer, judge or evaluate)."""
+
+    __slots__ = ("key", "kind", "label", "deps", "config", "status", "error", "duration_s", "artifacts")
+
+    def __init__(self, key: str, kind: str, label: str, deps: tuple[str, ...], config: Dict[str, Any]) -> None:
+        self.key = key
+        self.kind = kind
+        self.label = label
+        self.deps = deps
+        self.config = config
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.duration_s: Optional[float] = None
+        self.artifacts: Dict[str, Any] = {}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "node": self.label,
+            "kind": self.kind,
+            "hash": self.key,
+            "status": self.status,
+            "duration_s": self.duration_s,
+            "error": self.error,
+            "artifacts": self.artifacts,
+        }
+
+
+class BenchmarkSuite:
+    """
+    Compiles a suite spec into a graph of cached nodes and executes it.
+
+    Args:
+        spec: Parsed spec (see module docstring).
+        base_dir: Directory dataset paths are resolved against.
+        cache_dir: Where finished node artifacts are kept.
+        max_workers: Nodes executing at once (default: spec suite.max_workers or 4).
+    """
+
+    def __init__(
+        self,
+        spec: Dict[str, Any],
+        *,
+        base_dir: PathLike = ".",
+        cache_dir: PathLike = Path("outputs") / "suite_cache",
+        max_workers: Optional[int] = None,
+    ) -> None:
+        if not isinstance(spec, dict):
+            raise ConfigurationError("Suite spec must be a mapping")
+        self.spec = spec
+        suite_cfg = spec.get("suite") or {}
+        self.name = str(suite_cfg.get("name") or "suite")
+        self.base_dir = Path(base_dir)
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = int(max_workers or suite_cfg.get("max_workers") or 4)
+        if self.max_workers < 1:
+            raise ConfigurationError("max_workers must be >= 1")
+
+        self.models: Dict[str, Dict[str, Any]] = self._section("models")
+        self.tasks: Dict[str, Dict[str, Any]] = self._section("tasks")
+        self.judges: Dict[str, Dict[str, Any]] = self._section("judges")
+        self.evaluators: Dict[str, Dict[str, Any]] = self._section("evaluators")
+        self.nodes: Dict[str, SuiteNode] = {}
+        self._file_digests: Dict[Path, str] = {}
+        self._backends: Dict[str, Any] = {}
+        self._limiters: Dict[str, Any] = {}
+        self._values: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._compile()
+
+    @classmethod
+    def from_file(cls, path: PathLike, **kwargs: Any) -> "BenchmarkSuite":
+        """Load a spec file; relative dataset paths resolve against its directory."""
+        kwargs.setdefault("base_dir", Path(path).resolve().parent)
+        return cls(load_suite_spec(path), **kwargs)
+
+    def _section(self, name: str) -> Dict[str, Dict[str, Any]]:
+        section = self.spec.get(name) or {}
+        if not isinstance(section, dict) or not all(isinstance(v, dict) for v in section.values()):
+            raise ConfigurationError(f"Suite section [{name}] must map names to tables")
+        return section
+
+    # ---------- compile ----------
+
+    def _lookup(self, section: Dict[str, Dict[str, Any]], kind: str, name: str) -> Dict[str, Any]:
+        try:
+            return section[name]
+        except KeyError:
+            raise ConfigurationError(f"Unknown {kind} {name!r} (defined: {sorted(section)})") from None
+
+    def _model_identity(self, name: str) -> Dict[str, Any]:
+        cfg = self._lookup(self.models, "model", name)
+        # API keys and limits do not change answers, so they stay out of the hash
+        return {k: cfg.get(k) for k in ("model", "backend", "backend_options", "base_url", "params", "system_prompt")}
+
+    def _judge_identity(self, name: str, seen: tuple[str, ...] = ()) -> Dict[str, Any]:
+        if name in seen:
+            raise ConfigurationError(f"Judge {name!r} refers to itself")
+        cfg = dict(self._lookup(self.judges, "judge", name))
+        skip = ("model", "members", "llm") + JUDGE_RUNTIME_OPTIONS
+        identity: Dict[str, Any] = {k: v for k, v in cfg.items() if k not in skip}
+        if cfg.get("model"):
+            identity["model"] = self._model_identity(cfg["model"])
+        if cfg.get("members"):
+            identity["members"] = {m: self._judge_identity(m, seen + (name,)) for m in cfg["members"]}
+        if cfg.get("llm"):
+            identity["llm"] = self._judge_identity(cfg["llm"], seen + (name,))
+        return identity
+
+    def _dataset_digest(self, path: Path) -> str:
+        if path not in self._file_digests:
+            if not path.exists():
+                raise FileNotFoundError(f"Dataset not found: {path}")
+            self._file_digests[path] = _file_digest(path)
+        return self._file_digests[path]
+
+    def _add(self, kind: str, label: str, deps: tuple[str, ...], identity: Dict[str, Any], config: Dict[str, Any]) -> str:
+        key = _digest({"v": CACHE_VERSION, "kind": kind, "deps": deps, "identity": identity})
+        if key not in self.nodes:
+            self.nodes[key] = SuiteNode(key, kind, label, deps, config)
+        return key
+
+    def _compile(self) -> None:
+        runs = self.spec.get("runs") or []
+        if not isinstance(runs, list) or not runs:
+            raise ConfigurationError("Suite spec needs at least one [[runs]] entry")
+
+        for i, run in enumerate(runs):
+            task_name = run.get("task")
+            model_names = run.get("models") or ([run["model"]] if run.get("model") else [])
+            judge_names = run.get("judges") or ([run["judge"]] if run.get("judge") else [])
+            eval_names = run.get("evaluators") or ([run["evaluator"]] if run.get("evaluator") else [])
+            if not task_name or not model_names or not judge_names or not eval_names:
+                raise ConfigurationError(f"runs[{i}] needs task, models, judges and evaluators")
+            unknown = set(run) - {"task", "model", "models", "judge", "judges", "evaluator", "evaluators", *RUN_OPTIONS}
+            if unknown:
+                raise ConfigurationError(f"runs[{i}] has unknown keys: {sorted(unknown)}")
+            options = {k: run[k] for k in RUN_OPTIONS if k in run}
+
+            task_cfg = self._lookup(self.tasks, "task", task_name)
+            for key in ("type", "dataset", "sample_size"):
+                if key not in task_cfg:
+                    raise ConfigurationError(f"Task {task_name!r} needs {key!r}")
+            dataset = (self.base_dir / task_cfg["dataset"]).resolve()
+            seed = int(task_cfg.get("seed", 42))
+            sample_identity = {"dataset": self._dataset_digest(dataset), "size": task_cfg["sample_size"], "seed": seed}
+            sampling = {k: task_cfg[k] for k in SAMPLING_OPTIONS if k in task_cfg}
+            if sampling:
+                # only when set, so uniform samples keep their cache keys
+                sample_identity["sampling"] = sampling
+            sample_key = self._add(
+                SAMPLE, f"sample:{task_name}", (),
+                sample_identity,
+                {"task": task_name, "dataset": dataset, "seed": seed},
+            )
+
+            for model_name in model_names:
+                infer_key = self._add(
+                    INFER, f"infer:{task_name}/{model_name}", (sample_key,),
+                    {
+                        "task": {k: task_cfg.get(k) for k in ("type", "prompt_template")},
+                        "model": self._model_identity(model_name),
+                        "options": {k: options.get(k) for k in INFERENCE_KEY_OPTIONS},
+                        # only when set, so existing runs keep their cache keys
+                        **({"n_samples": options["n_samples"]} if options.get("n_samples") else {}),
+                        **({"preflight": options["preflight"]} if options.get("preflight") else {}),
+                    },
+                    {"task": task_name, "model": model_name, "options": options},
+                )
+                for judge_name in judge_names:
+                    judge_key = self._add(
+                        JUDGE, f"judge:{task_name}/{model_name}/{judge_name}", (infer_key,),
+                        self._judge_identity(judge_name),
+                        {"judge": judge_name},
+                    )
+                    for eval_name in eval_names:
+                        eval_cfg = self._lookup(self.evaluators, "evaluator", eval_name)
+                        self._add(
+                            EVALUATE, f"evaluate:{task_name}/{model_name}/{judge_name}/{eval_name}", (judge_key,),
+                            eval_cfg, {"evaluator": eval_name, "judge": judge_name},
+                        )
+        logger.info("Compiled suite %s: %d nodes", self.name, len(self.nodes))
+
+    # ---------- resources ----------
+
+    def _limiter(self, model_name: str) -> Any:
+        from scheduler import FairLimiter
+
+        with self._lock:
+            if model_name not in self._limiters:
+                cfg = self.models[model_name]
+                self._limiters[model_name] = FairLimiter(
+                    int(cfg.get("max_concurrency", 8)), cfg.get("rate_per_s")
+                )
+            return self._limiters[model_name]
+
+    def _model(self, model_name: str, job_id: str) -> Any:
+        """A Model for one node, throttled by the model's shared FairLimiter."""
+        import os
+        from backends import create_backend
+        from model import Model
+        from scheduler import ThrottledModel
+
+        cfg = self._lookup(self.models, "model", model_name)
+        backend_name = cfg.get("backend", "openai")
+        with self._lock:
+            # one backend per model spec: a local backend loads its weights once
+            if model_name not in self._backends:
+                options = dict(cfg.get("backend_options") or {})
+                if backend_name == "openai":
+                    options.setdefault("api_key", os.getenv(cfg.get("api_key_env", "OPENAI_API_KEY")))
+                    options.setdefault("base_url", cfg.get("base_url"))
+                self._backends[model_name] = create_backend(backend_name, **options)
+            backend = self._backends[model_name]
+        if "model" not in cfg:
+            raise ConfigurationError(f"Model {model_name!r} needs 'model' (the model identifier)")
+        model = Model(
+            cfg["model"],
+            system_prompt=cfg.get("system_prompt"),
+            params=cfg.get("params"),
+            base_url=cfg.get("base_url"),
+            backend=backend,
+        )
+        limiter = self._limiter(model_name)
+        limiter.register(job_id, weight=float(cfg.get("weight", 1.0)), priority=0)
+        return ThrottledModel(model, limiter, job_id, lambda: False)
+
+    def _judge(self, judge_name: str, job_id: str) -> "BaseJudge":
+        cfg = dict(self._lookup(self.judges, "judge", judge_name))
+        kind = cfg.pop("type", None)
+        if not kind:
+            raise ConfigurationError(f"Judge {judge_name!r} needs a 'type'")
+        model_name = cfg.pop("model", None)
+        members = cfg.pop("members", None)
+        llm = cfg.pop("llm", None)
+        if isinstance(cfg.get("hedge"), dict):
+            from hedging import HedgePolicy
+            cfg["hedge"] = HedgePolicy(**cfg["hedge"])
+        return build_judge(
+            kind,
+            model=self._model(model_name, job_id) if model_name else None,
+            prompt=cfg.pop("prompt", None),
+            members={m: self._judge(m, job_id) for m in members} if members else None,
+            llm=self._judge(llm, job_id) if llm else None,
+            **cfg,
+        )
+
+    def _release(self, job_id: str) -> None:
+        for limiter in list(self._limiters.values()):
+            limiter.unregister(job_id)
+
+    # ---------- cache ----------
+
+    def _cache_paths(self, node: SuiteNode) -> tuple[Path, Path]:
+        stem = self.cache_dir / f"{node.kind}-{node.key}"
+        return stem.with_suffix(".pkl"), stem.with_suffix(".json")
+
+    def _is_cached(self, node: SuiteNode) -> bool:
+        return all(p.exists() for p in self._cache_paths(node))
+
+    def _store(self, node: SuiteNode, value: Any) -> None:
+        data_path, info_path = self._cache_paths(node)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # write the value first: the .json marks the entry as complete
+        with open(data_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(info_path, "w", encoding="utf-8") as f:
+            json.dump({"node": node.label, "kind": node.kind, "artifacts": node.artifacts}, f, ensure_ascii=False, indent=4)
+
+    def _value(self, key: str) -> Any:
+        """Output of a finished node, loaded from the cache on first use."""
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+        with open(self._cache_paths(self.nodes[key])[0], "rb") as f:
+            value = pickle.load(f)
+        with self._lock:
+            return self._values.setdefault(key, value)
+
+    # ---------- execution ----------
+
+    def _execute(self, node: SuiteNode) -> Any:
+        cfg = node.config
+        if node.kind == SAMPLE:
+            from utils import sample_dataset
+
+            task_cfg = self.tasks[cfg["task"]]
+            sampling = {k: task_cfg[k] for k in SAMPLING_OPTIONS if k in task_cfg}
+            df = sample_dataset(cfg["dataset"], int(task_cfg["sample_size"]), cfg["seed"], **sampling)
+            node.artifacts = {"rows": len(df)}
+            return df
+
+        if node.kind == INFER:
+            from runner import Runner
+            from task import Task, TaskType
+
+            task_cfg = self.tasks[cfg["task"]]
+            sampled_df = self._value(node.deps[0])
+            task = Task.new(
+                TaskType(task_cfg["type"]),
+                self.nodes[node.deps[0]].config["dataset"],
+                int(task_cfg["sample_size"]),
+                prompt_template=task_cfg.get("prompt_template"),
+                seed=int(task_cfg.get("seed", 42)),
+                **{k: task_cfg[k] for k in SAMPLING_OPTIONS if k in task_cfg},
+            )
+            options = dict(cfg["options"])
+            measure_k = int(options.pop("measure_k", 25))
+            if isinstance(options.get("hedge"), dict):
+                from hedging import HedgePolicy
+                options["hedge"] = HedgePolicy(**options["hedge"])
+            if isinstance(options.get("preflight"), dict):
+                from preflight import PreflightPolicy
+                options["preflight"] = PreflightPolicy(**options["preflight"])
+            runner = Runner(self._model(cfg["model"], node.key), **options)
+            meta, df = runner.run(task, measure_k=measure_k, sampled_df=sampled_df.copy())
+            results_csv = runner.get_path(f"run_{meta['run_id']}.csv")
+            node.artifacts = {"run_id": meta["run_id"], "results_csv": str(results_csv)}
+            return {"meta": meta, "df": df, "run_dir": str(results_csv.parent)}
+
+        if node.kind == JUDGE:
+            run = self._value(node.deps[0])
+            meta = dict(run["meta"])
+            meta["suite"] = {"name": self.name, "node": node.label}
+            judged_csv = Path(run["run_dir"]) / f"judge_{meta['run_id']}_{cfg['judge']}.csv"
+            meta, df = self._judge(cfg["judge"], node.key).check_answers(meta, run["df"].copy(), str(judged_csv))
+            node.artifacts = {"judged_csv": str(judged_csv)}
+            return {"meta": meta, "df": df, "run_dir": run["run_dir"]}
+
+        if node.kind == EVALUATE:
+            judged = self._value(node.deps[0])
+            eval_cfg = dict(self.evaluators[cfg["evaluator"]])
+            kind = eval_cfg.pop("type", None)
+            if not kind:
+                raise ConfigurationError(f"Evaluator {cfg['evaluator']!r} needs a 'type'")
+            eval_json = Path(judged["run_dir"]) / f"eval_{judged['meta']['run_id']}_{cfg['judge']}_{cfg['evaluator']}.json"
+            result = build_evaluator(kind, **eval_cfg).compute(dict(judged["meta"]), judged["df"], str(eval_json))
+            node.artifacts = {"eval_json": str(eval_json)}
+            return result
+
+        raise ValueError(f"Unknown node kind: {node.kind}")
+
+    def _run_node(self, node: SuiteNode) -> None:
+        t0 = time.perf_counter()
+        try:
+            value = self._execute(node)
+        finally:
+            self._release(node.key)
+            node.duration_s = round(time.perf_counter() - t0, 3)
+        self._store(node, value)
+        with self._lock:
+            self._values[node.key] = value
+
+    def _needed(self, force: bool) -> set[str]:
+        """Nodes to execute: uncached nodes that are terminal or feed an executed node."""
+        children: Dict[str, list[str]] = {k: [] for k in self.nodes}
+        for node in self.nodes.values():
+            for dep in node.deps:
+                children[dep].append(node.key)
+        needed: set[str] = set()
+        # nodes are inserted parents-first, so reversed order visits children first
+        for key in reversed(list(self.nodes)):
+            node = self.nodes[key]
+            if not force and self._is_cached(node):
+                continue
+            if not children[key] or any(c in needed for c in children[key]):
+                needed.add(key)
+        return needed
+
+    def run(
+        self,
+        *,
+        force: bool = False,
+        on_node: Optional[Callable[[SuiteNode], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Execute the graph.
+
+        Args:
+            force: Ignore cached node outputs and run everything.
+            on_node: Called after each node finishes (any status).
+
+        Returns:
+            dict with "suite", "nodes" (per-node summaries in graph order),
+            "counts" (by status) and "summary_json" (written summary path).
+        """
+        needed = self._needed(force)
+        for node in self.nodes.values():
+            node.status = "pending" if node.key in needed else "cached"
+            if node.status == "cached":
+                _, info_path = self._cache_paths(node)
+                if info_path.exists():
+                    with open(info_path, encoding="utf-8") as f:
+                        node.artifacts = json.load(f).get("artifacts", {})
+        logger.info("Suite %s: %d/%d nodes to run", self.name, len(needed), len(self.nodes))
+
+        waiting = {k: {d for d in self.nodes[k].deps if d in needed} for k in needed}
+        running: Dict[Future, str] = {}
+        t0 = time.perf_counter()
+
+        def finish(key: str, status: str, error: Optional[str] = None) -> None:
+            node = self.nodes[key]
+            node.status, node.error = status, error
+            if on_node is not None:
+                on_node(node)
+            for child, deps in waiting.items():
+                if key in deps:
+                    deps.discard(key)
+                    if status != "ran" and self.nodes[child].status == "pending":
+                        finish(child, "skipped", f"upstream {node.label} {status}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                for key in [k for k, deps in waiting.items() if not deps and self.nodes[k].status == "pending"]:
+                    self.nodes[key].status = "running"
+                    running[pool.submit(self._run_node, self.nodes[key])] = key
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    key = running.pop(fut)
+                    exc = fut.exception()
+                    if exc is not None:
+                        logger.error("Suite node %s failed: %s", self.nodes[key].label, exc)
+                        finish(key, "failed", f"{type(exc).__name__}: {exc}")
+                    else:
+                        logger.info("Suite node %s done in %.2fs", self.nodes[key].label, self.nodes[key].duration_s)
+                        finish(key, "ran")
+
+        counts: Dict[str, int] = {}
+        for node in self.nodes.values():
+            counts[node.status] = counts.get(node.status, 0) + 1
+        result = {
+            "suite": self.name,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+            "elapsed_s": round(time.perf_counter() - t0, 3),
+            "counts": counts,
+            "nodes": [n.summary() for n in self.nodes.values()],
+        }
+        out_dir = Path("outputs") / "suites"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        summary_json = out_dir / f"{self.name}_{time.strftime('%Y%m%d%H%M%S')}.json"
+        with open(summary_json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=4)
+        result["summary_json"] = str(summary_json)
+        logger.info("Suite %s finished: %s", self.name, counts)
+        return result
+
+
+def run_suite(path: PathLike, *, force: bool = False, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """Load, compile and execute the suite spec at `path`."""
+    return BenchmarkSuite.from_file(path, max_workers=max_workers).run(force=force)
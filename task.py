@@ -6,6 +6,7 @@ import logging
 import uuid
 from enum import StrEnum
 from pathlib import Path
+from typing import Mapping
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,10 @@ class Task:
         seed: Random seed (default 42).
         prompt_template: Optional user-instruction part appended to the question
                          (and options for MCQ) in the user prompt.
+        stratify_by: Optional category column for stratified sampling.
+        allocation: "proportional" or "neyman" allocation across strata.
+        stratum_sd: Per-stratum metric standard deviation (Neyman allocation).
+        weight_column: Optional numeric column for importance (PPS) sampling.
     """
 
     def __init__(
@@ -40,6 +45,11 @@ class Task:
         sample_size: int,
         prompt_template: str | None = None,
         seed: int = 42,
+        *,
+        stratify_by: str | None = None,
+        allocation: str = "proportional",
+        stratum_sd: Mapping[str, float] | None = None,
+        weight_column: str | None = None,
     ) -> None:
         if not id or not isinstance(id, str):
             raise ValueError("Task.id must be a non-empty string")
@@ -53,6 +63,10 @@ class Task:
             raise ValueError("sample_size must be a positive integer")
         if not isinstance(seed, int):
             raise ValueError("seed must be an integer")
+        if allocation not in ("proportional", "neyman"):
+            raise ValueError("allocation must be 'proportional' or 'neyman'")
+        if allocation == "neyman" and (not stratify_by or not stratum_sd):
+            raise ValueError("neyman allocation needs stratify_by and stratum_sd")
 
         self.id = id
         self.type = type
@@ -61,6 +75,10 @@ class Task:
         self.sample_size = sample_size
         self.prompt_template = prompt_template
         self.seed = seed
+        self.stratify_by = stratify_by
+        self.allocation = allocation
+        self.stratum_sd = dict(stratum_sd) if stratum_sd else None
+        self.weight_column = weight_column
 
         logger.info(
             "Created Task(id=%s, type=%s, dataset=%s, sample=%d)",
@@ -92,8 +110,14 @@ class Task:
         sample_size: int,
         prompt_template: str | None = None,
         seed: int = 42,
+        **sampling,
     ) -> "Task":
-        """Create a new Task with timestamp-based id and given dataset/specs."""
+        """
+        Create a new Task with timestamp-based id and given dataset/specs.
+
+        `sampling` takes the keyword-only sampling options of `Task`
+        (stratify_by, allocation, stratum_sd, weight_column).
+        """
         if not isinstance(task_type, TaskType):
             raise ValueError("task_type must be a TaskType")
 
@@ -113,4 +137,5 @@ class Task:
             sample_size=sample_size,
             prompt_template=prompt_template,
             seed=seed,
+            **sampling,
         )
@@ -0,0 +1,295 @@
+# telemetry.py
+"""
+Live progress and throughput telemetry for long runs.
+
+A RunMonitor is fed by Runner and the LLM judges (request start/finish,
+rows completed, errors, retries) and exposes a snapshot with rows done,
+in-flight requests, current RPS, rolling p50/p99 latency and ETA via:
+  - a status JSON rewritten periodically in the run directory
+  - an optional Prometheus-text HTTP endpoint (/metrics, plus /status as JSON)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(sorted_vals: list[float], q: float) -> Optional[float]:
+    if not sorted_vals:
+        return None
+    idx = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[idx]
+
+
+class _NoopTracker:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NOOP_TRACKER = _NoopTracker()
+
+
+class _RequestTracker:
+    __slots__ = ("monitor", "row", "t0")
+
+    def __init__(self, monitor: "RunMonitor", row: bool) -> None:
+        self.monitor = monitor
+        self.row = row
+        self.t0 = 0.0
+
+    def __enter__(self) -> None:
+        self.monitor.request_started()
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        self.monitor.request_finished((time.perf_counter() - self.t0) * 1000.0, ok=exc_type is None)
+        if self.row:
+            self.monitor.row_completed()
+
+
+def track_request(monitor: Optional["RunMonitor"], row: bool = True) -> _RequestTracker | _NoopTracker:
+    """Report one request (start, latency, outcome) to `monitor`, if any.
+
+    With row=True the request also marks one row as completed; retries pass False.
+    """
+    if monitor is None:
+        return _NOOP_TRACKER
+    return _RequestTracker(monitor, row)
+
+
+class RunMonitor:
+    """
+    Thread-safe progress counters for one run (inference and judging stages).
+
+    Args:
+        status_interval_s: Rewrite status.json in the run dir this often (None = off).
+        metrics_port: Serve Prometheus metrics on this port (None = off, 0 = any free port).
+        window_s: Window for RPS and ETA estimation.
+        latency_window: Number of most recent latencies used for p50/p99.
+    """
+
+    def __init__(
+        self,
+        status_interval_s: Optional[float] = 5.0,
+        metrics_port: Optional[int] = None,
+        window_s: float = 30.0,
+        latency_window: int = 1000,
+    ) -> None:
+        if status_interval_s is not None and status_interval_s <= 0:
+            raise ValueError("status_interval_s must be > 0 or None")
+        self.status_interval_s = status_interval_s
+        self.metrics_port = metrics_port
+        self.window_s = window_s
+
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._done_times: deque[float] = deque()
+        self._stages: list[dict[str, Any]] = []
+        self._reset_stage("idle", 0)
+
+        self._status_path: Optional[Path] = None
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+        if metrics_port is not None:
+            self._serve(metrics_port)
+
+    # ---------- counters ----------
+
+    def _reset_stage(self, stage: str, total: int) -> None:
+        self.stage = stage
+        self.rows_total = total
+        self.rows_completed = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.stage_started = time.monotonic()
+        self._latencies.clear()
+        self._done_times.clear()
+
+    def start_stage(self, stage: str, total: int) -> None:
+        """Begin a new stage (e.g. "inference", "judge:PromptBasedBoolean")."""
+        with self._lock:
+            if self.stage != "idle":
+                self._stages.append(self._snapshot_locked())
+            self._reset_stage(stage, total)
+        logger.info("Stage started: %s (%d rows)", stage, total)
+        self.write_status()
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+
+    def request_finished(self, latency_ms: float, ok: bool = True) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if ok:
+                self._latencies.append(latency_ms)
+            else:
+                self.errors += 1
+
+    def record_retry(self, n: int = 1) -> None:
+        with self._lock:
+            self.retries += n
+
+    def row_completed(self, n: int = 1) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.rows_completed += n
+            self._done_times.extend([now] * n)
+
+    # ---------- reporting ----------
+
+    def _snapshot_locked(self) -> dict[str, Any]:
+        now = time.monotonic()
+        cutoff = now - self.window_s
+        while self._done_times and self._done_times[0] < cutoff:
+            self._done_times.popleft()
+        elapsed = now - self.stage_started
+        span = min(self.window_s, elapsed) or 1e-9
+        rps = len(self._done_times) / span
+        lat = sorted(self._latencies)
+        remaining = max(0, self.rows_total - self.rows_completed)
+        eta = remaining / rps if rps > 0 else None
+        p50, p99 = _percentile(lat, 0.50), _percentile(lat, 0.99)
+        return {
+            "stage": self.stage,
+            "rows_total": self.rows_total,
+            "rows_completed": self.rows_completed,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rps": round(rps, 3),
+            "latency_ms_p50": round(p50, 2) if p50 is not None else None,
+            "latency_ms_p99": round(p99, 2) if p99 is not None else None,
+            "elapsed_s": round(elapsed, 2),
+            "eta_s": round(eta, 1) if eta is not None else None,
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            current = self._snapshot_locked()
+            finished = list(self._stages)
+        return {"updated_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()), "current": current, "finished_stages": finished}
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            snap = self._snapshot_locked()
+        stage = snap["stage"].replace('"', "'")
+        metrics = [
+            ("benchmark_rows_total", "gauge", "Rows to process in the current stage", snap["rows_total"]),
+            ("benchmark_rows_completed", "gauge", "Rows completed in the current stage", snap["rows_completed"]),
+            ("benchmark_in_flight_requests", "gauge", "Model requests currently in flight", snap["in_flight"]),
+            ("benchmark_requests_total", "counter", "Model requests started in the current stage", snap["requests"]),
+            ("benchmark_errors_total", "counter", "Failed model requests in the current stage", snap["errors"]),
+            ("benchmark_retries_total", "counter", "Retried requests in the current stage", snap["retries"]),
+            ("benchmark_rows_per_second", "gauge", "Rows completed per second (rolling window)", snap["rps"]),
+            ("benchmark_latency_ms_p50", "gauge", "Rolling p50 request latency in ms", snap["latency_ms_p50"]),
+            ("benchmark_latency_ms_p99", "gauge", "Rolling p99 request latency in ms", snap["latency_ms_p99"]),
+            ("benchmark_eta_seconds", "gauge", "Estimated seconds until the stage finishes", snap["eta_s"]),
+        ]
+        lines = []
+        for name, kind, help_text, value in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f'{name}{{stage="{stage}"}} {"NaN" if value is None else value}')
+        return "\n".join(lines) + "\n"
+
+    # ---------- outputs ----------
+
+    def attach_run_dir(self, run_dir: Path) -> None:
+        """Start rewriting status.json in `run_dir` (if status_interval_s is set)."""
+        if self.status_interval_s is None or self._status_path is not None:
+            return
+        self._status_path = Path(run_dir) / "status.json"
+        self._writer = threading.Thread(target=self._write_loop, name="run-status-writer", daemon=True)
+        self._writer.start()
+
+    def write_status(self) -> None:
+        path = self._status_path
+        if path is None:
+            return
+        tmp = path.with_suffix(".json.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("Could not write status file %s: %s", path, exc)
+
+    def _write_loop(self) -> None:
+        while not self._stop.wait(self.status_interval_s):
+            self.write_status()
+            snap = self.snapshot()["current"]
+            logger.info(
+                "Progress [%s]: %d/%d rows, in_flight=%d, rps=%.2f, p50=%sms, eta=%ss",
+                snap["stage"], snap["rows_completed"], snap["rows_total"],
+                snap["in_flight"], snap["rps"], snap["latency_ms_p50"], snap["eta_s"],
+            )
+
+    def _serve(self, port: int) -> None:
+        monitor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 (http.server naming)
+                if self.path.startswith("/metrics"):
+                    body, ctype = monitor.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+                elif self.path.startswith("/status"):
+                    body, ctype = json.dumps(monitor.snapshot()).encode("utf-8"), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug("metrics: " + format, *args)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self.metrics_port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, name="run-metrics", daemon=True).start()
+        logger.info("Serving run metrics on http://127.0.0.1:%d/metrics", self.metrics_port)
+
+    def __enter__(self) -> "RunMonitor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Write a final status and stop background threads."""
+        with self._lock:
+            if self.stage != "idle":
+                self._stages.append(self._snapshot_locked())
+            self._reset_stage("finished", 0)
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.write_status()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
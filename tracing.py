@@ -0,0 +1,229 @@
+# tracing.py
+"""
+Lightweight tracing for per-stage timing of benchmark runs.
+
+Usage:
+    from tracing import span, tracing
+
+    with tracing() as tracer:
+        with span("runner.build_prompts", rows=n):
+            ...
+    meta["timings"] = tracer.summary()
+    tracer.export_chrome_trace("trace.json")
+
+When no tracer is active, `span(...)` returns a shared no-op object, so
+instrumented code pays only a context-variable lookup and a function call.
+
+The active tracer lives in a context variable, so pipelines running
+concurrently (scheduler jobs, suite nodes) each keep their own spans.
+Pool threads do not inherit it: work submitted to a pool is wrapped with
+`bind(fn)` to run under the submitting code's tracer.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("_tracer", "name", "attrs", "start_ns")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: dict[str, Any]) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = 0
+
+    def __enter__(self) -> "_Span":
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self._tracer._record(self.name, self.start_ns, end_ns, self.attrs)
+
+
+class Tracer:
+    """
+    Collects timing spans from any thread.
+
+    Per-name aggregates (count/total/max) are always kept; individual
+    events are kept up to `max_events` for trace export.
+    """
+
+    def __init__(self, max_events: int = 200_000) -> None:
+        self.max_events = max_events
+        self.dropped_events = 0
+        self._events: list[tuple[str, int, int, int, dict[str, Any]]] = []
+        self._stats: dict[str, list[float]] = {}  # name -> [count, total_ns, max_ns]
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._origin_unix_ns = time.time_ns()
+
+    def span(self, name: str, **attrs: Any) -> _Span:
+        return _Span(self, name, attrs)
+
+    def _record(self, name: str, start_ns: int, end_ns: int, attrs: dict[str, Any]) -> None:
+        dur = end_ns - start_ns
+        tid = threading.get_ident()
+        with self._lock:
+            st = self._stats.get(name)
+            if st is None:
+                self._stats[name] = [1, dur, dur]
+            else:
+                st[0] += 1
+                st[1] += dur
+                if dur > st[2]:
+                    st[2] = dur
+            if len(self._events) < self.max_events:
+                self._events.append((name, start_ns, end_ns, tid, attrs))
+            else:
+                self.dropped_events += 1
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        """Per-stage timing breakdown, JSON-serializable (suitable for meta)."""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda kv: -kv[1][1])
+            return {
+                name: {
+                    "count": int(count),
+                    "total_ms": round(total / 1e6, 3),
+                    "avg_ms": round(total / count / 1e6, 3),
+                    "max_ms": round(mx / 1e6, 3),
+                }
+                for name, (count, total, mx) in items
+            }
+
+    def export_chrome_trace(self, path: PathLike) -> Path:
+        """Write events in Chrome trace format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        with self._lock:
+            events = [
+                {
+                    "name": name,
+                    "cat": name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": (start - self._origin_ns) / 1000.0,
+                    "dur": (end - start) / 1000.0,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": attrs,
+                }
+                for name, start, end, tid, attrs in self._events
+            ]
+        out = Path(path)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        logger.info("Trace saved to %s (%d events, %d dropped)", out, len(events), self.dropped_events)
+        return out
+
+    def export_otlp_json(self, path: PathLike, service_name: str = "benchmarking-system") -> Path:
+        """Write events as an OTLP/JSON ExportTraceServiceRequest payload."""
+        trace_id = uuid.uuid4().hex
+        offset = self._origin_unix_ns - self._origin_ns
+        with self._lock:
+            spans = [
+                {
+                    "traceId": trace_id,
+                    "spanId": uuid.uuid4().hex[:16],
+                    "name": name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(start + offset),
+                    "endTimeUnixNano": str(end + offset),
+                    "attributes": [
+                        {"key": k, "value": {"stringValue": str(v)}} for k, v in {**attrs, "thread.id": tid}.items()
+                    ],
+                }
+                for name, start, end, tid, attrs in self._events
+            ]
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+                "scopeSpans": [{"scope": {"name": "tracing"}, "spans": spans}],
+            }]
+        }
+        out = Path(path)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        logger.info("OTLP trace saved to %s (%d spans)", out, len(spans))
+        return out
+
+
+_active: ContextVar[Optional[Tracer]] = ContextVar("active_tracer", default=None)
+
+
+def span(name: str, **attrs: Any) -> _Span | _NoopSpan:
+    """Time a block under `name` if a tracer is active; otherwise do nothing."""
+    tracer = _active.get()
+    if tracer is None:
+        return _NOOP_SPAN
+    return tracer.span(name, **attrs)
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _active.get()
+
+
+def bind(fn: F) -> F:
+    """`fn` running under the caller's active tracer, for work handed to pool threads."""
+    tracer = _active.get()
+    if tracer is None:
+        return fn
+
+    @wraps(fn)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        token = _active.set(tracer)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _active.reset(token)
+
+    return run  # type: ignore[return-value]
+
+
+@contextmanager
+def tracing(tracer: Optional[Tracer] = None) -> Iterator[Tracer]:
+    """Activate `tracer` (or a new one) for the duration of the block.
+
+    If a tracer is already active in this context it is reused, so nested
+    pipelines contribute to the outer trace.
+    """
+    current = _active.get()
+    if current is not None:
+        yield current
+        return
+    tracer = tracer or Tracer()
+    token = _active.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _active.reset(token)
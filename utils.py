@@ -1,12 +1,19 @@
 # utils.py
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+from collections import namedtuple
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
-from typing import Iterable, Optional, Sequence, Union
+from typing import Any, Iterable, Iterator, Mapping, NamedTuple, Optional, Sequence, Union
 
 import pandas as pd
 
+from tracing import span
+
 logger = logging.getLogger(__name__)
 
 PathLike = Union[str, Path]
@@ -32,15 +39,16 @@ def load_dataset(path: PathLike) -> pd.DataFrame:
 
     ext = p.suffix.lower()
     try:
-        if ext == ".parquet":
-            df = pd.read_parquet(p)
-        elif ext == ".csv":
-            df = pd.read_csv(p)
-        elif ext in {".jsonl", ".json"}:
-            # .jsonl => lines=True; .json => default behavior
-            df = pd.read_json(p, lines=(ext == ".jsonl"))
-        else:
-            raise ValueError(f"Unsupported dataset extension: {ext}")
+        with span("load_dataset", ext=ext):
+            if ext == ".parquet":
+                df = pd.read_parquet(p)
+            elif ext == ".csv":
+                df = pd.read_csv(p)
+            elif ext in {".jsonl", ".json"}:
+                # .jsonl => lines=True; .json => default behavior
+                df = pd.read_json(p, lines=(ext == ".jsonl"))
+            else:
+                raise ValueError(f"Unsupported dataset extension: {ext}")
     except Exception as exc:
         logger.error("Failed to read dataset %s: %s", p, exc)
         raise
@@ -68,6 +76,31 @@ def validate_required_columns(df: pd.DataFrame, required: Sequence[str]) -> None
     logger.debug("All required columns present: %s", list(required))
 
 
+@lru_cache(maxsize=64)
+def _row_type(columns: tuple[str, ...]) -> type:
+    return namedtuple("Row", columns, rename=True)
+
+
+def iter_rows(df: pd.DataFrame, columns: Sequence[str]) -> Iterator[NamedTuple]:
+    """Iterate over `columns` of `df` as lightweight named tuples.
+
+    Replaces `df.iterrows()` in per-row loops: values are read straight from
+    each column's array (no pandas Series per row, dtypes preserved) and
+    fields are accessed as attributes (`row.question`). Columns missing from
+    `df` yield None, like `Series.get`.
+
+    Args:
+        df: DataFrame to iterate.
+        columns: Column names to expose, in field order.
+
+    Returns:
+        Iterator of named tuples, one per row.
+    """
+    n = len(df)
+    arrays = [df[c].to_numpy() if c in df.columns else repeat(None, n) for c in columns]
+    return map(_row_type(tuple(columns))._make, zip(*arrays))
+
+
 def sample_dataset(
     path: PathLike,
     sample_size: int,
@@ -75,15 +108,28 @@ def sample_dataset(
     required_columns: Optional[Iterable[str]] = None,
     *,
     replace: bool = False,
+    stratify_by: Optional[str] = None,
+    allocation: str = "proportional",
+    stratum_sd: Optional[Mapping[str, float]] = None,
+    weight_column: Optional[str] = None,
 ) -> pd.DataFrame:
     """Load a dataset from disk and return a deterministic sample.
 
+    Uniform by default. With `stratify_by` and/or `weight_column` the sample
+    is drawn by `sampling.draw_sample` and carries `sample_weight` (and
+    `stratum`) columns that the evaluators use for reweighted metrics.
+
     Args:
         path: CSV/Parquet/JSON/JSONL file path.
         sample_size: Number of rows to sample (must be > 0).
         seed: Random seed passed to pandas for reproducibility.
         required_columns: Columns to validate before sampling.
         replace: Whether to sample with replacement.
+        stratify_by: Category column to stratify by.
+        allocation: "proportional" or "neyman" allocation across strata.
+        stratum_sd: Per-stratum metric standard deviation (Neyman allocation).
+        weight_column: Numeric column; rows are drawn with probability
+            proportional to it (importance / difficulty sampling).
 
     Returns:
         Sampled DataFrame (index reset).
@@ -109,9 +155,101 @@ def sample_dataset(
             "Use replace=True if you need more rows than available."
         )
 
-    sampled = df.sample(n=sample_size, random_state=seed, replace=replace).reset_index(drop=True)
+    if stratify_by is not None or weight_column is not None:
+        from sampling import draw_sample
+
+        with span("sample_dataset.draw_sample", rows=sample_size):
+            sampled = draw_sample(
+                df, sample_size, seed=seed, stratify_by=stratify_by, allocation=allocation,
+                stratum_sd=stratum_sd, weight_column=weight_column, replace=replace,
+            )
+        logger.info(
+            "Sampled %d/%d rows from %s (%s, stratify_by=%s, weight_column=%s, seed=%s)",
+            len(sampled), len(df), Path(path).name, sampled.attrs["sampling"]["strategy"],
+            stratify_by, weight_column, seed
+        )
+        return sampled
+
+    with span("sample_dataset.sample", rows=sample_size):
+        sampled = df.sample(n=sample_size, random_state=seed, replace=replace).reset_index(drop=True)
     logger.info(
         "Sampled %d/%d rows from %s (replace=%s, seed=%s)",
         len(sampled), len(df), Path(path).name, replace, seed
     )
     return sampled
+
+
+def usage_snapshot(model: Any) -> Optional[dict[str, int]]:
+    """Current cumulative usage of `model`, or None if it does not report usage."""
+    get_usage = getattr(model, "get_usage", None)
+    return get_usage() if callable(get_usage) else None
+
+
+def usage_delta(
+    before: Optional[Mapping[str, int]],
+    after: Optional[Mapping[str, int]],
+) -> Optional[dict[str, Any]]:
+    """Token usage between two snapshots, with the prefix-cache hit rate."""
+    if before is None or after is None:
+        return None
+    out: dict[str, Any] = {k: after.get(k, 0) - before.get(k, 0) for k in after}
+    prompt_tokens = out.get("prompt_tokens", 0)
+    out["cache_hit_rate"] = round(out.get("cached_tokens", 0) / prompt_tokens, 4) if prompt_tokens else None
+    return out
+
+
+def request_key(
+    model_name: str,
+    system_prompt: str,
+    params: Mapping[str, Any],
+    prompt: str,
+) -> str:
+    """Stable identity of a generate request (model, system prompt, params, prompt).
+
+    Used to single-flight identical requests and to look up recorded responses.
+    """
+    params_json = json.dumps(dict(params), sort_keys=True, default=str)
+    raw = "\x1f".join([model_name, system_prompt, params_json, prompt])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# dataset fields that decide a row's prompt and its grading
+ROW_HASH_COLUMNS = ("question", "options", "answer")
+
+
+def _json_default(value: Any) -> Any:
+    # numpy arrays / scalars from parquet or JSON datasets
+    return value.tolist() if hasattr(value, "tolist") else str(value)
+
+
+def row_hashes(df: pd.DataFrame, columns: Sequence[str] = ROW_HASH_COLUMNS) -> list[str]:
+    """Content hash of each row over `columns` (missing columns count as None).
+
+    Stable across processes and file formats that keep the same values, so a
+    row of a grown dataset can be matched to the same row of an earlier run.
+    """
+    out = []
+    for row in iter_rows(df, columns):
+        blob = json.dumps(list(row), default=_json_default, ensure_ascii=False)
+        out.append(hashlib.blake2b(blob.encode("utf-8"), digest_size=8).hexdigest())
+    return out
+
+
+def resolve_run_dir(run: PathLike) -> Path:
+    """Accept a run dir path or a bare run_id (looked up under outputs/runs/)."""
+    p = Path(run)
+    if p.is_dir():
+        return p
+    p = Path("outputs") / "runs" / str(run)
+    if not p.is_dir():
+        raise FileNotFoundError(f"Run directory not found: {run}")
+    return p
+
+
+def run_results_path(run_dir: Path) -> Path:
+    """run_{run_id}.parquet or .csv inside a run directory."""
+    run_id = run_dir.name
+    for p in (run_dir / f"run_{run_id}.parquet", run_dir / f"run_{run_id}.csv"):
+        if p.exists():
+            return p
+    raise FileNotFoundError(f"No run_{run_id}.csv or .parquet in {run_dir}")